@@ -0,0 +1,46 @@
+"""Formatter benchmarks for big carts and orders.
+
+Usage: python -m benchmarks.bench_formatters [--number N]
+"""
+import argparse
+import timeit
+
+from benchmarks.fixtures import make_cart, make_order, ORDER_DATA, USER_DATA
+from handlers.orders import build_order_details
+from services.admin_notifications import build_admin_notification
+from services.pricing import calculate_quote, promo_from_state
+from utils.formatters import build_cart_message, build_order_confirmation
+
+
+def cases():
+    for lines in (10, 50, 300):
+        cart = make_cart(lines)
+        total = sum(item['total'] for item in cart)
+        quote = calculate_quote(cart, promo_from_state({'promocode': 'SUMMER10', 'discount_value': 10}))
+        order = make_order(1, lines)
+        notification = {
+            'order_id': 1, 'total_amount': total, 'payment_method': 'zelle',
+            'products': order['products'],
+            'shipping_address': {**ORDER_DATA, 'state': 'NY'},
+            'promocode': 'SUMMER10',
+        }
+        yield f'quote[{lines}]', lambda: [calculate_quote(cart)]
+        yield f'cart[{lines}]', lambda: build_cart_message(quote).parts()
+        yield f'confirmation[{lines}]', lambda: build_order_confirmation(quote, ORDER_DATA).parts()
+        yield f'admin_notification[{lines}]', lambda: build_admin_notification(notification, USER_DATA).parts()
+        yield f'order_details[{lines}]', lambda: build_order_details(order).parts()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=200, help='calls per measurement')
+    args = parser.parse_args()
+
+    print(f"{'case':<28}{'us/call':>12}{'parts':>8}")
+    for name, func in cases():
+        best = min(timeit.repeat(func, number=args.number, repeat=5))
+        print(f"{name:<28}{best / args.number * 1e6:>12.1f}{len(func()):>8}")
+
+
+if __name__ == '__main__':
+    main()
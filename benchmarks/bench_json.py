@@ -0,0 +1,43 @@
+"""JSON codec benchmarks on catalog-sized Laravel payloads.
+
+Usage: python -m benchmarks.bench_json [--number N]
+
+Compares the standard library with the backend picked by utils/json_codec.py
+(orjson when installed) on a /products response with 1000 items.
+"""
+import argparse
+import timeit
+
+from benchmarks.fixtures import make_products
+from utils import json_codec
+
+
+def backends():
+    yield 'json', json_codec.stdlib_loads, json_codec.stdlib_dumps
+    if json_codec.BACKEND != 'json':
+        yield json_codec.BACKEND, json_codec.loads, json_codec.dumps
+
+
+def cases():
+    for count in (100, 1000):
+        response = {'data': make_products(count)}
+        body = json_codec.stdlib_dumps(response).encode()
+        for backend, loads, dumps in backends():
+            yield f'json_loads[{backend}][{count}]', lambda loads=loads, body=body: loads(body)
+            yield f'json_dumps[{backend}][{count}]', lambda dumps=dumps, response=response: dumps(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=50, help='calls per measurement')
+    args = parser.parse_args()
+
+    print(f"active backend: {json_codec.BACKEND}")
+    print(f"{'case':<32}{'us/call':>12}")
+    for name, func in cases():
+        best = min(timeit.repeat(func, number=args.number, repeat=5)) / args.number
+        print(f"{name:<32}{best * 1e6:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Realistic fixtures shared by the benchmarks"""
+import random
+from typing import Dict, List
+
+NAMES = ['Cruise Stick', 'Mango Ice', 'Blue Razz', 'Strawberry Kiwi', 'Cool Mint',
+         'Watermelon Bubblegum', 'Peach Lemonade', 'Grape Soda', 'Tropical Punch']
+
+
+def make_categories(count: int = 12) -> List[Dict]:
+    return [
+        {'id': i, 'name': f'Category {i}', 'products_count': 1000 // count}
+        for i in range(1, count + 1)
+    ]
+
+
+def make_products(count: int = 1000, categories: int = 12, seed: int = 1) -> List[Dict]:
+    rng = random.Random(seed)
+    products = []
+    for i in range(1, count + 1):
+        category_id = (i % categories) + 1
+        products.append({
+            'id': i,
+            'name': f"{rng.choice(NAMES)} {i} ({rng.randint(2, 9)}000 puffs)",
+            'price': f"{rng.randint(5, 60)}.{rng.choice(['00', '49', '99'])}",
+            'category_id': category_id,
+            'category': {'id': category_id, 'name': f'Category {category_id}'},
+            'description': 'Rich flavour, smooth draw. ' * rng.randint(2, 12),
+        })
+    return products
+
+
+def make_cart(lines: int = 50, seed: int = 2) -> List[Dict]:
+    rng = random.Random(seed)
+    cart = []
+    for product in make_products(lines, seed=seed):
+        price = float(product['price'])
+        quantity = rng.randint(1, 9)
+        cart.append({
+            'id': product['id'],
+            'name': product['name'],
+            'price': price,
+            'quantity': quantity,
+            'total': price * quantity,
+        })
+    return cart
+
+
+def make_order(order_id: int, lines: int = 20, seed: int = 3) -> Dict:
+    cart = make_cart(lines, seed=seed + order_id)
+    return {
+        'id': order_id,
+        'status': random.Random(order_id).choice(['pending', 'paid', 'shipped', 'delivered']),
+        'total_amount': round(sum(item['total'] for item in cart), 2),
+        'tracking_number': f'9400{order_id:018d}',
+        'products': [
+            {'id': item['id'], 'name': item['name'], 'quantity': item['quantity'], 'price': f"{item['price']:.2f}"}
+            for item in cart
+        ],
+        'shipping_address': {
+            'name': 'John Doe', 'street': '123 Main Street', 'house': 'Apt 5B',
+            'city': 'New York', 'state': 'NY', 'postal_code': '10001', 'phone': '+12125550100',
+        },
+        'dates': {'created_at': '2024-06-21 10:30'},
+    }
+
+
+def make_order_history(count: int = 200, lines: int = 8) -> List[Dict]:
+    return [make_order(order_id, lines) for order_id in range(count, 0, -1)]
+
+
+ORDER_DATA = {
+    'first_name': 'John', 'last_name': 'Doe', 'street': '123 Main Street', 'apartment': 'Apt 5B',
+    'city': 'New York', 'us_state': 'NY', 'zip_code': '10001', 'phone': '+12125550100',
+    'company': 'Tech Corp', 'promocode': 'SUMMER10', 'payment_method': 'zelle',
+}
+
+USER_DATA = {'telegram_id': 123456789, 'first_name': 'John', 'last_name': 'Doe', 'username': 'johndoe'}
@@ -0,0 +1 @@
+"""End-to-end load test harness with fake Laravel and Telegram servers."""
@@ -0,0 +1,179 @@
+"""Admin webhook throughput against a fake Telegram API.
+
+Usage: python -m benchmarks.loadtest.admin_webhook [--requests N] [--concurrency N]
+       [--endpoint tracking|zelle|reminder|mixed] [--telegram-latency MS]
+       [--rate-limit FRACTION] [--json PATH]
+
+Fires concurrent POSTs at the admin app from handlers/admin_webhook.py, the
+way Laravel does on shipping days. The bot sends through a local Bot API
+stand-in that can add latency and answer a share of calls with 429. The
+report shows accepted requests per second, the distribution of request
+latency (a 200 means the user message was delivered) and the errors.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import aiohttp
+from aiohttp.test_utils import TestServer
+
+ENDPOINTS = ('tracking', 'zelle', 'reminder')
+
+
+def payload(endpoint: str, user_id: int, order_id: int) -> Dict:
+    if endpoint == 'tracking':
+        return {
+            'telegram_id': user_id,
+            'order_id': order_id,
+            'tracking_number': f'9400{order_id:018d}',
+            'message': f'📦 <b>Order #{order_id} shipped!</b>\nTracking: <code>9400{order_id:018d}</code>',
+        }
+    if endpoint == 'zelle':
+        return {
+            'telegram_id': user_id,
+            'order_id': order_id,
+            'message': f'💵 <b>Zelle for order #{order_id}</b>\nEmail: <code>pay@example.com</code>',
+        }
+    return {
+        'telegram_id': user_id,
+        'reminder_type': 'cart_abandoned',
+        'message': '🛒 You left items in your cart!',
+    }
+
+
+async def fire(session: aiohttp.ClientSession, base_url: str, requests: int, concurrency: int,
+               endpoint: str, headers: Dict) -> Tuple[List[float], Counter, float]:
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    counter = itertools.count(1)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        n = next(counter)
+        name = random.choice(ENDPOINTS) if endpoint == 'mixed' else endpoint
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with session.post(f'{base_url}/admin/{name}', json=payload(name, 20_000_000 + n, n),
+                                        headers=headers) as response:
+                    body = await response.json(content_type=None)
+                    if response.status == 200:
+                        outcomes['accepted'] += 1
+                    else:
+                        # Group by the first words of the error, not by user/order specifics
+                        error = str(body.get('error', ''))[:48]
+                        outcomes[f'{response.status} {error}'] += 1
+            except Exception as e:
+                outcomes[f'client {e.__class__.__name__}'] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, outcomes, time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    import bot as bot_module
+    from benchmarks.loadtest.fake_laravel import FakeLaravel
+    from benchmarks.loadtest.fake_telegram import FakeTelegram
+    from config import settings
+    from handlers.admin_webhook import create_admin_app
+    from services.api_client import api_client
+    from services.metrics import percentile
+
+    telegram = FakeTelegram(latency=args.telegram_latency / 1000, rate_limit=args.rate_limit)
+    laravel = FakeLaravel(products=10)
+    telegram_server = TestServer(telegram.app())
+    laravel_server = TestServer(laravel.app())
+    await telegram_server.start_server()
+    await laravel_server.start_server()
+    api_client.base_url = str(laravel_server.make_url('')).rstrip('/')
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(str(telegram_server.make_url('')).rstrip('/')))
+    bot = bot_module.create_bot(session)
+    admin_server = TestServer(create_admin_app(bot))
+    await admin_server.start_server()
+
+    headers = {}
+    if settings.webhook_secret:
+        headers['Authorization'] = f'Bearer {settings.webhook_secret}'
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as client:
+            latencies, outcomes, elapsed = await fire(
+                client, str(admin_server.make_url('')).rstrip('/'),
+                args.requests, args.concurrency, args.endpoint, headers
+            )
+    finally:
+        await admin_server.close()
+        await bot.session.close()
+        await api_client.close()
+        await telegram_server.close()
+        await laravel_server.close()
+
+    ordered = sorted(latencies)
+    return {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'endpoint': args.endpoint,
+        'elapsed_s': round(elapsed, 2),
+        'accepted': outcomes['accepted'],
+        'accepted_per_s': round(outcomes['accepted'] / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(ordered, 0.50), 2),
+            'p90': round(percentile(ordered, 0.90), 2),
+            'p99': round(percentile(ordered, 0.99), 2),
+            'max': round(ordered[-1], 2) if ordered else 0.0,
+        },
+        'errors': {key: count for key, count in outcomes.most_common() if key != 'accepted'},
+        'telegram_calls': dict(telegram.calls.most_common()),
+        'telegram_429': telegram.rate_limited,
+    }
+
+
+def print_report(result: Dict) -> None:
+    latency = result['latency_ms']
+    print(f"{result['requests']} x /admin/{result['endpoint']} at concurrency {result['concurrency']}")
+    print(f"accepted: {result['accepted']} ({result['accepted_per_s']}/s) in {result['elapsed_s']} s")
+    print(f"latency ms: p50={latency['p50']} p90={latency['p90']} p99={latency['p99']} max={latency['max']}")
+    print(f"telegram calls: {result['telegram_calls']}, answered 429: {result['telegram_429']}")
+    for error, count in result['errors'].items():
+        print(f"  {count:>6}  {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--endpoint', choices=ENDPOINTS + ('mixed',), default='mixed')
+    parser.add_argument('--telegram-latency', type=float, default=30, help='Bot API latency, ms')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='share of Bot API calls answered with 429')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='also write the result to this file')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:loadtest')
+    os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+    os.environ.setdefault('TRACE_ENABLED', 'False')
+    os.environ.setdefault('CATALOG_SNAPSHOT_PATH', '')
+    os.environ.setdefault('PHOTO_CACHE_PATH', '')
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""aiohttp stand-in for the Laravel /api/bot/* endpoints used by the bot."""
+import asyncio
+import itertools
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from benchmarks.fixtures import make_categories, make_products
+
+# Ids in paths are replaced so calls are counted per endpoint, not per user
+_ID_RE = re.compile(r'/\d+')
+
+# Smaller bodies are sent uncompressed, like nginx's gzip_min_length
+GZIP_MIN_LENGTH = 1024
+
+
+class FakeLaravel:
+    """In-memory catalog, users and orders with optional response latency.
+
+    Catalog lists carry an ETag and a synced_at cursor: a matching
+    If-None-Match gets 304, and updated_since returns only the products
+    changed or deleted since that revision. A fields parameter limits the
+    keys of listed products, and large JSON bodies are gzipped when the
+    client accepts it.
+    """
+
+    def __init__(self, products: int = 1000, categories: int = 12, latency: float = 0.0):
+        self.categories = make_categories(categories)
+        self.products = make_products(products, categories)
+        for product in self.products:
+            product['image_url'] = f"https://img.example.com/products/{product['id']}.jpg"
+        self.products_by_id = {product['id']: product for product in self.products}
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.orders: Dict[int, List[Dict]] = {}
+        self._order_ids = itertools.count(1000)
+        # Catalog revision, bumped by every change; product id -> revision
+        self.revision = 0
+        self.updated_at: Dict[int, int] = {}
+        self.deleted_at: Dict[int, int] = {}
+
+    def reset_counters(self) -> None:
+        self.calls.clear()
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def update_product(self, product_id: int, **fields) -> None:
+        self.revision += 1
+        self.products_by_id[product_id].update(fields)
+        self.updated_at[product_id] = self.revision
+
+    def delete_product(self, product_id: int) -> None:
+        self.revision += 1
+        product = self.products_by_id.pop(product_id)
+        self.products.remove(product)
+        self.deleted_at[product_id] = self.revision
+
+    @staticmethod
+    def _json(request: web.Request, body, **kwargs) -> web.Response:
+        response = web.json_response(body, **kwargs)
+        if len(response.body) >= GZIP_MIN_LENGTH and 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response.enable_compression(web.ContentCoding.gzip)
+        return response
+
+    def _catalog_response(self, request: web.Request, items: List[Dict]) -> web.Response:
+        fields = request.query.get('fields')
+        # Validators differ per projection, like Laravel's would
+        etag = f'"{self.revision}-{fields}"' if fields else f'"{self.revision}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        since = request.query.get('updated_since')
+        if since is not None:
+            items = [item for item in items if self.updated_at.get(item['id'], 0) > int(since)]
+        if fields:
+            keys = fields.split(',')
+            items = [{key: item[key] for key in keys if key in item} for item in items]
+        body = {'data': items, 'synced_at': str(self.revision)}
+        if since is not None:
+            body['deleted'] = [item_id for item_id, revision in self.deleted_at.items() if revision > int(since)]
+        return self._json(request, body, headers={'ETag': etag})
+
+    @web.middleware
+    async def _count(self, request: web.Request, handler):
+        self.calls[f"{request.method} {_ID_RE.sub('/{id}', request.path)}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    async def categories_list(self, request: web.Request) -> web.Response:
+        return self._catalog_response(request, self.categories)
+
+    async def products_list(self, request: web.Request) -> web.Response:
+        category_id: Optional[str] = request.query.get('category_id')
+        products = self.products
+        if category_id:
+            products = [p for p in products if p['category_id'] == int(category_id)]
+        return self._catalog_response(request, products)
+
+    async def product(self, request: web.Request) -> web.Response:
+        product = self.products_by_id.get(int(request.match_info['product_id']))
+        if product is None:
+            return web.json_response({'error': 'Not found'}, status=404)
+        return self._json(request, {'data': product})
+
+    async def users(self, request: web.Request) -> web.Response:
+        await request.read()
+        return web.json_response({'success': True})
+
+    async def user_activity(self, request: web.Request) -> web.Response:
+        await request.read()
+        return web.json_response({'success': True})
+
+    async def create_order(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        order_id = next(self._order_ids)
+        total = sum(
+            float(self.products_by_id[item['id']]['price']) * item['quantity']
+            for item in data['products'] if item['id'] in self.products_by_id
+        )
+        self.orders.setdefault(data['telegram_user_id'], []).append({
+            'id': order_id, 'total_amount': round(total, 2), 'status': 'pending',
+            'payment_method': data['payment_method'], 'products': data['products'],
+        })
+        return web.json_response({
+            'success': True, 'order_id': order_id,
+            'total_amount': round(total, 2), 'zelle_assigned': True,
+        })
+
+    async def user_orders(self, request: web.Request) -> web.Response:
+        orders = self.orders.get(int(request.match_info['user_id']), [])
+        return web.json_response({'orders': orders[::-1], 'meta': {'total': len(orders)}})
+
+    async def user_zelle(self, request: web.Request) -> web.Response:
+        return web.json_response({'has_zelle': True, 'zelle_email': 'pay@example.com'})
+
+    async def promocode(self, request: web.Request) -> web.Response:
+        code = request.match_info['code'].upper()
+        if code == 'LOAD10':
+            return web.json_response({'valid': True, 'discount_type': 'percentage', 'discount_value': 10})
+        return web.json_response({'valid': False, 'message': 'Promo code not found'})
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._count])
+        app.router.add_get('/api/bot/categories', self.categories_list)
+        app.router.add_get('/api/bot/products', self.products_list)
+        app.router.add_get('/api/bot/products/{product_id}', self.product)
+        app.router.add_post('/api/bot/users', self.users)
+        app.router.add_post('/api/bot/user-activity', self.user_activity)
+        app.router.add_post('/api/bot/orders', self.create_order)
+        app.router.add_get('/api/bot/users/{user_id}/orders', self.user_orders)
+        app.router.add_get('/api/bot/users/{user_id}/zelle', self.user_zelle)
+        app.router.add_get('/api/bot/promocodes/{code}', self.promocode)
+        return app
@@ -0,0 +1,100 @@
+"""aiohttp stand-in for the Telegram Bot API (/bot<token>/<method>)."""
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from aiohttp import web
+
+BOT_USER = {'id': 42, 'is_bot': True, 'first_name': 'LoadTest', 'username': 'loadtest_bot'}
+
+# Methods answered with a Message object; everything else returns True
+_MESSAGE_METHODS = {'sendMessage', 'editMessageText', 'editMessageReplyMarkup', 'sendPhoto', 'editMessageMedia'}
+
+
+class FakeTelegram:
+    """Accepts Bot API calls and answers like Telegram would.
+
+    The last message id sent to every chat is kept, so simulated users can
+    press buttons under the message the bot actually sent them. Photos sent
+    by URL are counted: each one is a download from the image server.
+    """
+
+    def __init__(self, latency: float = 0.0, rate_limit: float = 0.0, retry_after: int = 1):
+        self.latency = latency
+        # Share of calls answered with 429 Too Many Requests
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self._random = random.Random(0)
+        self.rate_limited = 0
+        self.photo_downloads = 0
+        self.calls: Counter = Counter()
+        self.last_message_id: Dict[int, int] = {}
+        self._message_ids = itertools.count(1)
+
+    def reset_counters(self) -> None:
+        self.calls.clear()
+        self.rate_limited = 0
+        self.photo_downloads = 0
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def _photo(self, photo: str) -> Dict:
+        if photo.startswith(('http://', 'https://')):
+            self.photo_downloads += 1
+            photo = f"file-{abs(hash(photo))}"
+        return {'photo': [{'file_id': photo, 'file_unique_id': photo, 'width': 800, 'height': 800}]}
+
+    def _message(self, chat_id: int, text: str, message_id: Optional[int] = None) -> Dict:
+        if message_id is None:
+            message_id = next(self._message_ids)
+            self.last_message_id[chat_id] = message_id
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+            'text': text,
+        }
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.calls[method] += 1
+        params = dict(await request.post())
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.rate_limit and method != 'getMe' and self._random.random() < self.rate_limit:
+            self.rate_limited += 1
+            return web.json_response({
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {self.retry_after}',
+                'parameters': {'retry_after': self.retry_after},
+            }, status=429)
+
+        if method == 'getMe':
+            result = BOT_USER
+        elif method in _MESSAGE_METHODS and 'chat_id' in params:
+            message_id = int(params['message_id']) if 'message_id' in params else None
+            result = self._message(int(params['chat_id']), params.get('text', ''), message_id)
+            if method == 'sendPhoto':
+                del result['text']
+                result.update(self._photo(params['photo']), caption=params.get('caption', ''))
+            elif method == 'editMessageMedia':
+                media = json.loads(params['media'])
+                del result['text']
+                result.update(self._photo(media['media']), caption=media.get('caption', ''))
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        return app
@@ -0,0 +1,234 @@
+"""End-to-end load test against fake Laravel and Telegram servers.
+
+Usage: python -m benchmarks.loadtest.run [--users N] [--concurrency N]
+       [--laravel-latency MS] [--telegram-latency MS] [--json PATH]
+
+Every simulated user goes browse -> add to cart -> checkout -> confirm
+through the real dispatcher, middlewares and handlers. The bot's Laravel
+client and Bot API session point at local stand-ins, so only the bot's
+own work is measured.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from typing import Dict, List, Tuple
+
+from aiohttp.test_utils import TestServer
+
+# Journey steps: ('message', text) or ('callback', data); {cid}/{pid} are filled per user
+JOURNEY: List[Tuple[str, str]] = [
+    ('message', '/start'),
+    ('callback', 'catalog'),
+    ('callback', 'category:{cid}'),
+    ('callback', 'product:{pid}'),
+    ('callback', 'add_to_cart:{pid}'),
+    ('callback', 'cart'),
+    ('callback', 'checkout'),
+    ('message', 'John'),
+    ('message', 'Doe'),
+    ('message', '123 Main Street'),
+    ('message', 'New York'),
+    ('message', 'NY'),
+    ('message', '10001'),
+    ('callback', 'skip_field'),
+    ('callback', 'skip_field'),
+    ('callback', 'skip_field'),
+    ('callback', 'payment:zelle'),
+    ('callback', 'confirm_order'),
+]
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Settings are read at import time, so this runs before the bot is imported"""
+    os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:loadtest')
+    os.environ.setdefault('ADMIN_IDS', '900001,900002')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('TRACE_ENABLED', 'True' if args.trace else 'False')
+    os.environ.setdefault('TRACE_SAMPLE_RATE', '1.0')
+    # Simulated users click as fast as the bot answers
+    os.environ.setdefault('THROTTLE_ENABLED', 'False')
+    # Every run starts from Laravel, not from the previous run's catalog
+    os.environ.setdefault('CATALOG_SNAPSHOT_PATH', '')
+    os.environ.setdefault('PHOTO_CACHE_PATH', '')
+
+
+class Driver:
+    """Feeds journey updates for many users into the dispatcher"""
+
+    def __init__(self, bot, dp, telegram, laravel):
+        self.bot = bot
+        self.dp = dp
+        self.telegram = telegram
+        self.laravel = laravel
+        self.latencies: List[float] = []
+        self.errors = 0
+        self._update_ids = itertools.count(1)
+
+    def _update(self, user_id: int, kind: str, payload: str) -> Dict:
+        user = {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+        chat = {'id': user_id, 'type': 'private'}
+        if kind == 'message':
+            return {
+                'update_id': next(self._update_ids),
+                'message': {
+                    'message_id': next(self._update_ids), 'date': int(time.time()),
+                    'chat': chat, 'from': user, 'text': payload,
+                    **({'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(payload)}]}
+                       if payload.startswith('/') else {}),
+                },
+            }
+        # Buttons are pressed under the last message the bot sent to this chat
+        return {
+            'update_id': next(self._update_ids),
+            'callback_query': {
+                'id': str(next(self._update_ids)), 'from': user, 'chat_instance': str(user_id),
+                'data': payload,
+                'message': {
+                    'message_id': self.telegram.last_message_id.get(user_id, 1), 'date': int(time.time()),
+                    'chat': chat, 'from': {'id': 42, 'is_bot': True, 'first_name': 'LoadTest'}, 'text': '...',
+                },
+            },
+        }
+
+    async def journey(self, user_id: int) -> None:
+        from aiogram.types import Update
+
+        product = random.choice(self.laravel.products)
+        values = {'cid': product['category_id'], 'pid': product['id']}
+        for kind, payload in JOURNEY:
+            update = Update(**self._update(user_id, kind, payload.format(**values)))
+            started = time.perf_counter()
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception:
+                self.errors += 1
+            self.latencies.append((time.perf_counter() - started) * 1000)
+
+    async def run(self, users: int, concurrency: int) -> float:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(user_id: int):
+            async with semaphore:
+                await self.journey(user_id)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(10_000_000 + n) for n in range(users)))
+        return time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    import bot as bot_module
+    from benchmarks.loadtest.fake_laravel import FakeLaravel
+    from benchmarks.loadtest.fake_telegram import FakeTelegram
+    from services.api_client import api_client
+    from services.loop_monitor import loop_monitor
+    from services.metrics import handler_timings, laravel_transfer, percentile
+
+    laravel = FakeLaravel(products=args.products, latency=args.laravel_latency / 1000)
+    telegram = FakeTelegram(latency=args.telegram_latency / 1000)
+    laravel_server = TestServer(laravel.app())
+    telegram_server = TestServer(telegram.app())
+    await laravel_server.start_server()
+    await telegram_server.start_server()
+
+    api_client.base_url = str(laravel_server.make_url('')).rstrip('/')
+    session = AiohttpSession(api=TelegramAPIServer.from_base(str(telegram_server.make_url('')).rstrip('/')))
+    bot = bot_module.create_bot(session)
+    dp = bot_module.create_dispatcher()
+
+    try:
+        loop_monitor.start()
+        warmup = await bot_module.warm_up(bot)
+        warmup_calls = laravel.total_calls
+        laravel.reset_counters()
+        telegram.reset_counters()
+
+        driver = Driver(bot, dp, telegram, laravel)
+        elapsed = await driver.run(args.users, args.concurrency)
+    finally:
+        await loop_monitor.stop()
+        await bot.session.close()
+        await api_client.close()
+        await laravel_server.close()
+        await telegram_server.close()
+
+    ordered = sorted(driver.latencies)
+    journeys = args.users
+    slowest = sorted(handler_timings.stats().items(), key=lambda item: item[1]['p99_ms'], reverse=True)
+    return {
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'updates': len(ordered),
+        'errors': driver.errors,
+        'orders_created': sum(len(orders) for orders in laravel.orders.values()),
+        'elapsed_s': round(elapsed, 2),
+        'updates_per_s': round(len(ordered) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(ordered, 0.50), 2),
+            'p95': round(percentile(ordered, 0.95), 2),
+            'p99': round(percentile(ordered, 0.99), 2),
+            'max': round(ordered[-1], 2) if ordered else 0.0,
+        },
+        'laravel_calls_per_journey': round(laravel.total_calls / journeys, 2),
+        'laravel_calls': dict(laravel.calls.most_common()),
+        'telegram_calls_per_journey': round(telegram.total_calls / journeys, 2),
+        'telegram_calls': dict(telegram.calls.most_common()),
+        'photo_downloads': telegram.photo_downloads,
+        # Warm-up included: it downloads the catalog lists
+        'laravel_transfer': laravel_transfer.stats(),
+        'warmup': {**warmup, 'laravel_calls': warmup_calls},
+        'max_loop_lag_ms': round(loop_monitor.max_lag_ms, 1),
+        'slowest_handlers': dict(slowest[:5]),
+    }
+
+
+def print_report(result: Dict) -> None:
+    latency = result['latency_ms']
+    print(f"users={result['users']} concurrency={result['concurrency']} "
+          f"updates={result['updates']} errors={result['errors']} orders={result['orders_created']}")
+    print(f"throughput: {result['updates_per_s']} updates/s in {result['elapsed_s']} s")
+    print(f"latency ms: p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} max={latency['max']}")
+    print(f"laravel calls/journey: {result['laravel_calls_per_journey']}  {result['laravel_calls']}")
+    print(f"telegram calls/journey: {result['telegram_calls_per_journey']}  {result['telegram_calls']}")
+    print(f"photos downloaded by URL: {result['photo_downloads']}")
+    print(f"warm-up: {result['warmup']}")
+    print(f"{'laravel endpoint':<40}{'responses':>10}{'wire KB':>10}{'body KB':>10}{'saved %':>9}")
+    for name, stats in result['laravel_transfer'].items():
+        print(f"{name:<40}{stats['responses']:>10}{stats['wire_bytes'] / 1024:>10.1f}"
+              f"{stats['body_bytes'] / 1024:>10.1f}{stats['saved_pct']:>9}")
+    print(f"max loop lag: {result['max_loop_lag_ms']} ms")
+    print(f"{'handler':<40}{'count':>8}{'p50':>9}{'p99':>9}")
+    for name, stats in result['slowest_handlers'].items():
+        print(f"{name:<40}{stats['count']:>8}{stats['p50_ms']:>9}{stats['p99_ms']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000, help='simulated users, one journey each')
+    parser.add_argument('--concurrency', type=int, default=100, help='users in flight at once')
+    parser.add_argument('--products', type=int, default=1000, help='catalog size')
+    parser.add_argument('--laravel-latency', type=float, default=0, help='added Laravel latency, ms')
+    parser.add_argument('--telegram-latency', type=float, default=0, help='added Bot API latency, ms')
+    parser.add_argument('--trace', action='store_true', help='write per-update traces to TRACE_FILE')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='also write the result to this file')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    configure_environment(args)
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
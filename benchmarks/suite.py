@@ -0,0 +1,199 @@
+"""Microbenchmarks for formatters, keyboards, CartService and JSON with regression check.
+
+Usage: python -m benchmarks.suite [--filter TEXT] [--threshold 0.25] [--retries 3] [--update]
+
+Timings are divided by a fixed pure-Python calibration workload, so the
+baselines in benchmarks/baselines.json can be compared across machines.
+Exits with status 1 when a case is slower than its baseline by more than
+the threshold. --update rewrites the baselines from the current run.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict, Iterator, Tuple
+
+from benchmarks.bench_formatters import cases as formatter_cases
+from benchmarks.bench_json import cases as json_cases
+from benchmarks.fixtures import make_categories, make_products, make_cart, make_order_history
+from handlers.orders import parse_orders_page, build_order_details
+from keyboards.inline import (
+    categories_keyboard, products_keyboard, product_detail_keyboard,
+    cart_keyboard, cart_item_keyboard
+)
+from services.cart_service import CartService
+from services.catalog_cache import CatalogCache
+from services.pricing import PricingService, calculate_quote
+from utils.formatters import format_product_message
+
+BASELINES = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+# Wall time of one measurement repeat; number of calls is picked to fill it
+TARGET_SECONDS = 0.05
+
+
+def calibration() -> int:
+    """Fixed workload of dict/str/loop operations similar to the bot's own code"""
+    total = 0
+    for i in range(2000):
+        item = {'id': i, 'name': f'item {i}', 'price': i * 1.5}
+        total += len(item['name']) + int(item['price'])
+    return total
+
+
+def keyboard_cases() -> Iterator[Tuple[str, Callable]]:
+    categories = make_categories()
+    products = make_products(1000)
+    category = [p for p in products if p['category_id'] == 1]
+    cart = make_cart(50)
+    # What catalog handlers pay once the page is rendered for the catalog version
+    cache = CatalogCache()
+    cache.keyboard(('products', 1, 1), lambda: products_keyboard(category, 1))
+    yield 'categories_keyboard[12]', lambda: categories_keyboard(categories)
+    yield f'products_keyboard[{len(category)}]', lambda: products_keyboard(category, 1)
+    yield 'products_keyboard[1000]', lambda: products_keyboard(products)
+    yield 'products_keyboard_cached', lambda: cache.keyboard(('products', 1, 1), lambda: products_keyboard(category, 1))
+    yield 'product_detail_keyboard', lambda: product_detail_keyboard(5, 1)
+    yield 'cart_keyboard[50]', lambda: cart_keyboard(cart, 1)
+    yield 'cart_item_keyboard', lambda: cart_item_keyboard(5, 3)
+
+
+def cart_cases() -> Iterator[Tuple[str, Callable]]:
+    products = make_products(50)
+    service = CartService()
+    for product in products:
+        service.add_to_cart(1, product)
+
+    def fill_cart():
+        fresh = CartService()
+        for product in products:
+            fresh.add_to_cart(1, product)
+        return fresh
+
+    pricing = PricingService()
+    pricing_cart = CartService()
+    for product in products:
+        pricing_cart.add_to_cart(1, product)
+
+    def cached_quote():
+        # PricingService reads the global cart service; use a local one here
+        import services.cart_service as module
+        original, module.cart_service = module.cart_service, pricing_cart
+        try:
+            return pricing.quote(1)
+        finally:
+            module.cart_service = original
+
+    yield 'cart_add[50]', fill_cart
+    yield 'cart_update_quantity[50]', lambda: service.update_quantity(1, products[-1]['id'], 3)
+    yield 'cart_total[50]', lambda: service.get_cart_total(1)
+    yield 'cart_count[50]', lambda: service.get_cart_count(1)
+    yield 'quote_uncached[50]', lambda: calculate_quote(service.get_cart(1))
+    yield 'quote_cached[50]', cached_quote
+
+
+def message_cases() -> Iterator[Tuple[str, Callable]]:
+    product = make_products(1)[0]
+    history = make_order_history(200)
+    response = {'orders': history}
+    yield 'product_message', lambda: format_product_message(product)
+    yield 'orders_page[200]', lambda: build_order_details(parse_orders_page(response, 37, 1)[0][0]).parts()
+
+
+def all_cases() -> Iterator[Tuple[str, Callable]]:
+    yield from formatter_cases()
+    yield from keyboard_cases()
+    yield from cart_cases()
+    yield from message_cases()
+    yield from json_cases()
+
+
+def measure(func: Callable, repeat: int = 5) -> float:
+    """Best time per call in microseconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * TARGET_SECONDS / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def run(name_filter: str = '', exact: bool = False) -> Tuple[float, Dict[str, Dict[str, float]]]:
+    timings = {}
+    started_unit = measure(calibration)
+    for name, func in all_cases():
+        if name_filter and (name != name_filter if exact else name_filter not in name):
+            continue
+        timings[name] = measure(func)
+    # Calibrated before and after the cases; the faster run is the least disturbed
+    unit = min(started_unit, measure(calibration))
+    results = {
+        name: {'us': round(us, 2), 'relative': round(us / unit, 4)}
+        for name, us in timings.items()
+    }
+    return unit, results
+
+
+def load_baselines() -> Dict:
+    if not os.path.exists(BASELINES):
+        return {'cases': {}}
+    with open(BASELINES) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filter', default='', help='only cases whose name contains this text')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown, 0.25 = 25%%')
+    parser.add_argument('--retries', type=int, default=3, help='re-measurements of a case before it counts as regressed')
+    parser.add_argument('--update', action='store_true', help='write current results as baselines')
+    args = parser.parse_args()
+
+    unit, results = run(args.filter)
+    baselines = load_baselines()
+
+    # Noise shows up as one-off slow samples: re-measure suspects before failing
+    for _ in range(0 if args.update else args.retries):
+        suspects = [
+            name for name, result in results.items()
+            if name in baselines['cases']
+            and result['relative'] / baselines['cases'][name]['relative'] - 1 > args.threshold
+        ]
+        if not suspects:
+            break
+        for name in suspects:
+            _, retry = run(name_filter=name, exact=True)
+            if retry[name]['relative'] < results[name]['relative']:
+                results[name] = retry[name]
+
+    regressions = []
+    print(f"calibration: {unit:.1f} us")
+    print(f"{'case':<32}{'us/call':>12}{'baseline':>12}{'change':>10}")
+    for name, result in results.items():
+        baseline = baselines['cases'].get(name)
+        if baseline is None:
+            print(f"{name:<32}{result['us']:>12.1f}{'-':>12}{'new':>10}")
+            continue
+        change = result['relative'] / baseline['relative'] - 1
+        expected_us = baseline['relative'] * unit
+        flag = ''
+        if change > args.threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<32}{result['us']:>12.1f}{expected_us:>12.1f}{change:>+10.0%}{flag}")
+
+    if args.update:
+        baselines['calibration_us'] = round(unit, 2)
+        baselines['cases'].update(results)
+        with open(BASELINES, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baselines written to {BASELINES}")
+        return
+
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,43 @@
 import asyncio
 import logging
 import os
+import time
+from typing import Optional
 from aiohttp import web
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.enums import ParseMode
 
 from config import settings
-from handlers import start, catalog, cart, orders, support
+from handlers import start, catalog, search, cart, orders, support
 from handlers.admin_webhook import create_admin_app
+from middlewares.throttling import ThrottlingMiddleware
+from middlewares.timing import HandlerTimingMiddleware
+from middlewares.tracing import TracingMiddleware, TelegramTracingMiddleware
+from middlewares.routing import WorkerRoutingMiddleware
 from services.api_client import api_client
+from services.catalog_cache import catalog_cache
+from services.loop_monitor import loop_monitor
+from services.photo_cache import photo_cache
+from services.tracing import tracer
+from services.invalidation import invalidation_bus
+from services.worker_pool import WorkerPool
+from keyboards import inline
+from utils.logging_setup import setup_logging, stop_logging
+from utils import json_codec
 
-# Logging configuration
-logging.basicConfig(
-    level=logging.INFO if settings.debug else logging.WARNING,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging configuration: records are written by a background thread
+setup_logging()
 logger = logging.getLogger(__name__)
 
-async def start_admin_server():
+async def start_admin_server(bot: Bot, worker_pool: Optional[WorkerPool] = None):
     """Start HTTP server for admin commands"""
-    app = create_admin_app()
+    app = create_admin_app(bot, worker_pool)
     runner = web.AppRunner(app)
     await runner.setup()
     
@@ -32,35 +48,156 @@ async def start_admin_server():
     logger.info(f"Admin HTTP server started on http://0.0.0.0:{port}")
     return runner
 
-async def main():
-    """Main bot startup function"""
+async def timed_phase(name: str, coro, timings: dict):
+    """Run one warm-up phase and record its duration"""
+    started = time.perf_counter()
+    try:
+        return await coro
+    except Exception as e:
+        logger.warning(f"Warm-up phase '{name}' failed: {e}")
+    finally:
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Warm-up phase '{name}' took {timings[name]} ms")
+
+async def warm_up(bot: Bot) -> dict:
+    """Open connection pools, load the catalog and pre-render hot keyboards"""
+    timings = {}
+    started = time.perf_counter()
     
-    logger.info("Starting bot with token from environment...")
+    async def laravel_and_catalog():
+        await timed_phase('laravel_pool', api_client.start(), timings)
+        return await timed_phase('catalog', catalog_cache.warm_up(), timings)
     
-    # Проверяем токен
-    if not settings.bot_token or len(settings.bot_token) < 10:
-        logger.error("Invalid bot token!")
-        return
+    async def open_photo_cache():
+        if settings.product_photos:
+            # Stored file_ids are read once here, not on the first product views
+            await timed_phase('photo_cache', asyncio.to_thread(photo_cache.open), timings)
     
-    # Bot initialization
+    catalog_info, _, _ = await asyncio.gather(
+        laravel_and_catalog(),
+        timed_phase('telegram_pool', bot.get_me(), timings),
+        open_photo_cache()
+    )
+    
+    async def render_keyboards():
+        for keyboard in (inline.main_menu_keyboard, inline.back_to_menu_keyboard, inline.checkout_keyboard,
+                         inline.order_confirmation_keyboard, inline.help_keyboard,
+                         inline.cancel_support_keyboard, inline.skip_field_keyboard):
+            keyboard()
+        categories = await catalog_cache.get_categories()
+        if categories:
+            catalog.get_categories_markup(categories)
+    
+    await timed_phase('keyboards', render_keyboards(), timings)
+    
+    timings['total'] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"Warm-up finished in {timings['total']} ms, catalog: {catalog_info}")
+    return timings
+
+def create_bot(session: Optional[BaseSession] = None) -> Bot:
+    """Bot with HTML parse mode and Bot API call tracing"""
+    if session is None:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.telegram_api_url))
+    # Bot API responses and reply markups go through the fast JSON codec
+    session.json_loads = json_codec.loads
+    session.json_dumps = json_codec.dumps
     bot = Bot(
         token=settings.bot_token,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
+    # Bot API calls are recorded as spans of the current update trace
+    bot.session.middleware(TelegramTracingMiddleware())
+    return bot
+
+def create_dispatcher(storage: Optional[BaseStorage] = None) -> Dispatcher:
+    """Dispatcher with middlewares and all routers"""
+    dp = Dispatcher(storage=storage or MemoryStorage())
+    
+    # Every update gets a trace
+    dp.update.outer_middleware(TracingMiddleware())
     
-    # Dispatcher initialization
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    # Anti-flood throttling runs before filters so rejected updates stay cheap
+    throttling = ThrottlingMiddleware()
+    dp.callback_query.outer_middleware(throttling)
+    dp.message.outer_middleware(throttling)
+    
+    # Handler timings; inner middlewares of the dispatcher apply to every router
+    timing = HandlerTimingMiddleware()
+    dp.callback_query.middleware(timing)
+    dp.message.middleware(timing)
+    dp.inline_query.middleware(timing)
     
     # Router registration
     dp.include_router(start.router)
     dp.include_router(catalog.router)
+    # Before cart: /search must not be taken as a checkout form answer
+    dp.include_router(search.router)
     dp.include_router(cart.router)
     dp.include_router(orders.router)
     dp.include_router(support.router)
+    return dp
+
+async def run_sharded(bot: Bot):
+    """Multi-process mode: this process polls and routes, workers run the handlers"""
+    pool = WorkerPool(settings.workers, settings.shared_state_path)
+    pool.start()
+    # Admin webhooks run here; their cache invalidations must reach every worker
+    invalidation_bus.forward = pool.broadcast
+    
+    intake = Dispatcher()
+    intake.update.outer_middleware(WorkerRoutingMiddleware(pool))
+    # Intake has no routers, ask the worker dispatcher which update types are used
+    allowed_updates = create_dispatcher().resolve_used_update_types()
+    
+    # /ready and /metrics are served here: this process needs its own catalog and loop monitor.
+    # Updates are only routed, so polling does not wait for the warm-up
+    loop_monitor.start()
+    warmup_task = asyncio.create_task(warm_up(bot))
+    
+    admin_runner = await start_admin_server(bot, pool)
+    logger.info(f"Bot starting in polling mode with {settings.workers} workers...")
+    
+    try:
+        await intake.start_polling(bot, allowed_updates=allowed_updates)
+    finally:
+        if not warmup_task.done():
+            warmup_task.cancel()
+        await loop_monitor.stop()
+        await pool.stop()
+        await bot.session.close()
+        await api_client.close()
+        tracer.close()
+        await admin_runner.cleanup()
+
+async def main():
+    """Main bot startup function"""
+    
+    logger.info("Starting bot with token from environment...")
+    
+    # Проверяем токен
+    if not settings.bot_token or len(settings.bot_token) < 10:
+        logger.error("Invalid bot token!")
+        return
+    
+    bot = create_bot()
+    
+    if settings.workers > 0:
+        await run_sharded(bot)
+        return
+    
+    dp = create_dispatcher()
+    
+    loop_monitor.start()
+    
+    # Intake starts only after warm-up or when its deadline passes
+    warmup_task = asyncio.create_task(warm_up(bot))
+    done, _ = await asyncio.wait({warmup_task}, timeout=settings.warmup_deadline)
+    if not done:
+        logger.warning(f"Warm-up did not finish in {settings.warmup_deadline}s, starting anyway")
     
     # Start HTTP server for admin commands
-    admin_runner = await start_admin_server()
+    admin_runner = await start_admin_server(bot)
     
     logger.info("Bot starting in polling mode...")
     
@@ -68,7 +205,12 @@ async def main():
         # Start polling
         await dp.start_polling(bot)
     finally:
+        if not warmup_task.done():
+            warmup_task.cancel()
+        await loop_monitor.stop()
         await bot.session.close()
+        await api_client.close()
+        tracer.close()
         await admin_runner.cleanup()
 
 if __name__ == "__main__":
@@ -77,4 +219,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Bot crashed: {e}")
\ No newline at end of file
+        logger.error(f"Bot crashed: {e}")
+    finally:
+        stop_logging()
\ No newline at end of file
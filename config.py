@@ -24,8 +24,8 @@ class Settings(BaseSettings):
     # Admin IDs for notifications (comma-separated string)
     admin_ids_str: str = Field(default="", env='ADMIN_IDS')
     
-    # Telegram API URL
-    telegram_api_url: str = 'https://api.telegram.org'
+    # Telegram API URL (point at a local Bot API server if needed)
+    telegram_api_url: str = Field('https://api.telegram.org', env='TELEGRAM_API_URL')
     
     # Bot webhook URL for Laravel callbacks
     bot_webhook_url: str = Field(default="", env='BOT_WEBHOOK_URL')
@@ -40,6 +40,99 @@ class Settings(BaseSettings):
         except ValueError:
             return []
     
+    # Anti-flood throttling (token bucket per user: burst capacity and refill per second)
+    throttle_enabled: bool = Field(True, env='THROTTLE_ENABLED')
+    throttle_user_capacity: float = Field(15, env='THROTTLE_USER_CAPACITY')
+    throttle_user_rate: float = Field(4.0, env='THROTTLE_USER_RATE')
+    throttle_max_entries: int = Field(50000, env='THROTTLE_MAX_ENTRIES')
+    
+    # Window (seconds) for coalescing cart item re-renders on fast ➕/➖ taps
+    cart_render_debounce: float = Field(0.4, env='CART_RENDER_DEBOUNCE')
+    
+    # Number of messages whose last rendered content is remembered to skip identical edits
+    edit_cache_max_entries: int = Field(20000, env='EDIT_CACHE_MAX_ENTRIES')
+    
+    # Per-user order/Zelle cache; admin webhooks invalidate it, TTL is a safety net
+    user_cache_ttl: float = Field(300, env='USER_CACHE_TTL')
+    user_cache_max_entries: int = Field(20000, env='USER_CACHE_MAX_ENTRIES')
+    
+    # Promo code validation cache (seconds) and per-user attempt limit
+    promo_positive_ttl: float = Field(300, env='PROMO_POSITIVE_TTL')
+    promo_negative_ttl: float = Field(60, env='PROMO_NEGATIVE_TTL')
+    promo_attempts_limit: int = Field(5, env='PROMO_ATTEMPTS_LIMIT')
+    promo_attempts_window: float = Field(600, env='PROMO_ATTEMPTS_WINDOW')
+    
+    # Laravel HTTP client: pool size and request timeout (seconds)
+    laravel_pool_size: int = Field(100, env='LARAVEL_POOL_SIZE')
+    laravel_timeout: float = Field(15, env='LARAVEL_TIMEOUT')
+    # Ask Laravel for gzip-compressed responses (Accept-Encoding)
+    laravel_compression: bool = Field(True, env='LARAVEL_COMPRESSION')
+    # Circuit breaker: consecutive failures (errors, timeouts, 5xx) before Laravel
+    # calls are skipped, and seconds until a trial call is let through
+    laravel_breaker_failures: int = Field(5, env='LARAVEL_BREAKER_FAILURES')
+    laravel_breaker_cooldown: float = Field(30, env='LARAVEL_BREAKER_COOLDOWN')
+    
+    # Catalog cache TTL (seconds) and startup warm-up
+    catalog_cache_ttl: float = Field(300, env='CATALOG_CACHE_TTL')
+    warmup_deadline: float = Field(15, env='WARMUP_DEADLINE')
+    warmup_concurrency: int = Field(8, env='WARMUP_CONCURRENCY')
+    # On-disk catalog snapshot for warm restarts ('' disables it) and how long
+    # snapshot or last-known lists are served before Laravel is asked again
+    catalog_snapshot_path: str = Field('catalog_snapshot.json.gz', env='CATALOG_SNAPSHOT_PATH')
+    catalog_stale_ttl: float = Field(30, env='CATALOG_STALE_TTL')
+    # Product fields requested for catalog lists ('' requests full products);
+    # product pages fetch the full product and keep it for catalog_cache_ttl
+    catalog_list_fields: str = Field('id,name,price,category_id', env='CATALOG_LIST_FIELDS')
+    # Products per catalog page and rendered catalog keyboards kept per catalog version
+    products_page_size: int = Field(20, env='PRODUCTS_PAGE_SIZE')
+    keyboard_cache_size: int = Field(500, env='KEYBOARD_CACHE_SIZE')
+    
+    # /ready probe: result cache (seconds), per-probe timeout and degradation thresholds
+    ready_cache_ttl: float = Field(5, env='READY_CACHE_TTL')
+    ready_probe_timeout: float = Field(3, env='READY_PROBE_TIMEOUT')
+    ready_laravel_slow_ms: float = Field(1000, env='READY_LARAVEL_SLOW_MS')
+    ready_telegram_slow_ms: float = Field(1500, env='READY_TELEGRAM_SLOW_MS')
+    ready_loop_lag_ms: float = Field(100, env='READY_LOOP_LAG_MS')
+    ready_max_tasks: int = Field(5000, env='READY_MAX_TASKS')
+    
+    # Event loop lag sampler and slow handler reporting (milliseconds)
+    loop_lag_interval: float = Field(0.5, env='LOOP_LAG_INTERVAL')
+    loop_lag_warn_ms: float = Field(100, env='LOOP_LAG_WARN_MS')
+    slow_handler_ms: float = Field(1000, env='SLOW_HANDLER_MS')
+    handler_stats_samples: int = Field(1000, env='HANDLER_STATS_SAMPLES')
+    
+    # Logging: level (default INFO in debug mode, WARNING otherwise), text/json output,
+    # and keep one of every N debug records per call site
+    log_level: Optional[str] = Field(default=None, env='LOG_LEVEL')
+    log_format: str = Field('json', env='LOG_FORMAT')
+    log_debug_sample_every: int = Field(100, env='LOG_DEBUG_SAMPLE_EVERY')
+    
+    # Per-update tracing exported as JSON lines (rotated to <file>.1 past the size limit);
+    # a sample keeps the cost of building and writing traces off most updates
+    trace_enabled: bool = Field(True, env='TRACE_ENABLED')
+    trace_sample_rate: float = Field(0.05, env='TRACE_SAMPLE_RATE')
+    trace_file: str = Field('traces.jsonl', env='TRACE_FILE')
+    trace_file_max_bytes: int = Field(50 * 1024 * 1024, env='TRACE_FILE_MAX_BYTES')
+    
+    # Multi-process mode: number of worker processes (0 = everything in one process),
+    # shared SQLite file for carts/FSM state and worker supervision
+    # pydantic-settings reads the field name, the alias makes BOT_WORKERS work
+    workers: int = Field(0, env='BOT_WORKERS', validation_alias='BOT_WORKERS')
+    shared_state_path: str = Field('bot_state.sqlite3', env='SHARED_STATE_PATH')
+    worker_queue_size: int = Field(10000, env='WORKER_QUEUE_SIZE')
+    worker_check_interval: float = Field(2, env='WORKER_CHECK_INTERVAL')
+    
+    # Product search (/search and inline mode): results per answer and
+    # how long Telegram may cache an inline answer (seconds)
+    search_results_limit: int = Field(20, env='SEARCH_RESULTS_LIMIT')
+    inline_cache_time: int = Field(300, env='INLINE_CACHE_TIME')
+    
+    # Product photos: on/off, base URL for relative image paths (default
+    # <LARAVEL_API_URL>/storage) and the persistent map of Telegram file_ids
+    product_photos: bool = Field(True, env='PRODUCT_PHOTOS')
+    image_base_url: Optional[str] = Field(None, env='IMAGE_BASE_URL')
+    photo_cache_path: str = Field('photo_file_ids.sqlite3', env='PHOTO_CACHE_PATH')
+    
     # Optional webhook security settings
     webhook_secret: Optional[str] = Field(default=None, env='WEBHOOK_SECRET')
     allowed_webhook_origins: str = Field(default="", env='ALLOWED_WEBHOOK_ORIGINS')
@@ -1,29 +1,82 @@
 import logging
+from typing import Tuple
 from aiohttp import web, ClientSession
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import settings
 from services.api_client import api_client
+from services.user_cache import user_cache
+from services.promo_cache import promo_cache
+from services.invalidation import invalidation_bus
+from services.readiness import readiness_probe, OK
+from services.metrics import handler_timings, laravel_transfer
+from services.loop_monitor import loop_monitor
+from services.catalog_cache import catalog_cache
+from services.photo_cache import photo_cache
+from services.message_editor import message_editor
+from services.render_debouncer import render_debouncer
+from utils.json_codec import json_response, loads
 
 logger = logging.getLogger(__name__)
 
+def get_bot(request) -> Tuple[Bot, bool]:
+    """Bot shared with polling, or a temporary one that must be closed after use"""
+    bot = request.app.get('bot')
+    if bot is not None:
+        # Reuses the polling session and its connection pool
+        return bot, False
+    return Bot(token=settings.bot_token), True
+
 async def health_check(request):
     """Health check для пинга"""
     return web.Response(text="Bot is alive! 🤖")
 
+async def readiness_check(request):
+    """Deep readiness check: 200 when every probe is ok, 503 otherwise"""
+    result = await readiness_probe.get(request.app.get('bot'))
+    return json_response(result, status=200 if result['status'] == OK else 503)
+
+async def metrics(request):
+    """Handler timings, event loop lag and cache statistics"""
+    result = {}
+    worker_pool = request.app.get('worker_pool')
+    if worker_pool is not None:
+        # Handlers run in the workers; everything below is this process only
+        result = {'process': 'intake', 'workers': worker_pool.stats()}
+    return json_response({
+        **result,
+        'handlers': handler_timings.stats(),
+        'event_loop': loop_monitor.stats(),
+        'catalog_cache': catalog_cache.stats(),
+        'laravel_circuit': api_client.breaker.stats(),
+        'laravel_transfer': laravel_transfer.stats(),
+        'photo_cache': photo_cache.stats(),
+        'user_cache': user_cache.stats(),
+        'promo_cache': promo_cache.stats(),
+        'message_editor': {**message_editor.stats, 'saved_calls': message_editor.saved_calls},
+        'render_debouncer': {
+            'pending': render_debouncer.pending,
+            'scheduled': render_debouncer.scheduled,
+            'rendered': render_debouncer.rendered,
+        },
+    })
+
 async def send_zelle_to_user(request):
     """Обработчик для отправки Zelle реквизитов пользователю"""
     try:
-        data = await request.json()
+        data = await request.json(loads=loads)
         telegram_id = data.get('telegram_id')
         message = data.get('message')
         tracking_number = data.get('tracking_number')
         order_id = data.get('order_id')
         
         if not telegram_id or not message:
-            return web.json_response({'success': False, 'error': 'Missing required fields'}, status=400)
+            return json_response({'success': False, 'error': 'Missing required fields'}, status=400)
         
-        bot = Bot(token=settings.bot_token)
+        # Zelle assignment changed, order status may have changed with it
+        invalidation_bus.publish('user', int(telegram_id))
+        
+        bot, should_close_session = get_bot(request)
         
         try:
             await bot.send_message(
@@ -36,33 +89,37 @@ async def send_zelle_to_user(request):
                 ])
             )
             
-            await bot.session.close()
+            if should_close_session:
+                await bot.session.close()
             logger.info(f"Zelle info sent to user {telegram_id}")
-            return web.json_response({'success': True})
+            return json_response({'success': True})
             
         except Exception as e:
             logger.error(f"Error sending message to user {telegram_id}: {e}")
-            if bot.session:
+            if should_close_session and bot.session:
                 await bot.session.close()
-            return web.json_response({'success': False, 'error': str(e)}, status=500)
+            return json_response({'success': False, 'error': str(e)}, status=500)
             
     except Exception as e:
         logger.error(f"Error processing zelle request: {e}")
-        return web.json_response({'success': False, 'error': str(e)}, status=500)
+        return json_response({'success': False, 'error': str(e)}, status=500)
 
 async def send_tracking_to_user(request):
     """Обработчик для отправки трекинг номера пользователю"""
     try:
-        data = await request.json()
+        data = await request.json(loads=loads)
         telegram_id = data.get('telegram_id')
         message = data.get('message')
         tracking_number = data.get('tracking_number')
         order_id = data.get('order_id')
         
         if not telegram_id or not message:
-            return web.json_response({'success': False, 'error': 'Missing required fields'}, status=400)
+            return json_response({'success': False, 'error': 'Missing required fields'}, status=400)
         
-        bot = Bot(token=settings.bot_token)
+        # Order got a tracking number
+        invalidation_bus.publish('user_orders', int(telegram_id))
+        
+        bot, should_close_session = get_bot(request)
         
         try:
             # Создаем клавиатуру с кнопкой отслеживания
@@ -97,32 +154,33 @@ async def send_tracking_to_user(request):
                 except Exception as e:
                     logger.error(f"Failed to track order completion: {e}")
             
-            await bot.session.close()
+            if should_close_session:
+                await bot.session.close()
             logger.info(f"Tracking info sent to user {telegram_id}")
-            return web.json_response({'success': True})
+            return json_response({'success': True})
             
         except Exception as e:
             logger.error(f"Error sending tracking to user {telegram_id}: {e}")
-            if bot.session:
+            if should_close_session and bot.session:
                 await bot.session.close()
-            return web.json_response({'success': False, 'error': str(e)}, status=500)
+            return json_response({'success': False, 'error': str(e)}, status=500)
             
     except Exception as e:
         logger.error(f"Error processing tracking request: {e}")
-        return web.json_response({'success': False, 'error': str(e)}, status=500)
+        return json_response({'success': False, 'error': str(e)}, status=500)
 
 async def send_reminder_to_user(request):
     """Обработчик для отправки напоминаний от Laravel"""
     try:
-        data = await request.json()
+        data = await request.json(loads=loads)
         telegram_id = data.get('telegram_id')
         message = data.get('message')
         reminder_type = data.get('reminder_type')
         
         if not telegram_id or not message:
-            return web.json_response({'success': False, 'error': 'Missing required fields'}, status=400)
+            return json_response({'success': False, 'error': 'Missing required fields'}, status=400)
         
-        bot = Bot(token=settings.bot_token)
+        bot, should_close_session = get_bot(request)
         
         try:
             # Import here to avoid circular imports
@@ -135,19 +193,59 @@ async def send_reminder_to_user(request):
                 reply_markup=main_menu_keyboard()
             )
             
-            await bot.session.close()
+            if should_close_session:
+                await bot.session.close()
             logger.info(f"Reminder ({reminder_type}) sent to user {telegram_id}")
-            return web.json_response({'success': True})
+            return json_response({'success': True})
             
         except Exception as e:
             logger.error(f"Error sending reminder to user {telegram_id}: {e}")
-            if bot.session:
+            if should_close_session and bot.session:
                 await bot.session.close()
-            return web.json_response({'success': False, 'error': str(e)}, status=500)
+            return json_response({'success': False, 'error': str(e)}, status=500)
             
     except Exception as e:
         logger.error(f"Error processing reminder request: {e}")
-        return web.json_response({'success': False, 'error': str(e)}, status=500)
+        return json_response({'success': False, 'error': str(e)}, status=500)
+
+async def invalidate_promocodes(request):
+    """Обработчик для сброса кэша промокодов после изменений в Laravel"""
+    try:
+        data = await request.json(loads=loads) if request.can_read_body else {}
+        codes = data.get('codes')
+        if isinstance(codes, str):
+            codes = [codes]
+        if codes is not None and not isinstance(codes, list):
+            return json_response({'success': False, 'error': 'codes must be a list of strings'}, status=400)
+        if data.get('code'):
+            codes = (codes or []) + [data['code']]
+        if codes is not None and not all(isinstance(code, str) for code in codes):
+            return json_response({'success': False, 'error': 'codes must be a list of strings'}, status=400)
+
+        removed = invalidation_bus.publish('promocodes', codes)
+        return json_response({'success': True, 'removed': removed})
+        
+    except Exception as e:
+        logger.error(f"Error processing promocode invalidation: {e}")
+        return json_response({'success': False, 'error': str(e)}, status=500)
+
+async def invalidate_catalog(request):
+    """Обработчик для сброса кэша каталога после изменения товаров, цен или категорий в Laravel"""
+    try:
+        data = await request.json(loads=loads) if request.can_read_body else {}
+        product_ids = data.get('product_ids')
+        if data.get('product_id'):
+            product_ids = (product_ids or []) + [data['product_id']]
+        category_ids = data.get('category_ids')
+        if data.get('category_id'):
+            category_ids = (category_ids or []) + [data['category_id']]
+        
+        removed = invalidation_bus.publish('catalog', {'product_ids': product_ids, 'category_ids': category_ids})
+        return json_response({'success': True, 'removed': removed})
+        
+    except Exception as e:
+        logger.error(f"Error processing catalog invalidation: {e}")
+        return json_response({'success': False, 'error': str(e)}, status=500)
 
 async def webhook_security_middleware(request, handler):
     """Middleware for webhook security (optional)"""
@@ -155,17 +253,17 @@ async def webhook_security_middleware(request, handler):
     if settings.webhook_secret:
         auth_header = request.headers.get('Authorization', '')
         if not auth_header.startswith('Bearer ') or auth_header[7:] != settings.webhook_secret:
-            return web.json_response({'error': 'Unauthorized'}, status=401)
+            return json_response({'error': 'Unauthorized'}, status=401)
     
     # Check allowed origins if configured
     if settings.allowed_webhook_origins:
         origin = request.headers.get('Origin') or request.headers.get('Referer', '').split('/')[2]
         if origin and origin not in settings.allowed_webhook_origins:
-            return web.json_response({'error': 'Origin not allowed'}, status=403)
+            return json_response({'error': 'Origin not allowed'}, status=403)
     
     return await handler(request)
 
-def create_admin_app():
+def create_admin_app(bot: Bot = None, worker_pool=None):
     """Создание HTTP приложения для админских команд"""
     # Create middleware list
     middlewares = []
@@ -173,14 +271,22 @@ def create_admin_app():
         middlewares.append(webhook_security_middleware)
     
     app = web.Application(middlewares=middlewares)
+    # Polling bot instance, used by /ready to probe Telegram over its session
+    app['bot'] = bot
+    # Set in multi-process mode, /metrics reports its workers
+    app['worker_pool'] = worker_pool
     
     # Health check endpoints
     app.router.add_get('/', health_check)  # Главная страница
     app.router.add_get('/health', health_check)  # Альтернативный endpoint
+    app.router.add_get('/ready', readiness_check)  # Глубокая проверка готовности
+    app.router.add_get('/metrics', metrics)  # Тайминги обработчиков и кэши
     
     # Добавляем маршруты
     app.router.add_post('/admin/zelle', send_zelle_to_user)
     app.router.add_post('/admin/tracking', send_tracking_to_user)
     app.router.add_post('/admin/reminder', send_reminder_to_user)
+    app.router.add_post('/admin/promocode/invalidate', invalidate_promocodes)
+    app.router.add_post('/admin/catalog/invalidate', invalidate_catalog)
     
     return app
\ No newline at end of file
@@ -10,10 +10,17 @@ from keyboards.inline import (
     order_confirmation_keyboard, back_to_menu_keyboard, skip_field_keyboard
 )
 from services.cart_service import cart_service
+from services.render_debouncer import render_debouncer
 from services.api_client import api_client
+from services.catalog_cache import catalog_cache
+from services.promo_cache import promo_cache
+from services.pricing import PriceQuote, pricing_service, to_cents, format_cents
 from states.order_states import OrderStates
-from utils.formatters import format_cart_message, format_order_confirmation
+from utils.formatters import build_cart_message, build_order_confirmation
+from utils.message_builder import MessageBuilder
 from services.admin_notifications import notify_admins_new_order
+from services.message_editor import edit_message_text, send_message_parts
+from services.tracing import span
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -23,39 +30,20 @@ async def add_product_to_cart(callback: CallbackQuery):
     """Add product to cart"""
     
     try:
-        logger.info(f"Add to cart callback received: {callback.data}")
-        
         product_id = int(callback.data.split(":")[1])
         user_id = callback.from_user.id
         
-        logger.info(f"Adding product {product_id} to cart for user {user_id}")
-        
-        # Get product data from API
-        async with api_client as client:
-            # First try to get all products
-            products = await client.get_products()
-            logger.info(f"Total products received for cart: {len(products)}")
-            product = next((p for p in products if p['id'] == product_id), None)
-            
-            # If product not found - try searching in categories
-            if not product:
-                logger.info(f"Product {product_id} not found in main list, searching in categories for cart...")
-                categories = await client.get_categories()
-                for category in categories:
-                    category_products = await client.get_products(category_id=category['id'])
-                    product = next((p for p in category_products if p['id'] == product_id), None)
-                    if product:
-                        logger.info(f"Found product {product_id} in category {category['id']} for cart")
-                        break
+        # Name and price are in the catalog lists, the full product is not needed
+        product = await catalog_cache.get_product(product_id, full=False)
         
         if not product:
-            logger.warning(f"Product {product_id} not found for cart")
+            logger.warning("Product %s not found for cart", product_id)
             await callback.answer("Product not found", show_alert=True)
             return
         
         # Add to cart
         cart_service.add_to_cart(user_id, product)
-        logger.info(f"Product {product['name']} added to cart for user {user_id}")
+        logger.debug("Product %s added to cart for user %s", product_id, user_id)
         
         # Track cart activity for reminders via Laravel API
         try:
@@ -65,12 +53,12 @@ async def add_product_to_cart(callback: CallbackQuery):
                     'product_name': product['name']
                 })
         except Exception as e:
-            logger.error(f"Failed to track cart activity: {e}")
+            logger.error("Failed to track cart activity: %s", e)
         
         await callback.answer(f"✅ {product['name']} added to cart")
         
     except Exception as e:
-        logger.error(f"Error adding product to cart: {e}")
+        logger.error("Error adding product to cart: %s", e)
         await callback.answer("Error adding product to cart", show_alert=True)
 
 @router.callback_query(F.data == "cart")
@@ -79,18 +67,42 @@ async def show_cart(callback: CallbackQuery, state: FSMContext):
     
     user_id = callback.from_user.id
     cart_items = cart_service.get_cart(user_id)
-    cart_total = cart_service.get_cart_total(user_id)
+    quote = pricing_service.quote(user_id)
     
-    message_text = format_cart_message(cart_items, cart_total)
+    message_parts = build_cart_message(quote).parts()
     
     if state:
         await state.set_state(OrderStates.viewing_cart)
     
-    await callback.message.edit_text(
-        message_text,
-        reply_markup=cart_keyboard(cart_items, user_id)
+    # A pending or running item editor redraw must not overwrite the cart view
+    await render_debouncer.flush((callback.message.chat.id, callback.message.message_id))
+    
+    await send_message_parts(
+        callback.message,
+        message_parts,
+        reply_markup=cart_keyboard(cart_items, user_id),
+        edit=True
+    )
+
+def format_cart_item_message(item: Dict) -> str:
+    """Cart item editor text"""
+    price_cents = to_cents(item['price'])
+    return (
+        f"📝 <b>{item['name']}</b>\n\n"
+        f"💰 Price: {format_cents(price_cents)}\n"
+        f"📦 Quantity: {item['quantity']}\n"
+        f"💵 Total: {format_cents(price_cents * item['quantity'])}\n\n"
+        "Change Quantity:"
     )
 
+def build_confirmation_screen(title: str, quote: PriceQuote, order_data: Dict, footer: str) -> MessageBuilder:
+    """Confirmation screen rendered from a price quote"""
+    confirmation = MessageBuilder()
+    confirmation.add(title, "\n\n")
+    confirmation.extend(build_order_confirmation(quote, order_data))
+    confirmation.add("\n\n", footer)
+    return confirmation
+
 @router.callback_query(F.data.startswith("edit_cart_item:"))
 async def edit_cart_item(callback: CallbackQuery):
     """Edit cart item"""
@@ -105,16 +117,24 @@ async def edit_cart_item(callback: CallbackQuery):
         await callback.answer("Product not found in cart", show_alert=True)
         return
     
-    message_text = (
-        f"📝 <b>{item['name']}</b>\n\n"
-        f"💰 Price: ${item['price']}\n"
-        f"📦 Quantity: {item['quantity']}\n"
-        f"💵 Total: ${item['total']}\n\n"
-        "Change Quantity:"
+    await edit_message_text(
+        callback.message,
+        format_cart_item_message(item),
+        reply_markup=cart_item_keyboard(product_id, item['quantity'])
     )
+
+async def render_cart_item(message: Message, user_id: int, product_id: int):
+    """Redraw cart item editor with the current cart state"""
+    
+    cart_items = cart_service.get_cart(user_id)
+    item = next((item for item in cart_items if item['id'] == product_id), None)
+    
+    if not item:
+        return
     
-    await callback.message.edit_text(
-        message_text,
+    await edit_message_text(
+        message,
+        format_cart_item_message(item),
         reply_markup=cart_item_keyboard(product_id, item['quantity'])
     )
 
@@ -122,10 +142,23 @@ async def edit_cart_item(callback: CallbackQuery):
 async def update_cart_quantity(callback: CallbackQuery):
     """Update product quantity in cart"""
     
-    _, product_id, new_quantity = callback.data.split(":")
+    _, product_id, value = callback.data.split(":")
     product_id = int(product_id)
-    new_quantity = int(new_quantity)
     user_id = callback.from_user.id
+    render_key = (callback.message.chat.id, callback.message.message_id)
+    
+    cart_items = cart_service.get_cart(user_id)
+    item = next((item for item in cart_items if item['id'] == product_id), None)
+    
+    if not item:
+        await callback.answer("Product not found in cart", show_alert=True)
+        return
+    
+    # "+1"/"-1" are relative steps, plain numbers come from older keyboards
+    if value.startswith(("+", "-")):
+        new_quantity = item['quantity'] + int(value)
+    else:
+        new_quantity = int(value)
     
     if new_quantity <= 0:
         cart_service.remove_from_cart(user_id, product_id)
@@ -133,27 +166,14 @@ async def update_cart_quantity(callback: CallbackQuery):
         await show_cart(callback, None)
         return
     
+    # Cart changes right away, the message is redrawn once the taps settle
     cart_service.update_quantity(user_id, product_id, new_quantity)
+    await callback.answer(f"Quantity changed to {new_quantity}")
     
-    # Update message
-    cart_items = cart_service.get_cart(user_id)
-    item = next((item for item in cart_items if item['id'] == product_id), None)
-    
-    if item:
-        message_text = (
-            f"📝 <b>{item['name']}</b>\n\n"
-            f"💰 Price: ${item['price']}\n"
-            f"📦 Quantity: {item['quantity']}\n"
-            f"💵 Total: ${item['total']}\n\n"
-            "Change Quantity:"
-        )
-        
-        await callback.message.edit_text(
-            message_text,
-            reply_markup=cart_item_keyboard(product_id, item['quantity'])
-        )
-    
-    await callback.answer(f"Quantity change on {new_quantity}")
+    render_debouncer.schedule(
+        render_key,
+        lambda: render_cart_item(callback.message, user_id, product_id)
+    )
 
 @router.callback_query(F.data.startswith("remove_from_cart:"))
 async def remove_from_cart(callback: CallbackQuery):
@@ -197,7 +217,8 @@ async def start_checkout(callback: CallbackQuery, state: FSMContext):
     
     await state.set_state(OrderStates.entering_first_name)
     
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         "📞 <b>Confirming order</b>\n\n"
         "🎯 Where to deliver the order?\n\n"
         "👤 Enter your first name:",
@@ -368,15 +389,13 @@ async def skip_company(callback: CallbackQuery, state: FSMContext):
     await state.set_state(OrderStates.selecting_payment)
     
     user_id = callback.from_user.id
-    cart_items = cart_service.get_cart(user_id)
-    cart_total = cart_service.get_cart_total(user_id)
-    
     order_data = await state.get_data()
     
-    confirmation_text = format_order_confirmation(cart_items, cart_total, order_data)
+    confirmation = build_order_confirmation(pricing_service.quote(user_id, order_data), order_data)
     
-    await callback.message.answer(
-        confirmation_text,
+    await send_message_parts(
+        callback.message,
+        confirmation.parts(),
         reply_markup=checkout_keyboard()
     )
     await callback.answer()
@@ -394,15 +413,13 @@ async def process_company(message: Message, state: FSMContext):
     await state.set_state(OrderStates.selecting_payment)
     
     user_id = message.from_user.id
-    cart_items = cart_service.get_cart(user_id)
-    cart_total = cart_service.get_cart_total(user_id)
-    
     order_data = await state.get_data()
     
-    confirmation_text = format_order_confirmation(cart_items, cart_total, order_data)
+    confirmation = build_order_confirmation(pricing_service.quote(user_id, order_data), order_data)
     
-    await message.answer(
-        confirmation_text,
+    await send_message_parts(
+        message,
+        confirmation.parts(),
         reply_markup=checkout_keyboard()
     )
 
@@ -414,47 +431,24 @@ async def select_payment_method(callback: CallbackQuery, state: FSMContext):
     await state.update_data(payment_method=payment_method)
     
     user_id = callback.from_user.id
-    cart_items = cart_service.get_cart(user_id)
-    cart_total = cart_service.get_cart_total(user_id)
     order_data = await state.get_data()
     
-    # Recalculate with discount if there's a promocode
-    final_total = cart_total
-    discount_text = ""
-    
-    if order_data.get('promocode'):
-        discount_type = order_data.get('discount_type', 'percentage')
-        discount_value = order_data.get('discount_value', 0)
-        logger.info(f"Payment method selection - discount_type: {discount_type}, discount_value: {discount_value}")
-        
-        if discount_type == 'fixed':
-            discount_amount = min(float(discount_value), cart_total)
-            promo_text = f"🎫 <b>Promo code:</b> {order_data['promocode']} (-${discount_amount:.2f})\n"
-        else:  # percentage
-            discount_amount = cart_total * (float(discount_value) / 100)
-            promo_text = f"🎫 <b>Promo code:</b> {order_data['promocode']} (-{discount_value}%)\n"
-        
-        final_total = cart_total - discount_amount
-        discount_text = (
-            f"{promo_text}"
-            f"💰 <b>Discount:</b> -${discount_amount:.2f}\n"
-            f"💵 <b>Total to pay:</b> ${final_total:.2f}\n\n"
-        )
-    
-    # Final order confirmation
-    confirmation_text = (
-        "✅ <b>Confirming order</b>\n\n"
-        f"{format_order_confirmation(cart_items, cart_total, order_data)}\n\n"
-        f"{discount_text}"
+    # Final order confirmation (discount comes from the cached quote)
+    confirmation = build_confirmation_screen(
+        "✅ <b>Confirming order</b>",
+        pricing_service.quote(user_id, order_data),
+        order_data,
         f"💳 <b>Payment method:</b> {payment_method.upper()}\n\n"
         "Is all information correct?"
     )
     
     await state.set_state(OrderStates.confirming_order)
     
-    await callback.message.edit_text(
-        confirmation_text,
-        reply_markup=order_confirmation_keyboard()
+    await send_message_parts(
+        callback.message,
+        confirmation.parts(),
+        reply_markup=order_confirmation_keyboard(),
+        edit=True
     )
 
 async def handle_zelle_payment(callback: CallbackQuery, order_id: int, total_amount: float, user_id: int):
@@ -488,7 +482,8 @@ async def handle_zelle_payment(callback: CallbackQuery, order_id: int, total_amo
             f"🕐 This usually takes a few minutes."
         )
     
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         payment_text,
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="📦 My Orders", callback_data="my_orders")],
@@ -509,7 +504,8 @@ async def send_crypto_payment_info(callback: CallbackQuery, order_id: int, total
         f"📱 You will receive payment confirmation notification."
     )
     
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         payment_text,
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="💳 Pay Now", url=f"https://payment-link-for-order-{order_id}")],
@@ -524,7 +520,8 @@ async def enter_promocode(callback: CallbackQuery, state: FSMContext):
     
     await state.set_state(OrderStates.entering_promocode_code)
     
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         "🎫 <b>Enter promo code</b>\n\n"
         "Send code to get discount:",
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
@@ -538,12 +535,19 @@ async def process_promocode(message: Message, state: FSMContext):
     
     promocode = message.text.strip().upper()
     
-    # Check promocode via API
+    # Guessing codes is rejected locally before it reaches Laravel
+    if not promo_cache.limiter.hit(message.from_user.id):
+        retry_after = int(promo_cache.limiter.retry_after(message.from_user.id)) + 1
+        await message.answer(
+            f"⏳ Too many promo code attempts. Try again in {retry_after} sec."
+        )
+        return
+    
+    # Check promocode via API (cached)
     async with api_client as client:
         result = await client.check_promocode(promocode)
     
-    # Log full API response for debugging
-    logger.info(f"Promocode API response for {promocode}: {result}")
+    logger.debug("Promocode %s checked, valid=%s", promocode, result.get('valid'))
     
     if result.get('valid'):
         # Get discount data
@@ -561,7 +565,7 @@ async def process_promocode(message: Message, state: FSMContext):
         if discount_type == 'fixed':
             await message.answer(
                 f"✅ Promocode <b>{promocode}</b> applied!\n"
-                f"💰 Fix Discount: ${discount_value}"
+                f"💰 Fix Discount: {format_cents(to_cents(discount_value))}"
             )
         else:  # percentage
             await message.answer(
@@ -573,31 +577,18 @@ async def process_promocode(message: Message, state: FSMContext):
         await state.set_state(OrderStates.confirming_order)
         
         user_id = message.from_user.id
-        cart_items = cart_service.get_cart(user_id)
-        cart_total = cart_service.get_cart_total(user_id)
         order_data = await state.get_data()
         
-        # Recalculate with discount
-        if discount_type == 'fixed':
-            discount_amount = min(float(discount_value), cart_total)
-            discount_text = f"🎫 <b>Promorode:</b> {promocode} (-${discount_amount:.2f})\n"
-        else:  # percentage
-            discount_amount = cart_total * (float(discount_value) / 100)
-            discount_text = f"🎫 <b>Promocode:</b> {promocode} (-{discount_value}%)\n"
-        
-        final_total = cart_total - discount_amount
-        
-        confirmation_text = (
-            "✅ <b>Order Confirmation</b>\n\n"
-            f"{format_order_confirmation(cart_items, cart_total, order_data)}\n\n"
-            f"{discount_text}"
-            f"💰 <b>Discount:</b> -${discount_amount:.2f}\n"
-            f"💵 <b>Total to pay:</b> ${final_total:.2f}\n\n"
+        confirmation = build_confirmation_screen(
+            "✅ <b>Order Confirmation</b>",
+            pricing_service.quote(user_id, order_data),
+            order_data,
             "Is all information correct?"
         )
         
-        await message.answer(
-            confirmation_text,
+        await send_message_parts(
+            message,
+            confirmation.parts(),
             reply_markup=order_confirmation_keyboard()
         )
         
@@ -613,19 +604,20 @@ async def back_to_confirmation(callback: CallbackQuery, state: FSMContext):
     await state.set_state(OrderStates.confirming_order)
     
     user_id = callback.from_user.id
-    cart_items = cart_service.get_cart(user_id)
-    cart_total = cart_service.get_cart_total(user_id)
     order_data = await state.get_data()
     
-    confirmation_text = (
-        "✅ <b>Order Confirmation</b>\n\n"
-        f"{format_order_confirmation(cart_items, cart_total, order_data)}\n\n"
+    confirmation = build_confirmation_screen(
+        "✅ <b>Order Confirmation</b>",
+        pricing_service.quote(user_id, order_data),
+        order_data,
         "Is all information correct?"
     )
     
-    await callback.message.edit_text(
-        confirmation_text,
-        reply_markup=order_confirmation_keyboard()
+    await send_message_parts(
+        callback.message,
+        confirmation.parts(),
+        reply_markup=order_confirmation_keyboard(),
+        edit=True
     )
 
 @router.callback_query(F.data == "confirm_order", OrderStates.confirming_order)
@@ -670,7 +662,8 @@ async def confirm_order(callback: CallbackQuery, state: FSMContext):
         result = await client.create_order(api_order_data)
     
     if not result or 'order_id' not in result:
-        await callback.message.edit_text(
+        await edit_message_text(
+            callback.message,
             "❌ Ошибка при создании заказа. Попробуйте позже.",
             reply_markup=back_to_menu_keyboard()
         )
@@ -725,7 +718,8 @@ async def confirm_order(callback: CallbackQuery, state: FSMContext):
             'zelle_assigned': result.get('zelle_assigned', False)
         }
         
-        await notify_admins_new_order(notification_data, user_info, callback.bot)
+        with span('fanout', 'notify_admins', admins=len(settings.admin_ids)):
+            await notify_admins_new_order(notification_data, user_info, callback.bot)
         logger.info(f"Admin notification sent for order {order_id}")
     except Exception as e:
         logger.error(f"Failed to send admin notification for order {order_id}: {e}")
@@ -1,89 +1,142 @@
+import logging
 from aiogram import Router, F
-from aiogram.types import CallbackQuery
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
+from config import settings
 from keyboards.inline import categories_keyboard, products_keyboard, product_detail_keyboard, back_to_menu_keyboard
-from services.api_client import api_client
+from services.catalog_cache import catalog_cache
+from services.message_editor import edit_message_text, message_editor
+from services.photo_cache import photo_cache, product_image_url
+from services.helpers import truncate_text
 from utils.formatters import format_product_message
 
 router = Router()
+logger = logging.getLogger(__name__)
+
+# Telegram limit for photo captions
+CAPTION_MAX_LENGTH = 1024
+
+def get_categories_markup(categories: list):
+    """Categories keyboard, built once per catalog version"""
+    return catalog_cache.keyboard('categories', lambda: categories_keyboard(categories))
+
+def get_products_markup(products: list, category_id: int, page: int):
+    """Page of a category's products, built once per catalog version"""
+    return catalog_cache.keyboard(
+        ('products', category_id, page), lambda: products_keyboard(products, category_id, page)
+    )
+
+async def show_product_photo(message: Message, product_id: int, image_url: str,
+                             caption: str, reply_markup: InlineKeyboardMarkup) -> bool:
+    """Product page as a photo: the stored file_id if there is one, else the URL.
+    Returns False when Telegram accepted neither, so the caller shows text."""
+    file_id = await photo_cache.get(product_id, image_url)
+    for photo in filter(None, (file_id, image_url)):
+        try:
+            result = await message_editor.edit_photo(message, photo, caption, reply_markup=reply_markup)
+        except TelegramBadRequest as e:
+            logger.warning("Photo for product %s not shown (%s): %s",
+                           product_id, 'file_id' if photo == file_id else 'url', e)
+            if photo == file_id:
+                await photo_cache.forget(product_id, image_url)
+            continue
+        if photo == image_url and isinstance(result, Message) and result.photo:
+            # Later views send the id: no upload, no request to the image server
+            await photo_cache.set(product_id, image_url, result.photo[-1].file_id)
+        return True
+    return False
 
 @router.callback_query(F.data == "catalog")
 async def show_catalog(callback: CallbackQuery):
     """Show catalog - categories"""
     
-    async with api_client as client:
-        categories = await client.get_categories()
+    categories = await catalog_cache.get_categories()
     
     if not categories:
-        await callback.message.edit_text(
+        await edit_message_text(
+            callback.message,
             "😔 No categories available yet",
             reply_markup=back_to_menu_keyboard()
         )
         return
     
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         "📂 <b>Choose a category:</b>",
-        reply_markup=categories_keyboard(categories)
+        reply_markup=get_categories_markup(categories)
     )
 
-@router.callback_query(F.data.startswith("category:"))
-async def show_category_products(callback: CallbackQuery):
-    """Show category products"""
-    
-    category_id = int(callback.data.split(":")[1])
-    
-    async with api_client as client:
-        products = await client.get_products(category_id=category_id)
+async def render_products_page(callback: CallbackQuery, category_id: int, page: int):
+    """Show one page of a category's products"""
+    products = await catalog_cache.get_products(category_id=category_id)
     
     if not products:
-        await callback.message.edit_text(
+        await edit_message_text(
+            callback.message,
             "😔 No products in this category yet",
             reply_markup=back_to_menu_keyboard()
         )
         return
     
-    await callback.message.edit_text(
-        f"🛍️ <b>Category products:</b>",
-        reply_markup=products_keyboard(products, category_id)
+    # Pages past the end (the list got shorter) show the last one
+    last_page = max(1, -(-len(products) // settings.products_page_size))
+    page = min(max(page, 1), last_page)
+    
+    title = "🛍️ <b>Category products:</b>"
+    if last_page > 1:
+        title = f"🛍️ <b>Category products</b> (page {page}/{last_page}):"
+    
+    await edit_message_text(
+        callback.message,
+        title,
+        reply_markup=get_products_markup(products, category_id, page)
     )
 
+@router.callback_query(F.data.startswith("category:"))
+async def show_category_products(callback: CallbackQuery):
+    """Show category products"""
+    
+    category_id = int(callback.data.split(":")[1])
+    
+    await render_products_page(callback, category_id, 1)
+
+@router.callback_query(F.data.startswith("products_page:"))
+async def show_products_page(callback: CallbackQuery):
+    """Switch the products page"""
+    
+    _, page, category_id = callback.data.split(":")
+    
+    await render_products_page(callback, None if category_id == 'None' else int(category_id), int(page))
+    await callback.answer()
+
 @router.callback_query(F.data.startswith("product:"))
 async def show_product_detail(callback: CallbackQuery):
     """Show product details"""
-    import logging
-    logger = logging.getLogger(__name__)
     
-    logger.info(f"Product detail requested: {callback.data}")
     product_id = int(callback.data.split(":")[1])
-    logger.info(f"Looking for product ID: {product_id}")
-    
-    async with api_client as client:
-        # First try to get all products
-        products = await client.get_products()
-        logger.info(f"Total products received from get_products(): {len(products)}")
-        product = next((p for p in products if p['id'] == product_id), None)
-        
-        # If product not found - try searching in categories
-        if not product:
-            logger.info(f"Product {product_id} not found in main list, searching in categories...")
-            categories = await client.get_categories()
-            for category in categories:
-                category_products = await client.get_products(category_id=category['id'])
-                logger.info(f"Category {category['id']} has {len(category_products)} products")
-                product = next((p for p in category_products if p['id'] == product_id), None)
-                if product:
-                    logger.info(f"Found product {product_id} in category {category['id']}")
-                    break
+    
+    # Served from the catalog index, Laravel is asked only on a miss
+    product = await catalog_cache.get_product(product_id)
     
     if not product:
-        logger.warning(f"Product {product_id} not found")
+        logger.warning("Product %s not found", product_id)
         await callback.answer("Product not found", show_alert=True)
         return
     
-    message_text = format_product_message(product)
+    reply_markup = product_detail_keyboard(product_id, product.get('category_id'))
+    image_url = product_image_url(product) if settings.product_photos else None
+    if image_url:
+        caption = truncate_text(format_product_message(product), CAPTION_MAX_LENGTH)
+        if await show_product_photo(callback.message, product_id, image_url, caption, reply_markup):
+            return
+    
+    # Product page is a single message with a keyboard, long descriptions are cut
+    message_text = truncate_text(format_product_message(product))
     
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         message_text,
-        reply_markup=product_detail_keyboard(product_id, product.get('category_id'))
+        reply_markup=reply_markup
     )
 
 @router.callback_query(F.data == "main_menu")
@@ -96,7 +149,8 @@ async def back_to_main_menu(callback: CallbackQuery):
     )
     
     from keyboards.inline import main_menu_keyboard
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         welcome_text,
         reply_markup=main_menu_keyboard()
     )
\ No newline at end of file
@@ -1,31 +1,87 @@
 import logging
+import math
+from typing import Dict, List, Optional, Tuple
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from services.api_client import api_client
 from services.cart_service import cart_service
 from keyboards.inline import back_to_menu_keyboard, checkout_keyboard
+from services.message_editor import edit_message_text, send_message_parts
 from states.order_states import OrderStates
-from utils.formatters import format_cart_message
+from services.pricing import pricing_service, format_cents
+from utils.message_builder import MessageBuilder
 
 router = Router()
 logger = logging.getLogger(__name__)
 
+# Orders shown per "My Orders" page (each order is rendered in full)
+ORDERS_PER_PAGE = 1
+# Orders per request when the history is searched for one order
+HISTORY_PAGE_SIZE = 50
+
+def parse_orders_page(response: Dict, page: int, per_page: int) -> Tuple[List[Dict], int]:
+    """Orders of the requested page and total number of pages"""
+    
+    orders = response.get('orders', [])
+    meta = response.get('meta') or response.get('pagination') or {}
+    total = meta.get('total', response.get('total'))
+    total = int(total) if total is not None else None
+    
+    if total is None or (len(orders) > per_page and len(orders) == total):
+        # Laravel ignored paging and returned the whole history
+        total = len(orders)
+        orders = orders[(page - 1) * per_page:page * per_page]
+    
+    pages = max(1, math.ceil(total / per_page))
+    return orders[:per_page], pages
+
+async def find_order_in_history(client, user_id: int, order_id: int) -> Optional[Dict]:
+    """Order from the user's paged history, for when the single-order request fails"""
+    
+    page, pages = 1, 1
+    while page <= pages:
+        response = await client.get_user_orders(user_id, page=page, per_page=HISTORY_PAGE_SIZE)
+        orders, pages = parse_orders_page(response, page, HISTORY_PAGE_SIZE)
+        if not orders:
+            break
+        for order in orders:
+            if order.get('id') == order_id:
+                return order
+        page += 1
+    return None
+
 @router.callback_query(F.data == "my_orders")
+@router.callback_query(F.data.startswith("orders_page:"))
 async def show_my_orders(callback: CallbackQuery):
-    """Show user orders"""
+    """Show user orders page by page"""
+    
+    page = 1
+    if callback.data.startswith("orders_page:"):
+        page = max(1, int(callback.data.split(":")[1]))
+    
+    await show_orders_page(callback, page)
+
+async def show_orders_page(callback: CallbackQuery, page: int):
+    """Render one page of user orders"""
     
     user_id = callback.from_user.id
     
     try:
-        # Get user orders
+        # Only the requested page is fetched from Laravel
         async with api_client as client:
-            orders_response = await client.get_user_orders(user_id)
+            orders_response = await client.get_user_orders(user_id, page=page, per_page=ORDERS_PER_PAGE)
         
-        orders = orders_response.get('orders', [])
+        orders, pages = parse_orders_page(orders_response, page, ORDERS_PER_PAGE)
+        
+        if not orders and page > 1:
+            # History shrank since the page button was drawn
+            await show_orders_page(callback, 1)
+            return
         
         if not orders:
-            await callback.message.edit_text(
+            await edit_message_text(
+                callback.message,
                 "📦 <b>Мои заказы</b>\n\n"
                 "У вас пока нет заказов.\n"
                 "Оформите первый заказ в нашем каталоге!",
@@ -36,11 +92,11 @@ async def show_my_orders(callback: CallbackQuery):
             )
             return
         
-        # Get last order (first in list)
+        # Orders come newest first
         last_order = orders[0]
         
         # Format message with order information
-        message_text = format_order_details(last_order)
+        message_parts = build_order_details(last_order).parts()
         
         # Create keyboard
         keyboard = []
@@ -59,26 +115,40 @@ async def show_my_orders(callback: CallbackQuery):
             InlineKeyboardButton(text="🔄 Reorder", callback_data=f"reorder:{last_order['id']}")
         ])
         
+        # Pagination
+        if pages > 1:
+            nav_buttons = []
+            if page > 1:
+                nav_buttons.append(InlineKeyboardButton(text="◀️", callback_data=f"orders_page:{page - 1}"))
+            nav_buttons.append(InlineKeyboardButton(text=f"{page}/{pages}", callback_data=f"orders_page:{page}"))
+            if page < pages:
+                nav_buttons.append(InlineKeyboardButton(text="▶️", callback_data=f"orders_page:{page + 1}"))
+            keyboard.append(nav_buttons)
+        
         # Main menu
         keyboard.append([
             InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")
         ])
         
-        await callback.message.edit_text(
-            message_text,
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard)
+        await send_message_parts(
+            callback.message,
+            message_parts,
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard),
+            edit=True
         )
+        await callback.answer()
         
     except Exception as e:
         logger.error(f"Error showing orders for user {user_id}: {e}")
-        await callback.message.edit_text(
+        await edit_message_text(
+            callback.message,
             "❌ Произошла ошибка при загрузке заказов.\n"
             "Попробуйте позже.",
             reply_markup=back_to_menu_keyboard()
         )
 
-def format_order_details(order: dict) -> str:
-    """Format detailed order information"""
+def build_order_details(order: dict) -> MessageBuilder:
+    """Detailed order information builder, one block per product"""
     
     # Order statuses with emoji
     status_emoji = {
@@ -99,19 +169,19 @@ def format_order_details(order: dict) -> str:
         'cancelled': 'Отменен'
     }
     
-    # Start formatting message
-    message = f"📦 <b>Заказ #{order.get('id', 'N/A')}</b>\n\n"
+    builder = MessageBuilder()
+    builder.add(f"📦 <b>Заказ #{order.get('id', 'N/A')}</b>\n\n")
     
     # Order status
     status = order.get('status', 'unknown')
     emoji = status_emoji.get(status, '❓')
     status_name = status_text.get(status, status)
-    message += f"{emoji} <b>Статус:</b> {status_name}\n\n"
+    builder.add(f"{emoji} <b>Статус:</b> {status_name}\n\n")
     
     # Products in order
     products = order.get('products', [])
     if products:
-        message += "🛍️ <b>Товары:</b>\n"
+        builder.add("🛍️ <b>Товары:</b>\n")
         total_items = 0
         for product in products:
             name = product.get('name', 'Неизвестный товар')
@@ -119,25 +189,27 @@ def format_order_details(order: dict) -> str:
             price = product.get('price', 0)
             item_total = float(quantity) * float(price)
             
-            message += f"• {name}\n"
-            message += f"  ${price} × {quantity} = ${item_total:.2f}\n"
+            builder.block().add(
+                f"• {name}\n",
+                f"  ${price} × {quantity} = ${item_total:.2f}\n"
+            )
             total_items += quantity
         
-        message += f"\n📊 <b>Всего товаров:</b> {total_items} шт.\n"
+        builder.block().add(f"\n📊 <b>Всего товаров:</b> {total_items} шт.\n")
     
     # Total amount
     total_amount = order.get('total_amount', 0)
-    message += f"💰 <b>Сумма заказа:</b> ${total_amount}\n\n"
+    builder.add(f"💰 <b>Сумма заказа:</b> ${total_amount}\n\n")
     
     # Shipping address  
     shipping = order.get('shipping_address', {})
     if shipping:
-        message += "📍 <b>Адрес доставки:</b>\n"
+        builder.block().add("📍 <b>Адрес доставки:</b>\n")
         
         # Recipient name (Laravel returns 'name' instead of first_name/last_name)
         name = shipping.get('name', '')
         if name:
-            message += f"👤 {name}\n"
+            builder.add(f"👤 {name}\n")
         
         # Address
         street = shipping.get('street', '')
@@ -146,7 +218,7 @@ def format_order_details(order: dict) -> str:
             address_line = street
             if house:
                 address_line += f", {house}"
-            message += f"🏠 {address_line}\n"
+            builder.add(f"🏠 {address_line}\n")
         
         # City, state, ZIP (Laravel uses 'postal_code' instead of 'zip_code')
         city = shipping.get('city', '')
@@ -154,25 +226,29 @@ def format_order_details(order: dict) -> str:
         postal_code = shipping.get('postal_code', '')
         if city or state or postal_code:
             location = f"{city}, {state} {postal_code}".strip(', ')
-            message += f"🌍 {location}\n"
+            builder.add(f"🌍 {location}\n")
         
         # Phone
         phone = shipping.get('phone', '')
         if phone:
-            message += f"📞 {phone}\n"
+            builder.add(f"📞 {phone}\n")
     
     # Order date (Laravel returns in format 'dates.created_at')
     dates = order.get('dates', {})
     created_at = dates.get('created_at', '') if dates else order.get('created_at', '')
     if created_at:
-        message += f"\n📅 <b>Дата заказа:</b> {created_at}"
+        builder.add(f"\n📅 <b>Дата заказа:</b> {created_at}")
     
     # Tracking number
     tracking = order.get('tracking_number', '')
     if tracking:
-        message += f"\n📮 <b>Трекинг номер:</b> <code>{tracking}</code>"
+        builder.add(f"\n📮 <b>Трекинг номер:</b> <code>{tracking}</code>")
     
-    return message
+    return builder
+
+def format_order_details(order: dict) -> str:
+    """Format detailed order information"""
+    return build_order_details(order).build()
 
 @router.callback_query(F.data.startswith("reorder:"))
 async def handle_reorder(callback: CallbackQuery, state: FSMContext):
@@ -182,18 +258,11 @@ async def handle_reorder(callback: CallbackQuery, state: FSMContext):
         order_id = int(callback.data.split(":")[1])
         user_id = callback.from_user.id
         
-        # Get user orders для получения данных заказа
+        # Fetch only the order being repeated, the history is the fallback
         async with api_client as client:
-            orders_response = await client.get_user_orders(user_id)
-        
-        orders = orders_response.get('orders', [])
-        target_order = None
-        
-        # Find target order
-        for order in orders:
-            if order.get('id') == order_id:
-                target_order = order
-                break
+            target_order = await client.get_user_order(user_id, order_id)
+            if not target_order:
+                target_order = await find_order_in_history(client, user_id, order_id)
         
         if not target_order:
             await callback.answer("Order not found", show_alert=True)
@@ -243,8 +312,7 @@ async def handle_reorder(callback: CallbackQuery, state: FSMContext):
         await state.set_state(OrderStates.selecting_payment)
         
         # Show order confirmation with cart
-        cart_items = cart_service.get_cart(user_id)
-        cart_total = cart_service.get_cart_total(user_id)
+        quote = pricing_service.quote(user_id)
         
         confirmation_text = (
             "🔄 <b>Перезаказ</b>\n\n"
@@ -252,11 +320,11 @@ async def handle_reorder(callback: CallbackQuery, state: FSMContext):
         )
         
         # Add cart information
-        for item in cart_items:
-            confirmation_text += f"• {item['name']}\n"
-            confirmation_text += f"  ${item['price']} × {item['quantity']} = ${item['total']}\n"
+        for line in quote.lines:
+            confirmation_text += f"• {line.name}\n"
+            confirmation_text += f"  {format_cents(line.unit_cents)} × {line.quantity} = {format_cents(line.total_cents)}\n"
         
-        confirmation_text += f"\n💰 <b>Итого: ${cart_total}</b>\n\n"
+        confirmation_text += f"\n💰 <b>Итого: {format_cents(quote.subtotal_cents)}</b>\n\n"
         
         # Add shipping address
         confirmation_text += "📍 <b>Адрес доставки:</b>\n"
@@ -270,7 +338,8 @@ async def handle_reorder(callback: CallbackQuery, state: FSMContext):
         
         confirmation_text += "\nВыберите способ оплаты:"
         
-        await callback.message.edit_text(
+        await edit_message_text(
+            callback.message,
             confirmation_text,
             reply_markup=checkout_keyboard()
         )
@@ -0,0 +1,75 @@
+import html
+import logging
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent, Message
+
+from config import settings
+from keyboards.inline import search_results_keyboard, back_to_menu_keyboard
+from services.catalog_cache import catalog_cache
+from services.helpers import truncate_text
+from services.product_search import product_search
+from utils.formatters import format_product_message
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+# Telegram accepts at most 50 results per inline answer
+INLINE_RESULTS_MAX = 50
+
+@router.message(Command("search"))
+async def search_command(message: Message, command: CommandObject):
+    """Text search: /search blue razz"""
+    query = (command.args or '').strip()
+
+    if not query:
+        await message.answer(
+            "🔎 Type what you are looking for after the command, e.g. <code>/search blue razz</code>",
+            reply_markup=back_to_menu_keyboard()
+        )
+        return
+
+    products = await product_search.search_catalog(query, settings.search_results_limit)
+
+    if not products:
+        await message.answer(
+            f"😔 Nothing found for <b>{html.escape(query)}</b>",
+            reply_markup=back_to_menu_keyboard()
+        )
+        return
+
+    await message.answer(
+        f"🔎 <b>Found for {html.escape(query)}:</b>",
+        reply_markup=search_results_keyboard(products)
+    )
+
+@router.inline_query()
+async def inline_search(inline_query: InlineQuery):
+    """Inline mode: @bot blue razz"""
+    query = inline_query.query.strip()
+    products = []
+    if query:
+        limit = min(settings.search_results_limit, INLINE_RESULTS_MAX)
+        products = await product_search.search_catalog(query, limit)
+
+    # Catalog lists carry only category_id, names come from the cached categories
+    category_names = {}
+    if products:
+        category_names = {category['id']: category['name'] for category in await catalog_cache.get_categories()}
+
+    results = []
+    for product in products:
+        if not product.get('category') and product.get('category_id') in category_names:
+            product = {**product, 'category': {'name': category_names[product['category_id']]}}
+        category = product.get('category') or {}
+        results.append(InlineQueryResultArticle(
+            id=str(product['id']),
+            title=product['name'],
+            description=f"${product['price']}" + (f" · {category['name']}" if category.get('name') else ''),
+            input_message_content=InputTextMessageContent(
+                message_text=truncate_text(format_product_message(product))
+            )
+        ))
+
+    # Results are the same for every user, so Telegram may share its cache
+    await inline_query.answer(results, cache_time=settings.inline_cache_time, is_personal=False)
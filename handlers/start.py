@@ -5,6 +5,7 @@ from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 from keyboards.inline import get_main_menu
 from services.api_client import api_client
+from services.message_editor import edit_message_text
 from datetime import datetime
 
 router = Router()
@@ -31,7 +32,8 @@ async def back_to_main_handler(callback: CallbackQuery, state: FSMContext = None
     if state:
         await state.clear()
     
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         f"👋 Welcome, {callback.from_user.first_name}!\n\n"
         "🛍️ Our store offers a wide range of products.\n"
         "Choose an action from the menu below:",
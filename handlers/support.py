@@ -7,6 +7,7 @@ from config import settings
 from keyboards.inline import help_keyboard, cancel_support_keyboard, back_to_menu_keyboard
 from states.order_states import SupportStates
 from services.admin_notifications import send_support_message
+from services.message_editor import edit_message_text
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -23,7 +24,8 @@ async def show_help_menu(callback: CallbackQuery, state: FSMContext):
         "Мы постараемся ответить как можно быстрее!"
     )
     
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         help_text,
         reply_markup=help_keyboard()
     )
@@ -34,7 +36,8 @@ async def start_contact_admin(callback: CallbackQuery, state: FSMContext):
     """Начать процесс обращения к администратору"""
     await state.set_state(SupportStates.entering_subject)
     
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         "📝 <b>Обращение к администратору</b>\n\n"
         "📋 Сначала укажите тему вашего обращения:\n\n"
         "Например:\n"
@@ -141,7 +144,8 @@ async def cancel_support(callback: CallbackQuery, state: FSMContext):
     """Отмена обращения в поддержку"""
     await state.clear()
     
-    await callback.message.edit_text(
+    await edit_message_text(
+        callback.message,
         "❌ <b>Обращение отменено</b>\n\n"
         "Если передумаете, вы всегда можете обратиться к нам через раздел помощи.",
         reply_markup=back_to_menu_keyboard()
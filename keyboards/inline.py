@@ -1,6 +1,33 @@
+import logging
+from functools import lru_cache
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from typing import List, Dict
+from config import settings
 
+logger = logging.getLogger(__name__)
+
+# Telegram limit for callback_data, in bytes
+CALLBACK_DATA_MAX_BYTES = 64
+
+def checked_markup(keyboard: List[List[InlineKeyboardButton]]) -> InlineKeyboardMarkup:
+    """Markup without buttons Telegram would reject for too long callback_data.
+    Catalog keyboards are built once per catalog version, so this runs rarely."""
+    rows = []
+    for row in keyboard:
+        valid = []
+        for button in row:
+            if button.callback_data and len(button.callback_data.encode('utf-8')) > CALLBACK_DATA_MAX_BYTES:
+                logger.warning("Button %r dropped: callback data %r is longer than %d bytes",
+                               button.text, button.callback_data, CALLBACK_DATA_MAX_BYTES)
+                continue
+            valid.append(button)
+        if valid:
+            rows.append(valid)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+# Keyboards without arguments are immutable markups: built once and reused
+
+@lru_cache(maxsize=None)
 def main_menu_keyboard() -> InlineKeyboardMarkup:
     """Main menu keyboard"""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -10,6 +37,7 @@ def main_menu_keyboard() -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text="ℹ️ Help", callback_data="help")]
     ])
 
+@lru_cache(maxsize=None)
 def back_to_menu_keyboard() -> InlineKeyboardMarkup:
     """Back to main menu button"""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -30,26 +58,19 @@ def categories_keyboard(categories: list) -> InlineKeyboardMarkup:
     
     keyboard.append([InlineKeyboardButton(text="◀️ Main Menu", callback_data="main_menu")])
     
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+    return checked_markup(keyboard)
 
 def products_keyboard(products: list, category_id: int = None, page: int = 1) -> InlineKeyboardMarkup:
-    """Keyboard with products"""
-    import logging
-    logger = logging.getLogger(__name__)
-    
+    """Keyboard with one page of products"""
     keyboard = []
+    page_size = settings.products_page_size
+    start = (page - 1) * page_size
     
-    for product in products:
-        callback_data = f"product:{product['id']}"
-        # Проверяем длину callback_data (максимум 64 байта)
-        if len(callback_data.encode('utf-8')) > 64:
-            logger.warning(f"Callback data too long for product {product['id']}: {len(callback_data.encode('utf-8'))} bytes")
-        
-        logger.debug(f"Creating button for product {product['id']}: {callback_data}")
+    for product in products[start:start + page_size]:
         keyboard.append([
             InlineKeyboardButton(
                 text=f"{product['name']} - ${product['price']}",
-                callback_data=callback_data
+                callback_data=f"product:{product['id']}"
             )
         ])
     
@@ -58,7 +79,8 @@ def products_keyboard(products: list, category_id: int = None, page: int = 1) ->
     if page > 1:
         nav_buttons.append(InlineKeyboardButton(text="◀️", callback_data=f"products_page:{page-1}:{category_id}"))
     
-    nav_buttons.append(InlineKeyboardButton(text="▶️", callback_data=f"products_page:{page+1}:{category_id}"))
+    if start + page_size < len(products):
+        nav_buttons.append(InlineKeyboardButton(text="▶️", callback_data=f"products_page:{page+1}:{category_id}"))
     
     if nav_buttons:
         keyboard.append(nav_buttons)
@@ -69,7 +91,7 @@ def products_keyboard(products: list, category_id: int = None, page: int = 1) ->
     
     keyboard.append([InlineKeyboardButton(text="◀️ Main Menu", callback_data="main_menu")])
     
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+    return checked_markup(keyboard)
 
 def product_detail_keyboard(product_id: int, category_id: int = None) -> InlineKeyboardMarkup:
     """Keyboard for product detail page"""
@@ -84,6 +106,16 @@ def product_detail_keyboard(product_id: int, category_id: int = None) -> InlineK
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+def search_results_keyboard(products: list) -> InlineKeyboardMarkup:
+    """Keyboard with found products"""
+    keyboard = [
+        [InlineKeyboardButton(text=f"{product['name']} - ${product['price']}", callback_data=f"product:{product['id']}")]
+        for product in products
+    ]
+    keyboard.append([InlineKeyboardButton(text="◀️ Main Menu", callback_data="main_menu")])
+    
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
 def cart_keyboard(cart_items: List[Dict], user_id: int) -> InlineKeyboardMarkup:
     """Cart keyboard"""
     keyboard = []
@@ -114,11 +146,13 @@ def cart_keyboard(cart_items: List[Dict], user_id: int) -> InlineKeyboardMarkup:
 
 def cart_item_keyboard(product_id: int, current_quantity: int) -> InlineKeyboardMarkup:
     """Keyboard for editing cart item"""
+    # Relative steps: re-renders are debounced, so taps on a not yet
+    # redrawn keyboard must still add up
     keyboard = [
         [
-            InlineKeyboardButton(text="➖", callback_data=f"cart_quantity:{product_id}:{current_quantity-1}"),
+            InlineKeyboardButton(text="➖", callback_data=f"cart_quantity:{product_id}:-1"),
             InlineKeyboardButton(text=f"{current_quantity}", callback_data="current_quantity"),
-            InlineKeyboardButton(text="➕", callback_data=f"cart_quantity:{product_id}:{current_quantity+1}")
+            InlineKeyboardButton(text="➕", callback_data=f"cart_quantity:{product_id}:+1")
         ],
         [InlineKeyboardButton(text="🗑️ Remove from Cart", callback_data=f"remove_from_cart:{product_id}")],
         [InlineKeyboardButton(text="◀️ Back to Cart", callback_data="cart")]
@@ -126,6 +160,7 @@ def cart_item_keyboard(product_id: int, current_quantity: int) -> InlineKeyboard
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=None)
 def checkout_keyboard() -> InlineKeyboardMarkup:
     """Checkout keyboard"""
     keyboard = [
@@ -135,6 +170,7 @@ def checkout_keyboard() -> InlineKeyboardMarkup:
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=None)
 def order_confirmation_keyboard() -> InlineKeyboardMarkup:
     """Order confirmation keyboard"""
     keyboard = [
@@ -146,6 +182,7 @@ def order_confirmation_keyboard() -> InlineKeyboardMarkup:
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=None)
 def help_keyboard() -> InlineKeyboardMarkup:
     """Keyboard for help section"""
     keyboard = [
@@ -154,6 +191,7 @@ def help_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=None)
 def cancel_support_keyboard() -> InlineKeyboardMarkup:
     """Keyboard for canceling support request"""
     keyboard = [
@@ -162,6 +200,7 @@ def cancel_support_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=None)
 def skip_field_keyboard() -> InlineKeyboardMarkup:
     """Skip button for optional fields"""
     keyboard = [
@@ -0,0 +1,28 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from services.worker_pool import WorkerPool
+
+
+class WorkerRoutingMiddleware(BaseMiddleware):
+    """Intake side of multi-process mode: hands every update to its user's worker.
+
+    Registered as outer middleware on dp.update of the intake dispatcher,
+    which has no routers; the handler chain is never called here.
+    """
+
+    def __init__(self, pool: WorkerPool):
+        self.pool = pool
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get('event_from_user')
+        if isinstance(event, Update):
+            await self.pool.dispatch(user.id if user else 0, event.model_dump_json(exclude_unset=True))
+        return None
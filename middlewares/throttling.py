@@ -0,0 +1,145 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, TelegramObject
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Handler classes and the callback_data prefixes that belong to them.
+# Anything that does not match is treated as browsing.
+CALLBACK_CLASSES = (
+    ('cart', ('add_to_cart:', 'cart', 'edit_cart_item:', 'cart_quantity:', 'remove_from_cart:', 'clear_cart')),
+    ('checkout', ('checkout', 'payment:', 'confirm_order', 'enter_promocode', 'back_to_confirmation', 'skip_field', 'reorder:')),
+    ('support', ('help', 'contact_admin', 'cancel_support')),
+)
+
+# (capacity, refill tokens per second) for every handler class
+CLASS_LIMITS: Dict[str, Tuple[float, float]] = {
+    'browsing': (8, 2.0),
+    'cart': (10, 3.0),
+    'checkout': (6, 1.0),
+    'support': (4, 0.5),
+}
+
+
+class TokenBucket:
+    """Classic token bucket refilled lazily on every take()"""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated_at')
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def ready(self, now: Optional[float] = None) -> bool:
+        """Refill and tell whether a token is available, without taking it"""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        return self.tokens >= 1
+
+    def take(self, now: Optional[float] = None) -> bool:
+        """Take one token, return False if the bucket is empty"""
+        if not self.ready(now):
+            return False
+        self.tokens -= 1
+        return True
+
+
+def classify_callback(data: Optional[str]) -> str:
+    """Map callback data to a throttling class"""
+    if data:
+        for name, prefixes in CALLBACK_CLASSES:
+            if data.startswith(prefixes):
+                return name
+    return 'browsing'
+
+
+def classify_message(raw_state: Optional[str]) -> str:
+    """Map FSM state of a text message to a throttling class"""
+    if raw_state:
+        if raw_state.startswith('SupportStates'):
+            return 'support'
+        if raw_state.startswith('OrderStates'):
+            return 'checkout'
+    return 'browsing'
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Anti-flood middleware with a per-user bucket and per-user/per-class buckets.
+
+    Buckets live in a bounded LRU map, so memory does not grow with the
+    number of users ever seen. An evicted user simply starts with a full bucket.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.throttle_max_entries
+        self._buckets: 'OrderedDict[Tuple[int, str], TokenBucket]' = OrderedDict()
+        self.rejected = 0
+
+    def _bucket(self, user_id: int, name: str) -> TokenBucket:
+        key = (user_id, name)
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            if name == 'user':
+                capacity, rate = settings.throttle_user_capacity, settings.throttle_user_rate
+            else:
+                capacity, rate = CLASS_LIMITS[name]
+            bucket = TokenBucket(capacity, rate)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        return bucket
+
+    def allow(self, user_id: int, handler_class: str) -> bool:
+        """Check both the global user bucket and the handler class bucket"""
+        now = time.monotonic()
+        class_bucket = self._bucket(user_id, handler_class)
+        user_bucket = self._bucket(user_id, 'user')
+        # Both are checked before either is charged: a rejected update costs no tokens,
+        # so hammering one section drains neither the others nor the user bucket
+        if not (class_bucket.ready(now) and user_bucket.ready(now)):
+            return False
+        class_bucket.tokens -= 1
+        user_bucket.tokens -= 1
+        return True
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = getattr(event, 'from_user', None)
+        if user is None or not settings.throttle_enabled:
+            return await handler(event, data)
+
+        if isinstance(event, CallbackQuery):
+            handler_class = classify_callback(event.data)
+        else:
+            handler_class = classify_message(data.get('raw_state'))
+
+        if self.allow(user.id, handler_class):
+            return await handler(event, data)
+
+        self.rejected += 1
+        logger.debug("Throttled %s update from user %s", handler_class, user.id)
+
+        if isinstance(event, CallbackQuery):
+            try:
+                await event.answer("⏳ Too many requests, please slow down")
+            except Exception as e:
+                logger.debug("Failed to answer throttled callback: %s", e)
+        # Messages are dropped silently: answering them would cost the same API call we try to save
+        return None
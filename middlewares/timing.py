@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from config import settings
+from services.metrics import begin_laravel_calls, describe_calls, handler_timings
+from services.tracing import set_trace_attr
+
+logger = logging.getLogger(__name__)
+
+
+def handler_name(data: Dict[str, Any]) -> str:
+    """module.function of the handler aiogram picked for the update"""
+    handler = data.get('handler')
+    callback = getattr(handler, 'callback', None)
+    if callback is None:
+        return 'unknown'
+    module = getattr(callback, '__module__', '') or ''
+    return f"{module.rsplit('.', 1)[-1]}.{getattr(callback, '__qualname__', repr(callback))}"
+
+
+class HandlerTimingMiddleware(BaseMiddleware):
+    """Times every handler and reports the slow ones.
+
+    Registered as an inner middleware, so it runs after filters and knows
+    which handler was chosen. A handler still running after the threshold
+    is logged immediately with the Laravel calls it is waiting on, so
+    stuck requests show up before they finish (or never do).
+    """
+
+    def __init__(self, slow_ms: Optional[float] = None):
+        self.slow_ms = settings.slow_handler_ms if slow_ms is None else slow_ms
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        name = handler_name(data)
+        set_trace_attr('handler', name)
+        calls = begin_laravel_calls()
+        user = getattr(event, 'from_user', None)
+
+        def report_stuck():
+            logger.warning(
+                f"Handler {name} still running after {self.slow_ms:.0f} ms "
+                f"(user {user.id if user else '-'}), Laravel calls: {describe_calls(calls) or 'none'}"
+            )
+
+        watchdog = asyncio.get_running_loop().call_later(self.slow_ms / 1000, report_stuck)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            watchdog.cancel()
+            elapsed = (time.perf_counter() - started) * 1000
+            slow = elapsed > self.slow_ms
+            handler_timings.observe(name, elapsed, slow)
+            if slow:
+                logger.warning(
+                    f"Slow handler {name}: {elapsed:.0f} ms, Laravel calls: {describe_calls(calls) or 'none'}"
+                )
@@ -0,0 +1,45 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject, Update
+
+from services.tracing import span, tracer
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Opens a trace for every update; registered as outer middleware on dp.update"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get('event_from_user')
+        attrs = {'user_id': user.id if user else None}
+        if isinstance(event, Update):
+            attrs['update_id'] = event.update_id
+            name = event.event_type
+        else:
+            name = type(event).__name__
+        trace = tracer.start(name, **attrs)
+        try:
+            return await handler(event, data)
+        finally:
+            tracer.finish(trace)
+
+
+class TelegramTracingMiddleware(BaseRequestMiddleware):
+    """Records every Bot API call made during an update as a span"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        with span('telegram', method.__api_method__):
+            return await make_request(bot, method)
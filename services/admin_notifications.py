@@ -3,6 +3,7 @@ from typing import Dict, List
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import settings
+from utils.message_builder import MessageBuilder
 
 logger = logging.getLogger(__name__)
 
@@ -41,8 +42,8 @@ async def notify_admins_new_order(order_data: Dict, user_data: Dict, bot: Bot =
         should_close_session = False
     
     try:
-        # Форматируем сообщение уведомления
-        notification_text = format_admin_notification(order_data, user_data)
+        # Форматируем сообщение уведомления (длинные заказы уходят несколькими сообщениями)
+        notification_parts = build_admin_notification(order_data, user_data).parts()
         
         # Создаем клавиатуру с быстрыми действиями
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -64,12 +65,14 @@ async def notify_admins_new_order(order_data: Dict, user_data: Dict, bot: Bot =
         for admin_id in admin_ids:
             try:
                 logger.info(f"Attempting to send notification to admin {admin_id}")
-                result = await bot.send_message(
-                    chat_id=admin_id,
-                    text=notification_text,
-                    parse_mode="HTML",
-                    reply_markup=keyboard
-                )
+                for index, part in enumerate(notification_parts):
+                    is_last = index == len(notification_parts) - 1
+                    result = await bot.send_message(
+                        chat_id=admin_id,
+                        text=part,
+                        parse_mode="HTML",
+                        reply_markup=keyboard if is_last else None
+                    )
                 logger.info(f"Admin notification sent successfully to {admin_id}, message ID: {result.message_id}")
             except Exception as e:
                 logger.error(f"Failed to send notification to admin {admin_id}: {e}")
@@ -82,8 +85,8 @@ async def notify_admins_new_order(order_data: Dict, user_data: Dict, bot: Bot =
         if should_close_session and bot.session:
             await bot.session.close()
 
-def format_admin_notification(order_data: Dict, user_data: Dict) -> str:
-    """Format notification for admin"""
+def build_admin_notification(order_data: Dict, user_data: Dict) -> MessageBuilder:
+    """Admin notification builder, one block per section and per product"""
     
     # Emoji for payment statuses
     payment_emoji = {
@@ -92,46 +95,47 @@ def format_admin_notification(order_data: Dict, user_data: Dict) -> str:
         'nowpayments': '💎'
     }
     
-    message = "🔔 <b>НОВЫЙ ЗАКАЗ!</b>\n\n"
+    builder = MessageBuilder()
+    builder.add("🔔 <b>НОВЫЙ ЗАКАЗ!</b>\n\n")
     
     # Основная информация о заказе
-    message += f"📦 <b>Заказ #{order_data.get('order_id', 'N/A')}</b>\n"
-    message += f"💰 <b>Сумма:</b> ${order_data.get('total_amount', 0)}\n"
+    builder.add(f"📦 <b>Заказ #{order_data.get('order_id', 'N/A')}</b>\n")
+    builder.add(f"💰 <b>Сумма:</b> ${order_data.get('total_amount', 0)}\n")
     
     payment_method = order_data.get('payment_method', 'unknown')
     emoji = payment_emoji.get(payment_method, '💳')
-    message += f"{emoji} <b>Оплата:</b> {payment_method.upper()}\n\n"
+    builder.add(f"{emoji} <b>Оплата:</b> {payment_method.upper()}\n\n")
     
     # Информация о пользователе
-    message += "👤 <b>Клиент:</b>\n"
-    message += f"🆔 Telegram ID: <code>{user_data.get('telegram_id', 'N/A')}</code>\n"
+    builder.block().add("👤 <b>Клиент:</b>\n")
+    builder.add(f"🆔 Telegram ID: <code>{user_data.get('telegram_id', 'N/A')}</code>\n")
     
     if user_data.get('first_name'):
-        message += f"👤 Имя: {user_data['first_name']}"
+        builder.add(f"👤 Имя: {user_data['first_name']}")
         if user_data.get('last_name'):
-            message += f" {user_data['last_name']}"
-        message += "\n"
+            builder.add(f" {user_data['last_name']}")
+        builder.add("\n")
     
     if user_data.get('username'):
-        message += f"📱 Username: @{user_data['username']}\n"
+        builder.add(f"📱 Username: @{user_data['username']}\n")
     
     # Товары в заказе
     products = order_data.get('products', [])
     if products:
-        message += "\n🛍️ <b>Товары:</b>\n"
+        builder.add("\n🛍️ <b>Товары:</b>\n")
         for product in products:
             name = product.get('name', 'Неизвестный товар')
             quantity = product.get('quantity', 1)
-            message += f"• {name} × {quantity}\n"
+            builder.block().add(f"• {name} × {quantity}\n")
     
     # Адрес доставки
     shipping = order_data.get('shipping_address', {})
     if shipping:
-        message += "\n📍 <b>Адрес доставки:</b>\n"
+        builder.block().add("\n📍 <b>Адрес доставки:</b>\n")
         
         # Имя получателя
         if shipping.get('first_name') or shipping.get('last_name'):
-            message += f"👤 {shipping.get('first_name', '')} {shipping.get('last_name', '')}\n"
+            builder.add(f"👤 {shipping.get('first_name', '')} {shipping.get('last_name', '')}\n")
         
         # Адрес
         street = shipping.get('street', '')
@@ -140,7 +144,7 @@ def format_admin_notification(order_data: Dict, user_data: Dict) -> str:
             address_line = street
             if apartment:
                 address_line += f", {apartment}"
-            message += f"🏠 {address_line}\n"
+            builder.add(f"🏠 {address_line}\n")
         
         # Город, штат, ZIP
         city = shipping.get('city', '')
@@ -148,29 +152,35 @@ def format_admin_notification(order_data: Dict, user_data: Dict) -> str:
         zip_code = shipping.get('zip_code', '')
         if city or state or zip_code:
             location = f"{city}, {state} {zip_code}".strip(', ')
-            message += f"🌍 {location}\n"
+            builder.add(f"🌍 {location}\n")
         
         # Телефон
         phone = shipping.get('phone', '')
         if phone:
-            message += f"📞 {phone}\n"
+            builder.add(f"📞 {phone}\n")
+    
+    builder.block()
     
     # Промокод
     promocode = order_data.get('promocode')
     if promocode:
-        message += f"\n🎫 <b>Промокод:</b> {promocode}\n"
+        builder.add(f"\n🎫 <b>Промокод:</b> {promocode}\n")
     
     # Статус Zelle
     if payment_method == 'zelle':
         zelle_assigned = order_data.get('zelle_assigned', False)
         if zelle_assigned:
-            message += "\n✅ <b>Zelle назначен</b>"
+            builder.add("\n✅ <b>Zelle назначен</b>")
         else:
-            message += "\n⚠️ <b>Требуется назначить Zelle!</b>"
+            builder.add("\n⚠️ <b>Требуется назначить Zelle!</b>")
     
-    message += "\n\n⏰ <b>Требует внимания!</b>"
+    builder.add("\n\n⏰ <b>Требует внимания!</b>")
     
-    return message
+    return builder
+
+def format_admin_notification(order_data: Dict, user_data: Dict) -> str:
+    """Format notification for admin"""
+    return build_admin_notification(order_data, user_data).build()
 
 async def send_support_message(support_data: Dict, user_data: Dict, bot: Bot = None):
     """Отправка сообщения поддержки администратору"""
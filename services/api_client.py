@@ -1,54 +1,195 @@
 import aiohttp
+import asyncio
 import logging
-from typing import List, Dict, Optional
+import time
+import zlib
+from typing import List, Dict, NamedTuple, Optional
 from config import settings
+from services.user_cache import user_cache
+from services.promo_cache import promo_cache
+from services.metrics import laravel_transfer, track_laravel_call
+from services.circuit_breaker import CircuitBreaker
+from services.tracing import current_trace_id, span
+from utils.json_codec import dumps, loads
 
 logger = logging.getLogger(__name__)
 
+class LaravelUnavailable(Exception):
+    """Laravel answered with a server error"""
+
+# Laravel answers 404 for a code it does not know
+PROMOCODE_NOT_FOUND = {'valid': False, 'message': 'Promo code not found'}
+
+class ListResponse(NamedTuple):
+    """Result of a conditional list request"""
+    status: int  # 200, or 304 when the list did not change
+    payload: Dict
+    etag: Optional[str]
+    last_modified: Optional[str]
+
 class LaravelAPIClient:
     def __init__(self):
         self.base_url = settings.laravel_api_url
         self.session = None
+        # Fail fast while Laravel is down instead of waiting for timeouts
+        self.breaker = CircuitBreaker('laravel', settings.laravel_breaker_failures, settings.laravel_breaker_cooldown)
+    
+    async def start(self) -> aiohttp.ClientSession:
+        """Open the shared keep-alive session (connection pool) if needed"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.laravel_pool_size,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            # Bodies are decompressed by _read_body, which also counts the bytes
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.laravel_timeout),
+                headers={'Accept-Encoding': 'gzip, deflate' if settings.laravel_compression else 'identity'},
+                auto_decompress=False,
+                json_serialize=dumps
+            )
+        return self.session
+    
+    async def close(self):
+        """Close the shared session on shutdown"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # One session is shared by all handlers, so TLS connections are reused
+        await self.start()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        # Session stays open for the next request, close() is called on shutdown
+        pass
+    
+    async def ping(self) -> float:
+        """Round-trip time (ms) of a lightweight Laravel request, raises when unreachable"""
+        await self.start()
+        url = f"{self.base_url}/api/bot/categories"
+        started = time.perf_counter()
+        async with self.session.get(url) as response:
+            await response.read()
+            if response.status >= 500:
+                raise aiohttp.ClientResponseError(
+                    response.request_info, response.history, status=response.status
+                )
+        return (time.perf_counter() - started) * 1000
     
-    async def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict:
-        """Базовый метод для HTTP запросов"""
+    async def _make_request(self, method: str, endpoint: str, conditional: bool = False,
+                            route: Optional[str] = None, **kwargs) -> Dict:
+        """Базовый метод для HTTP запросов; route is the endpoint template counted in traffic stats"""
         url = f"{self.base_url}/api/bot{endpoint}"
+        send = self._send_conditional if conditional else self._send
         
-        logger.debug(f"Making {method} request to {url}")
+        logger.debug("Making %s request to %s", method, endpoint)
+        
+        if not self.breaker.allow():
+            logger.debug("Laravel circuit open, skipping %s %s", method, endpoint)
+            return None if conditional else {}
+        
+        # Laravel can log the same id to correlate its side of the request
+        trace_id = current_trace_id()
+        if trace_id:
+            kwargs['headers'] = {**kwargs.get('headers', {}), 'X-Trace-Id': trace_id}
         
         try:
-            async with self.session.request(method, url, **kwargs) as response:
-                logger.debug(f"Response status: {response.status}")
-                
-                if response.status in [200, 201]:
-                    result = await response.json()
-                    logger.debug(f"Response data: {result}")
-                    return result
-                elif response.status == 404:
-                    logger.warning(f"Resource not found: {url}")
-                    return {}
-                else:
-                    error_text = await response.text()
-                    logger.error(f"API request failed: {response.status} - {error_text}")
-                    return {}
-        except aiohttp.ClientError as e:
-            logger.error(f"HTTP client error: {e}")
-            return {}
+            with track_laravel_call(method, endpoint), span('laravel', f"{method} {endpoint}") as record:
+                result = await send(method, url, route or endpoint, **kwargs)
+                if record is not None:
+                    record['ok'] = bool(result)
+            self.breaker.record_success()
+            return result
+        except LaravelUnavailable:
+            # Already logged with the response body
+            self.breaker.record_failure()
+            return None if conditional else {}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Timeouts have an empty message, the class name tells what happened
+            logger.error("HTTP client error on %s %s: %s %s", method, endpoint, e.__class__.__name__, e)
+            self.breaker.record_failure()
+            return None if conditional else {}
         except Exception as e:
-            logger.error(f"Unexpected API request error: {e}")
-            return {}
+            logger.error("Unexpected API request error on %s %s: %s", method, endpoint, e)
+            return None if conditional else {}
     
-    async def get_products(self, category_id: Optional[int] = None, search: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
-        """Получение списка товаров"""
+    @staticmethod
+    async def _read_body(response: aiohttp.ClientResponse, method: str, route: str) -> bytes:
+        """Response body decoded from its Content-Encoding, sizes counted per endpoint"""
+        raw = await response.read()
+        body = raw
+        encoding = response.headers.get('Content-Encoding', '').lower()
+        if raw and encoding in ('gzip', 'deflate'):
+            try:
+                # 47 = zlib or gzip header, detected automatically
+                body = zlib.decompress(raw, 47)
+            except zlib.error:
+                # Some servers send deflate without the zlib header
+                body = zlib.decompress(raw, -zlib.MAX_WBITS)
+        laravel_transfer.observe(method, route, len(raw), len(body), body is not raw)
+        return body
+    
+    async def _send(self, method: str, url: str, route: str, not_found: Optional[Dict] = None, **kwargs) -> Dict:
+        """Send one request and decode the JSON body; not_found is returned for a 404"""
+        async with self.session.request(method, url, **kwargs) as response:
+            logger.debug("Response status %s for %s", response.status, url)
+            body = await self._read_body(response, method, route)
+            
+            if response.status in [200, 201]:
+                return loads(body) if body else {}
+            elif response.status == 404:
+                logger.warning("Resource not found: %s", url)
+                return {} if not_found is None else not_found
+            else:
+                # Only the start of the body: error pages can be large HTML documents
+                error_text = body.decode('utf-8', 'replace')
+                logger.error("API request failed: %s - %.500s", response.status, error_text)
+                if response.status >= 500:
+                    raise LaravelUnavailable(response.status)
+                return {}
+    
+    async def _send_conditional(self, method: str, url: str, route: str, **kwargs) -> Optional[ListResponse]:
+        """Send a request with validators; 304 means the cached copy is still current"""
+        async with self.session.request(method, url, **kwargs) as response:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            body = await self._read_body(response, method, route)
+            
+            if response.status == 304:
+                return ListResponse(304, {}, etag, last_modified)
+            if response.status == 200:
+                payload = loads(body)
+                if isinstance(payload, list):
+                    payload = {'data': payload}
+                return ListResponse(200, payload, etag, last_modified)
+            
+            error_text = body.decode('utf-8', 'replace')
+            logger.error("API request failed: %s - %.500s", response.status, error_text)
+            if response.status >= 500:
+                raise LaravelUnavailable(response.status)
+            return None
+    
+    async def get_list(self, endpoint: str, params: Optional[Dict] = None, etag: Optional[str] = None,
+                       last_modified: Optional[str] = None) -> Optional[ListResponse]:
+        """Conditional GET of a list endpoint; None when Laravel failed"""
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return await self._make_request('GET', endpoint, conditional=True, params=params or {}, headers=headers)
+    
+    @staticmethod
+    def products_params(category_id: Optional[int] = None, search: Optional[str] = None, limit: Optional[int] = None,
+                        fields: Optional[str] = None) -> Dict:
+        """Query parameters of /products; fields limits the product keys Laravel returns"""
         params = {}
+        if fields:
+            params['fields'] = fields
         if category_id:
             params['category_id'] = category_id
         if search:
@@ -60,13 +201,17 @@ class LaravelAPIClient:
             params['per_page'] = 1000  # Laravel обычно использует per_page
             params['limit'] = 1000     # На всякий случай
             params['all'] = 'true'     # Иногда используется параметр all
-            
+        return params
+    
+    async def get_products(self, category_id: Optional[int] = None, search: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Получение списка товаров"""
+        params = self.products_params(category_id, search, limit)
         response = await self._make_request('GET', '/products', params=params)
         return response.get('data', [])
     
     async def get_product(self, product_id: int) -> Optional[Dict]:
         """Получение одного товара по ID"""
-        response = await self._make_request('GET', f'/products/{product_id}')
+        response = await self._make_request('GET', f'/products/{product_id}', route='/products/{id}')
         return response.get('data') if response else None
     
     async def get_categories(self) -> List[Dict]:
@@ -82,42 +227,89 @@ class LaravelAPIClient:
     
     async def create_order(self, order_data: Dict) -> Dict:
         """Создание заказа"""
-        return await self._make_request('POST', '/orders', json=order_data)
+        result = await self._make_request('POST', '/orders', json=order_data)
+        if result and order_data.get('telegram_user_id'):
+            # Laravel may assign a Zelle email while creating the order
+            user_cache.invalidate_user(order_data['telegram_user_id'])
+        return result
     
     
     async def check_promocode(self, code: str) -> Dict:
         """Проверка промокода"""
-        return await self._make_request('GET', f'/promocodes/{code}')
+        cached = promo_cache.get(code)
+        if cached is not None:
+            return cached
+        
+        # A 404 is an answer and is cached as unknown; failures ({}) are not cached
+        result = await self._make_request('GET', f'/promocodes/{code}', route='/promocodes/{code}', not_found=dict(PROMOCODE_NOT_FOUND))
+        promo_cache.store(code, result)
+        return result
     
-    async def get_user_orders(self, telegram_user_id: int) -> Dict:
-        """Получение заказов пользователя"""
-        logger.info(f"Getting orders for user {telegram_user_id}")
-        response = await self._make_request('GET', f'/users/{telegram_user_id}/orders')
+    async def get_user_orders(self, telegram_user_id: int, page: int = 1, per_page: Optional[int] = None) -> Dict:
+        """Получение заказов пользователя (постранично, новые первыми)"""
+        cache_key = ('page', page, per_page)
+        cached = user_cache.get_orders(telegram_user_id, cache_key)
+        if cached is not None:
+            return cached
+        
+        logger.debug("Getting orders for user %s, page %s", telegram_user_id, page)
+        params = {'page': page}
+        if per_page:
+            params['per_page'] = per_page
+        
+        response = await self._make_request('GET', f'/users/{telegram_user_id}/orders', route='/users/{id}/orders', params=params)
         
         if not response:
-            logger.warning(f"No orders found for user {telegram_user_id}")
+            # Failed or empty responses are not cached
+            logger.warning("No orders found for user %s", telegram_user_id)
             return {'orders': []}
         
+        user_cache.set_orders(telegram_user_id, cache_key, response)
         return response
     
+    async def get_user_order(self, telegram_user_id: int, order_id: int) -> Optional[Dict]:
+        """Получение одного заказа пользователя по ID"""
+        cache_key = ('order', order_id)
+        cached = user_cache.get_orders(telegram_user_id, cache_key)
+        if cached is not None:
+            return cached
+        
+        response = await self._make_request('GET', f'/users/{telegram_user_id}/orders/{order_id}',
+                                            route='/users/{id}/orders/{order_id}')
+        
+        if not response:
+            return None
+        
+        # Laravel may wrap the order in "order" or "data"
+        order = response.get('order') or response.get('data') or response
+        user_cache.set_orders(telegram_user_id, cache_key, order)
+        return order
+    
     async def get_user_zelle(self, telegram_user_id: int) -> Dict:
         """Получение Zelle данных пользователя"""
-        logger.info(f"Getting Zelle info for user {telegram_user_id}")
-        response = await self._make_request('GET', f'/users/{telegram_user_id}/zelle')
+        cached = user_cache.zelle.get(telegram_user_id)
+        if cached is not None:
+            return cached
+        
+        logger.debug("Getting Zelle info for user %s", telegram_user_id)
+        response = await self._make_request('GET', f'/users/{telegram_user_id}/zelle', route='/users/{id}/zelle')
         
         if not response:
-            logger.warning(f"No Zelle data found for user {telegram_user_id}")
+            logger.warning("No Zelle data found for user %s", telegram_user_id)
             return {
                 'has_zelle': False,
                 'zelle_email': None
             }
         
         # Laravel возвращает данные без обертки "data"
+        # Not assigned yet is not cached: the email may be assigned any moment
+        if response.get('has_zelle') and response.get('zelle_email'):
+            user_cache.zelle.set(telegram_user_id, response)
         return response
     
     async def track_user_activity(self, telegram_user_id: int, activity_type: str, activity_data: dict) -> Dict:
         """Отслеживание активности пользователя для системы напоминаний"""
-        logger.info(f"Tracking activity {activity_type} for user {telegram_user_id}")
+        logger.debug("Tracking activity %s for user %s", activity_type, telegram_user_id)
         
         data = {
             'telegram_user_id': telegram_user_id,
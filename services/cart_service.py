@@ -1,5 +1,10 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Optional
+import asyncio
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class CartService:
     """Cart service"""
@@ -7,23 +12,75 @@ class CartService:
     def __init__(self):
         # В памяти для простоты, в продакшне лучше Redis
         self._carts: Dict[int, List[Dict]] = {}
+        # Счетчик изменений корзины, по нему кэшируются расчеты цен
+        self._versions: Dict[int, int] = {}
+        # Optional persistent store (multi-process mode), memory stays the read cache
+        self._store = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def attach_store(self, store) -> None:
+        """Write carts through to a shared store and load them from it on first access"""
+        self._store = store
+        self._carts.clear()
+        # SQLite calls stay off the event loop; one thread keeps writes in order
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='cart-store')
+    
+    def close_store(self) -> None:
+        """Wait for queued writes and detach the store"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._executor = None
+        self._store = None
+    
+    async def preload(self, user_id: int) -> None:
+        """Load a persisted cart before the user's update is handled"""
+        if self._store is None or user_id in self._carts:
+            return
+        cart = await asyncio.get_running_loop().run_in_executor(self._executor, self._store.load_cart, user_id)
+        self._carts.setdefault(user_id, cart or [])
+    
+    def _persist(self, user_id: int) -> None:
+        if self._store is not None:
+            # Copy: items keep changing on the loop while the write waits
+            items = [dict(item) for item in self._carts.get(user_id, [])]
+            self._executor.submit(self._store.save_cart, user_id, items).add_done_callback(self._log_failure)
+    
+    @staticmethod
+    def _log_failure(future: Future) -> None:
+        if future.exception() is not None:
+            logger.error("Cart not persisted: %s", future.exception())
+    
+    def _touch(self, user_id: int) -> None:
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+    
+    def get_cart_version(self, user_id: int) -> int:
+        """Get cart version, changes on every cart modification"""
+        return self._versions.get(user_id, 0)
     
     def get_cart(self, user_id: int) -> List[Dict]:
         """Get user cart"""
-        return self._carts.get(user_id, [])
+        cart = self._carts.get(user_id)
+        if cart is None and self._store is not None:
+            # Only when preload() was skipped; blocks the loop for one query
+            cart = self._store.load_cart(user_id)
+            if cart is not None:
+                self._carts[user_id] = cart
+        return cart if cart is not None else []
     
     def add_to_cart(self, user_id: int, product: Dict, quantity: int = 1) -> bool:
         """Add product to cart"""
         if user_id not in self._carts:
-            self._carts[user_id] = []
+            self._carts[user_id] = self.get_cart(user_id)
         
         cart = self._carts[user_id]
+        self._touch(user_id)
         
         # Проверяем, есть ли товар уже в корзине
         for item in cart:
             if item['id'] == product['id']:
                 item['quantity'] += quantity
                 item['total'] = item['price'] * item['quantity']
+                self._persist(user_id)
                 return True
         
         # Добавляем новый товар
@@ -36,6 +93,7 @@ class CartService:
         }
         
         cart.append(cart_item)
+        self._persist(user_id)
         return True
     
     def update_quantity(self, user_id: int, product_id: int, quantity: int) -> bool:
@@ -44,11 +102,13 @@ class CartService:
         
         for item in cart:
             if item['id'] == product_id:
+                self._touch(user_id)
                 if quantity <= 0:
                     cart.remove(item)
                 else:
                     item['quantity'] = quantity
                     item['total'] = item['price'] * quantity
+                self._persist(user_id)
                 return True
         
         return False
@@ -59,8 +119,10 @@ class CartService:
     
     def clear_cart(self, user_id: int) -> None:
         """Clear cart"""
-        if user_id in self._carts:
-            self._carts[user_id] = []
+        # Also when not loaded here: the store may hold a cart from another process
+        self._carts[user_id] = []
+        self._touch(user_id)
+        self._persist(user_id)
     
     def get_cart_total(self, user_id: int) -> float:
         """Get cart total"""
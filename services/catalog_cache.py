@@ -0,0 +1,414 @@
+import asyncio
+import gzip
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+from config import settings
+from services.api_client import api_client
+from services.cache import TTLCache
+from utils.json_codec import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+# Saves are coalesced: a warm-up stores a dozen lists within a second
+SNAPSHOT_SAVE_DELAY = 2
+
+
+@dataclass
+class ListSnapshot:
+    """Last list received from Laravel with the validators to revalidate it"""
+    items: List[Dict]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Opaque updated_since cursor returned by Laravel ('synced_at')
+    cursor: Optional[str] = None
+
+
+def apply_delta(items: List[Dict], changed: List[Dict], deleted: List) -> List[Dict]:
+    """List with changed products replaced or appended and deleted ids removed"""
+    removed = {int(product_id) for product_id in deleted}
+    removed.update(product['id'] for product in changed)
+    return [product for product in items if product['id'] not in removed] + changed
+
+
+
+class CatalogCache:
+    """Categories and product lists from Laravel, shared by all users.
+
+    Every list is fetched once per TTL no matter how many users open the
+    catalog at the same time (concurrent misses wait for the same request).
+    A product index by id is kept from every list seen, so product pages do
+    not download the catalog again.
+
+    Lists are requested with only settings.catalog_list_fields, which is all
+    a keyboard needs; product pages fetch the full product once per TTL.
+
+    An expired list is revalidated rather than downloaded again: Laravel
+    gets If-None-Match/If-Modified-Since and, for product lists, the
+    updated_since cursor. A 304 keeps the list (and rendered keyboards) as
+    is; a response with a "deleted" key is a delta merged into the list.
+
+    Lists are saved to an on-disk snapshot after every change. A restarted
+    bot serves the snapshot right away, and while Laravel fails the last
+    known lists keep being served (re-asked every catalog_stale_ttl).
+    """
+
+    def __init__(self):
+        # Keys: 'categories', ('products', None), ('products', category_id)
+        self._lists = TTLCache(settings.catalog_cache_ttl, 2000)
+        self._by_id: Dict[int, Dict] = {}
+        # Full products for product pages, keys: ('detail', product_id)
+        self._details = TTLCache(settings.catalog_cache_ttl, 1000)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Outlive the TTL: used to revalidate and to merge deltas
+        self._snapshots: Dict[Hashable, ListSnapshot] = {}
+        self.sync_counts = {'full': 0, 'delta': 0, 'not_modified': 0}
+        # 'laravel', or 'snapshot' until the first sync after a restart
+        self.source = 'laravel'
+        self.stale_since: Optional[float] = None
+        self.snapshot_saved_at: Optional[float] = None
+        self._save_task: Optional[asyncio.Task] = None
+        # Rendered markups valid for the current catalog version, bounded LRU;
+        # keys: 'categories' or ('products', category_id, page)
+        self.keyboards = TTLCache(float('inf'), settings.keyboard_cache_size)
+        self.version = 0
+        self.loaded_at: Optional[float] = None
+
+    async def _load(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], cache: Optional[TTLCache] = None) -> Any:
+        cached = (self._lists if cache is None else cache).get(key)
+        if cached is not None:
+            return cached
+
+        # Single flight: the first miss fetches, the others wait for its result
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            # fetch stores what it got
+            items = await fetch()
+            future.set_result(items)
+            return items
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _store(self, key: Hashable, items: List[Dict], deleted: Iterable = ()) -> None:
+        self._lists.set(key, items)
+        if key != 'categories':
+            for product_id in deleted:
+                self._by_id.pop(int(product_id), None)
+                self._details.pop(('detail', int(product_id)))
+            for product in items:
+                if self._by_id.get(product['id']) != product:
+                    self._details.pop(('detail', product['id']))
+                self._by_id[product['id']] = product
+        self.version += 1
+        self.keyboards.clear()
+        self.loaded_at = time.time()
+        self._schedule_save()
+
+    def _dropped_ids(self, key: Hashable, items: List[Dict]) -> Set[int]:
+        """Indexed products a full list no longer has.
+
+        The whole catalog is authoritative; a category list only drops the
+        products it had before and no other known list still has.
+        """
+        kept = {product['id'] for product in items}
+        if key == ('products', None):
+            return set(self._by_id) - kept
+        previous = self._snapshots.get(key)
+        if previous is None:
+            return set()
+        dropped = {product['id'] for product in previous.items} - kept
+        for other_key, snapshot in self._snapshots.items():
+            if dropped and other_key not in (key, 'categories'):
+                dropped.difference_update(product['id'] for product in snapshot.items)
+        return dropped
+
+    async def _sync(self, key: Hashable, endpoint: str, params: Dict) -> List[Dict]:
+        """Fetch or revalidate a list and store the result"""
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None and snapshot.cursor:
+            params = {**params, 'updated_since': snapshot.cursor}
+
+        async with api_client as client:
+            response = await client.get_list(
+                endpoint, params,
+                etag=snapshot.etag if snapshot else None,
+                last_modified=snapshot.last_modified if snapshot else None
+            )
+        if response is None:
+            if snapshot is None:
+                # Nothing to fall back on: remember the miss too, or every view would ask again
+                self._lists.set(key, [], settings.catalog_stale_ttl)
+                return []
+            # Laravel is failing: keep serving the last known list, ask again later
+            if self.stale_since is None:
+                self.stale_since = time.time()
+                logger.warning("Laravel unavailable, serving the catalog from %s", self.source)
+            self._lists.set(key, snapshot.items, settings.catalog_stale_ttl)
+            return snapshot.items
+
+        self.stale_since = None
+        self.source = 'laravel'
+        if response.status == 304 and snapshot is not None:
+            # Fresh for another TTL; version and rendered keyboards stay valid
+            self.sync_counts['not_modified'] += 1
+            self._lists.set(key, snapshot.items)
+            self.loaded_at = time.time()
+            return snapshot.items
+
+        payload = response.payload
+        changed = payload.get('data', [])
+        deleted = payload.get('deleted')
+        if deleted is not None and snapshot is not None:
+            items = apply_delta(snapshot.items, changed, deleted)
+            # The change may be in a field lists do not carry
+            for product in changed:
+                self._details.pop(('detail', product['id']))
+            self.sync_counts['delta'] += 1
+            logger.debug("Catalog delta for %s: %d changed, %d deleted", key, len(changed), len(deleted))
+        else:
+            items = changed
+            deleted = self._dropped_ids(key, items) if key != 'categories' else ()
+            self.sync_counts['full'] += 1
+
+        self._snapshots[key] = ListSnapshot(items, response.etag, response.last_modified, payload.get('synced_at'))
+        # Empty lists (an empty category) are cached like any other
+        self._store(key, items, deleted)
+        return items
+
+    async def get_categories(self) -> List[Dict]:
+        """Catalog categories"""
+        return await self._load('categories', lambda: self._sync('categories', '/categories', {}))
+
+    async def get_products(self, category_id: Optional[int] = None) -> List[Dict]:
+        """Products of a category, or the whole catalog"""
+        key = ('products', category_id)
+        params = api_client.products_params(category_id=category_id, fields=settings.catalog_list_fields)
+        return await self._load(key, lambda: self._sync(key, '/products', params))
+
+    async def get_product(self, product_id: int, full: bool = True) -> Optional[Dict]:
+        """Product by id; full=False is enough when only list fields are used"""
+        if full and settings.catalog_list_fields:
+            key = ('detail', product_id)
+            product = await self._load(key, lambda: self._fetch_detail(product_id), self._details)
+            if product:
+                return product
+            # Laravel failed: name and price from the list still let the user buy it
+            return await self._indexed_product(product_id, ask_laravel=False)
+        return await self._indexed_product(product_id)
+
+    async def _fetch_detail(self, product_id: int) -> Optional[Dict]:
+        async with api_client as client:
+            product = await client.get_product(product_id)
+        if product:
+            self._details.set(('detail', product_id), product)
+        return product
+
+    async def _indexed_product(self, product_id: int, ask_laravel: bool = True) -> Optional[Dict]:
+        """Product by id from the index, falling back to Laravel"""
+        product = self._by_id.get(product_id)
+        if product is not None:
+            return product
+
+        # Index may be cold or expired: load the full list once
+        await self.get_products()
+        product = self._by_id.get(product_id)
+        if product is not None:
+            return product
+
+        if ask_laravel:
+            async with api_client as client:
+                product = await client.get_product(product_id)
+            if product:
+                self._by_id[product_id] = product
+                return product
+
+        # Last resort: the product may only be listed inside its category
+        logger.info("Product %s not found in main list, searching in categories...", product_id)
+        await self._load_categories(await self.get_categories())
+        return self._by_id.get(product_id)
+
+    async def _load_categories(self, categories: List[Dict]) -> None:
+        """Load the product lists of categories concurrently, a few at a time"""
+        semaphore = asyncio.Semaphore(settings.warmup_concurrency)
+
+        async def load_category(category_id: int):
+            async with semaphore:
+                return await self.get_products(category_id=category_id)
+
+        await asyncio.gather(
+            *(load_category(category['id']) for category in categories),
+            return_exceptions=True
+        )
+
+    async def warm_up(self) -> Dict[str, int]:
+        """Load categories, the full product list and every category list"""
+        if self.loaded_at is None and settings.catalog_snapshot_path:
+            self.load_snapshot(settings.catalog_snapshot_path)
+        categories, products = await asyncio.gather(self.get_categories(), self.get_products())
+        await self._load_categories(categories)
+        return {'categories': len(categories), 'products': len(self._by_id)}
+
+    def _schedule_save(self) -> None:
+        if settings.catalog_snapshot_path and self._save_task is None:
+            self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+
+    async def _save_later(self) -> None:
+        await asyncio.sleep(SNAPSHOT_SAVE_DELAY)
+        # Changes from now on schedule the next save
+        self._save_task = None
+        document = {
+            'format': SNAPSHOT_FORMAT,
+            'loaded_at': self.loaded_at,
+            'lists': [
+                {
+                    'key': key, 'items': snapshot.items, 'etag': snapshot.etag,
+                    'last_modified': snapshot.last_modified, 'cursor': snapshot.cursor,
+                }
+                for key, snapshot in self._snapshots.items()
+            ],
+        }
+        try:
+            # Encoding and compression happen off the event loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._write_snapshot, settings.catalog_snapshot_path, document
+            )
+            self.snapshot_saved_at = time.time()
+        except Exception as e:
+            logger.warning("Catalog snapshot not saved: %s", e)
+
+    @staticmethod
+    def _write_snapshot(path: str, document: Dict) -> None:
+        # Workers share the file: write a private copy and swap it in atomically
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            f.write(dumps(document).encode())
+        os.replace(tmp_path, path)
+
+    def load_snapshot(self, path: str) -> bool:
+        """Serve the catalog saved by a previous run until Laravel is asked again"""
+        try:
+            with gzip.open(path, 'rb') as f:
+                document = loads(f.read())
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning("Catalog snapshot %s not loaded: %s", path, e)
+            return False
+        if document.get('format') != SNAPSHOT_FORMAT:
+            return False
+
+        for entry in document['lists']:
+            key = entry['key'] if entry['key'] == 'categories' else tuple(entry['key'])
+            snapshot = ListSnapshot(entry['items'], entry['etag'], entry['last_modified'], entry['cursor'])
+            self._snapshots[key] = snapshot
+            # Short TTL: revalidated (usually a 304) soon after the start
+            self._lists.set(key, snapshot.items, settings.catalog_stale_ttl)
+            if key != 'categories':
+                for product in snapshot.items:
+                    self._by_id[product['id']] = product
+        self.version += 1
+        self.keyboards.clear()
+        self.loaded_at = document['loaded_at']
+        self.source = 'snapshot'
+        logger.info("Catalog snapshot loaded: %d lists, %d products", len(document['lists']), len(self._by_id))
+        return True
+
+    def keyboard(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Markup for key, built once per catalog version"""
+        markup = self.keyboards.get(key)
+        if markup is None:
+            markup = build()
+            self.keyboards.set(key, markup)
+        return markup
+
+    def indexed_products(self) -> List[Dict]:
+        """Every product seen in the cached lists"""
+        return list(self._by_id.values())
+
+    def evict(self, product_ids: Optional[Iterable[int]] = None,
+              category_ids: Optional[Iterable[int]] = None) -> int:
+        """Drop only the lists, products and keyboards touched by a change in Laravel.
+
+        Without ids everything is dropped. Lists and keyboards are keyed by
+        'categories' or (kind, category_id, ...), category_id None being the
+        whole catalog. Evicted lists are revalidated on the next request.
+        """
+        if product_ids is None and category_ids is None:
+            removed = len(self._lists) + len(self._by_id) + len(self._details) + len(self.keyboards)
+            self.invalidate()
+            return removed
+
+        categories = {int(category_id) for category_id in category_ids or ()}
+        products = {int(product_id) for product_id in product_ids or ()}
+        removed = 0
+        for product_id in products:
+            product = self._by_id.pop(product_id, None)
+            if product is not None:
+                removed += 1
+                if product.get('category_id'):
+                    categories.add(int(product['category_id']))
+
+        # Lists showing the product now, wherever it was listed
+        for key, snapshot in self._snapshots.items():
+            if key != 'categories' and key[1] is not None and any(item['id'] in products for item in snapshot.items):
+                categories.add(key[1])
+
+        def touched(key: Hashable) -> bool:
+            if key == 'categories':
+                return category_ids is not None
+            return isinstance(key, tuple) and (key[1] is None or key[1] in categories)
+
+        removed += self._lists.pop_where(touched)
+        removed += self.keyboards.pop_where(touched)
+        removed += self._details.pop_where(
+            lambda key: key[1] in products or self._by_id.get(key[1], {}).get('category_id') in categories
+        )
+        logger.info("Catalog cache evicted: products %s, categories %s, %d entries removed",
+                    sorted(products), sorted(categories), removed)
+        return removed
+
+    def invalidate(self) -> None:
+        """Drop every cached list and rendered keyboard"""
+        self._lists.clear()
+        self._snapshots.clear()
+        self._by_id.clear()
+        self._details.clear()
+        self.keyboards.clear()
+        self.version += 1
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful load"""
+        return None if self.loaded_at is None else time.time() - self.loaded_at
+
+    def stats(self) -> Dict:
+        return {
+            **self._lists.stats(),
+            'products_indexed': len(self._by_id),
+            'details': self._details.stats(),
+            'syncs': dict(self.sync_counts),
+            'keyboards': self.keyboards.stats(),
+            'source': self.source,
+            'stale_seconds': round(time.time() - self.stale_since, 1) if self.stale_since else None,
+            'snapshot_saved_at': self.snapshot_saved_at,
+            'version': self.version,
+            'age_seconds': round(self.age, 1) if self.age is not None else None,
+        }
+
+
+# Глобальный экземпляр кэша каталога
+catalog_cache = CatalogCache()
@@ -0,0 +1,72 @@
+import logging
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while.
+
+    After `failures` consecutive failures the circuit opens and calls are
+    refused for `cooldown` seconds. Then one trial call per cooldown is let
+    through; its success closes the circuit.
+    """
+
+    def __init__(self, name: str, failures: int, cooldown: float):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self._consecutive = 0
+        self._opened_at: Optional[float] = None
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at < self.cooldown:
+            return OPEN
+        return HALF_OPEN
+
+    def allow(self) -> bool:
+        """True if a call may be made now"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            # Trial call; the others are refused for another cooldown
+            self._opened_at = time.monotonic()
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.warning("Circuit %s closed", self.name)
+        self._consecutive = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._consecutive += 1
+        if self._opened_at is not None:
+            # Failed trial call
+            self._opened_at = time.monotonic()
+        elif self._consecutive >= self.failures:
+            self._opened_at = time.monotonic()
+            self.opened += 1
+            logger.error("Circuit %s opened after %d failures, retry in %ss",
+                         self.name, self._consecutive, self.cooldown)
+
+    def stats(self) -> Dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self._consecutive,
+            'opened': self.opened,
+            'rejected': self.rejected,
+        }
@@ -37,10 +37,12 @@ def validate_phone(phone: str) -> bool:
 
 
 def truncate_text(text: str, max_length: int = 4096) -> str:
-    """Обрезает текст до максимальной длины для Telegram"""
-    if len(text) <= max_length:
+    """Обрезает текст до максимальной длины для Telegram, не ломая HTML теги"""
+    from utils.message_builder import split_html, text_length
+    
+    if text_length(text) <= max_length:
         return text
-    return text[:max_length - 3] + "..."
+    return split_html(text, max_length - 3)[0] + "..."
 
 
 def get_user_mention(user) -> str:
@@ -0,0 +1,48 @@
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from services.catalog_cache import catalog_cache
+from services.promo_cache import promo_cache
+from services.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus:
+    """Cache invalidations triggered by Laravel webhooks.
+
+    publish() applies an invalidation in this process and, in multi-process
+    mode, forwards it to every worker, which apply it with apply(). Kinds
+    are registered once with the function that does the local work.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[Any], Any]] = {}
+        # Set by the intake process to broadcast to workers
+        self.forward: Optional[Callable[[str, Any], None]] = None
+
+    def register(self, kind: str, handler: Callable[[Any], Any]) -> None:
+        self._handlers[kind] = handler
+
+    def apply(self, kind: str, payload: Any) -> Any:
+        """Run the local invalidation for kind"""
+        handler = self._handlers.get(kind)
+        if handler is None:
+            logger.warning("Unknown invalidation kind: %s", kind)
+            return None
+        return handler(payload)
+
+    def publish(self, kind: str, payload: Any = None) -> Any:
+        """Invalidate here and in every worker; returns the local result"""
+        result = self.apply(kind, payload)
+        if self.forward is not None:
+            self.forward(kind, payload)
+        return result
+
+
+# Глобальный экземпляр шины инвалидации
+invalidation_bus = InvalidationBus()
+invalidation_bus.register('user', user_cache.invalidate_user)
+invalidation_bus.register('user_orders', user_cache.invalidate_orders)
+invalidation_bus.register('promocodes', promo_cache.invalidate)
+invalidation_bus.register('catalog', lambda payload: catalog_cache.evict(**payload))
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Background sampler of event loop lag.
+
+    Sleeps for a fixed interval and measures how late it wakes up. Any delay
+    means a callback held the loop, and every user waited for it.
+    """
+
+    def __init__(self, interval: Optional[float] = None, window: int = 120):
+        self.interval = settings.loop_lag_interval if interval is None else interval
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.stalls = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, (time.perf_counter() - started - self.interval) * 1000)
+            self.samples.append(lag)
+            if lag > settings.loop_lag_warn_ms:
+                self.stalls += 1
+                logger.warning("Event loop lag %.0f ms", lag)
+
+    @property
+    def current_lag_ms(self) -> float:
+        return self.samples[-1] if self.samples else 0.0
+
+    @property
+    def max_lag_ms(self) -> float:
+        """Worst lag in the sampling window"""
+        return max(self.samples, default=0.0)
+
+    def stats(self) -> Dict:
+        return {
+            'running': self.running,
+            'current_lag_ms': round(self.current_lag_ms, 1),
+            'max_lag_ms': round(self.max_lag_ms, 1),
+            'stalls': self.stalls,
+            'samples': len(self.samples),
+        }
+
+
+# Глобальный экземпляр монитора event loop
+loop_monitor = LoopMonitor()
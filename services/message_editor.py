@@ -0,0 +1,161 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, InputMediaPhoto, Message
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def render_hash(text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> bytes:
+    """Digest of everything edit_text would send"""
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16)
+    if reply_markup is not None:
+        digest.update(b'\x00')
+        digest.update(reply_markup.model_dump_json(exclude_none=True).encode('utf-8'))
+    return digest.digest()
+
+
+class MessageEditor:
+    """edit_text wrapper that skips edits identical to the last rendered content.
+
+    Keeps a bounded LRU of (chat_id, message_id) -> render hash. The hash is
+    only stored after Telegram accepted the edit, so a failed edit is retried
+    next time.
+
+    Text and photo messages cannot be edited into each other, so switching
+    between them sends a new message and deletes the old one.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.edit_cache_max_entries
+        self._hashes: 'OrderedDict[Tuple[int, int], bytes]' = OrderedDict()
+        self.stats: Dict[str, int] = {
+            'sent': 0,           # edits that reached Telegram
+            'skipped': 0,        # identical edits answered from the hash cache
+            'not_modified': 0,   # "message is not modified" errors swallowed
+            'replaced': 0,       # text <-> photo switches sent as new messages
+        }
+
+    def _remember(self, key: Tuple[int, int], digest: bytes) -> None:
+        self._hashes[key] = digest
+        self._hashes.move_to_end(key)
+        if len(self._hashes) > self.max_entries:
+            self._hashes.popitem(last=False)
+
+    def forget(self, message: Message) -> None:
+        """Drop the stored hash, e.g. after the message was changed elsewhere"""
+        self._hashes.pop((message.chat.id, message.message_id), None)
+
+    async def _replace(self, message: Message, digest: bytes, send) -> Message:
+        """Send the new content as a new message, then remove the old one"""
+        result = await send()
+        self._hashes.pop((message.chat.id, message.message_id), None)
+        try:
+            await message.delete()
+        except TelegramBadRequest as e:
+            # Too old to delete; it stays above the new one
+            logger.debug("Message %s not deleted: %s", message.message_id, e)
+        self.stats['replaced'] += 1
+        self._remember((result.chat.id, result.message_id), digest)
+        return result
+
+    def _is_unchanged(self, key: Tuple[int, int], digest: bytes) -> bool:
+        if self._hashes.get(key) == digest:
+            self.stats['skipped'] += 1
+            self._hashes.move_to_end(key)
+            return True
+        return False
+
+    async def edit_text(self, message: Message, text: str,
+                        reply_markup: Optional[InlineKeyboardMarkup] = None, **kwargs):
+        """Edit message text unless it already shows exactly this content"""
+        key = (message.chat.id, message.message_id)
+        digest = render_hash(text, reply_markup)
+
+        if self._is_unchanged(key, digest):
+            return None
+
+        if message.photo:
+            # A photo (product page) has no text to edit
+            return await self._replace(
+                message, digest, lambda: message.answer(text, reply_markup=reply_markup, **kwargs)
+            )
+
+        try:
+            result = await message.edit_text(text, reply_markup=reply_markup, **kwargs)
+        except TelegramBadRequest as e:
+            if 'message is not modified' in str(e):
+                self.stats['not_modified'] += 1
+                self._remember(key, digest)
+                return None
+            self._hashes.pop(key, None)
+            raise
+
+        self.stats['sent'] += 1
+        self._remember(key, digest)
+        return result
+
+    async def edit_photo(self, message: Message, photo: str, caption: str,
+                         reply_markup: Optional[InlineKeyboardMarkup] = None):
+        """Show a photo (file_id or URL) with caption in place of message"""
+        key = (message.chat.id, message.message_id)
+        digest = render_hash(f"{photo}\x00{caption}", reply_markup)
+
+        if self._is_unchanged(key, digest):
+            return None
+
+        if not message.photo:
+            return await self._replace(
+                message, digest, lambda: message.answer_photo(photo, caption=caption, reply_markup=reply_markup)
+            )
+
+        try:
+            result = await message.edit_media(InputMediaPhoto(media=photo, caption=caption), reply_markup=reply_markup)
+        except TelegramBadRequest as e:
+            if 'message is not modified' in str(e):
+                self.stats['not_modified'] += 1
+                self._remember(key, digest)
+                return None
+            self._hashes.pop(key, None)
+            raise
+
+        self.stats['sent'] += 1
+        self._remember(key, digest)
+        return result
+
+    @property
+    def saved_calls(self) -> int:
+        """Telegram calls avoided thanks to the hash cache"""
+        return self.stats['skipped']
+
+
+# Глобальный экземпляр редактора сообщений
+message_editor = MessageEditor()
+
+
+async def edit_message_text(message: Message, text: str,
+                            reply_markup: Optional[InlineKeyboardMarkup] = None, **kwargs):
+    """Shared edit helper for all handlers"""
+    return await message_editor.edit_text(message, text, reply_markup=reply_markup, **kwargs)
+
+
+async def send_message_parts(message: Message, parts: List[str],
+                             reply_markup: Optional[InlineKeyboardMarkup] = None, edit: bool = False):
+    """Show a possibly split message: the first part replaces or answers message,
+    the rest follow as new messages. The keyboard goes on the last part."""
+    last = len(parts) - 1
+    result = None
+
+    for index, part in enumerate(parts):
+        markup = reply_markup if index == last else None
+        if index == 0 and edit:
+            result = await edit_message_text(message, part, reply_markup=markup)
+        else:
+            result = await message.answer(part, reply_markup=markup)
+
+    return result
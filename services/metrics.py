@@ -0,0 +1,134 @@
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, List, Optional
+
+from config import settings
+
+# Laravel calls made while handling the current update (set by the timing middleware)
+_laravel_calls: ContextVar[Optional[List[Dict]]] = ContextVar('laravel_calls', default=None)
+
+
+def begin_laravel_calls() -> List[Dict]:
+    """Start recording Laravel calls for the current update"""
+    calls: List[Dict] = []
+    _laravel_calls.set(calls)
+    return calls
+
+
+@contextmanager
+def track_laravel_call(method: str, endpoint: str) -> Iterator[None]:
+    """Record one Laravel call in the current update, if one is being timed"""
+    calls = _laravel_calls.get()
+    if calls is None:
+        yield
+        return
+    record = {'call': f'{method} {endpoint}', 'started': time.perf_counter(), 'ms': None}
+    calls.append(record)
+    try:
+        yield
+    finally:
+        record['ms'] = round((time.perf_counter() - record['started']) * 1000, 1)
+
+
+def describe_calls(calls: List[Dict]) -> List[str]:
+    """Human readable list of calls; unfinished ones show their elapsed time"""
+    now = time.perf_counter()
+    described = []
+    for record in calls:
+        if record['ms'] is None:
+            described.append(f"{record['call']} (pending {(now - record['started']) * 1000:.0f} ms)")
+        else:
+            described.append(f"{record['call']} ({record['ms']:.0f} ms)")
+    return described
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = math.ceil(fraction * len(ordered))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+class LatencyWindow:
+    """Last N durations of one operation with their percentiles"""
+
+    def __init__(self, size: int):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.count = 0
+        self.slow = 0
+
+    def add(self, ms: float, slow: bool = False) -> None:
+        self.samples.append(ms)
+        self.count += 1
+        if slow:
+            self.slow += 1
+
+    def stats(self) -> Dict:
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'slow': self.slow,
+            'p50_ms': round(percentile(ordered, 0.50), 1),
+            'p95_ms': round(percentile(ordered, 0.95), 1),
+            'p99_ms': round(percentile(ordered, 0.99), 1),
+            'max_ms': round(ordered[-1], 1) if ordered else 0.0,
+        }
+
+
+class HandlerTimings:
+    """Per-handler latency windows"""
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = settings.handler_stats_samples if size is None else size
+        self._windows: Dict[str, LatencyWindow] = {}
+
+    def observe(self, name: str, ms: float, slow: bool = False) -> None:
+        window = self._windows.get(name)
+        if window is None:
+            window = self._windows[name] = LatencyWindow(self.size)
+        window.add(ms, slow)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {name: window.stats() for name, window in sorted(self._windows.items())}
+
+
+class TransferStats:
+    """Bytes received from Laravel per endpoint, on the wire and decoded.
+
+    Keyed by the endpoint template ('/products/{id}'), never by the raw
+    path, so the table stays as small as the API.
+    """
+
+    def __init__(self):
+        self._endpoints: Dict[str, Dict[str, int]] = {}
+
+    def observe(self, method: str, route: str, wire_bytes: int, body_bytes: int, compressed: bool) -> None:
+        name = f"{method} {route}"
+        totals = self._endpoints.get(name)
+        if totals is None:
+            totals = self._endpoints[name] = {'responses': 0, 'compressed': 0, 'wire_bytes': 0, 'body_bytes': 0}
+        totals['responses'] += 1
+        totals['compressed'] += compressed
+        totals['wire_bytes'] += wire_bytes
+        totals['body_bytes'] += body_bytes
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            name: {
+                **totals,
+                'avg_wire_bytes': totals['wire_bytes'] // totals['responses'],
+                'saved_pct': round(100 - 100 * totals['wire_bytes'] / totals['body_bytes'], 1) if totals['body_bytes'] else 0.0,
+            }
+            for name, totals in sorted(self._endpoints.items())
+        }
+
+
+# Глобальный экземпляр статистики обработчиков
+handler_timings = HandlerTimings()
+
+# Глобальный экземпляр статистики трафика Laravel
+laravel_transfer = TransferStats()
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Product fields Laravel may put the main image in
+IMAGE_FIELDS = ('image_url', 'image', 'photo')
+
+
+def product_image_url(product: Dict) -> Optional[str]:
+    """Absolute URL of the product's main image, None if it has none"""
+    for field in IMAGE_FIELDS:
+        value = product.get(field)
+        if value and isinstance(value, str):
+            break
+    else:
+        return None
+    if value.startswith(('http://', 'https://')):
+        return value
+    # Relative path on Laravel's public disk
+    base_url = settings.image_base_url or f"{settings.laravel_api_url.rstrip('/')}/storage"
+    return f"{base_url.rstrip('/')}/{value.lstrip('/')}"
+
+
+class PhotoFileIdCache:
+    """Telegram file_id of every product image the bot has sent.
+
+    The first view of an image sends its URL and Telegram downloads it from
+    Laravel; the file_id from the reply is stored under (product id, image
+    URL), so later views send the id and a new image (new URL) gets a new
+    entry. Ids are kept in memory and in a small SQLite file, so they
+    survive restarts and are shared by worker processes. The file is opened
+    and read once at startup; later queries run in a thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._ids: Dict[Tuple[int, str], str] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def open(self) -> None:
+        """Open the file and load the stored ids; without it ids stay in memory"""
+        if not self.path or self._conn is not None:
+            return
+        try:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS photos ('
+                'product_id INTEGER, image_url TEXT, file_id TEXT NOT NULL, '
+                'PRIMARY KEY (product_id, image_url))'
+            )
+            for product_id, image_url, file_id in conn.execute('SELECT product_id, image_url, file_id FROM photos'):
+                self._ids[(product_id, image_url)] = file_id
+        except sqlite3.Error as e:
+            logger.warning("Photo file_id store %s not opened, ids are kept in memory: %s", self.path, e)
+            return
+        self._conn = conn
+        logger.info("Photo file_id store opened: %d ids", len(self._ids))
+
+    def _query(self, query: str, params: tuple) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()
+
+    async def get(self, product_id: int, image_url: str) -> Optional[str]:
+        key = (product_id, image_url)
+        file_id = self._ids.get(key)
+        if file_id is None and self._conn is not None:
+            # Another worker may have sent it since startup
+            try:
+                row = await asyncio.to_thread(
+                    self._query, 'SELECT file_id FROM photos WHERE product_id = ? AND image_url = ?', key
+                )
+            except sqlite3.Error as e:
+                logger.warning("Photo file_id for product %s not read: %s", product_id, e)
+                row = None
+            if row:
+                file_id = self._ids[key] = row[0]
+        if file_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return file_id
+
+    async def set(self, product_id: int, image_url: str, file_id: str) -> None:
+        self._ids[(product_id, image_url)] = file_id
+        self.stored += 1
+        if self._conn is None:
+            return
+        try:
+            await asyncio.to_thread(
+                self._query, 'INSERT OR REPLACE INTO photos (product_id, image_url, file_id) VALUES (?, ?, ?)',
+                (product_id, image_url, file_id)
+            )
+        except sqlite3.Error as e:
+            logger.warning("Photo file_id for product %s not persisted: %s", product_id, e)
+
+    async def forget(self, product_id: int, image_url: str) -> None:
+        """Drop an id Telegram no longer accepts"""
+        self._ids.pop((product_id, image_url), None)
+        if self._conn is None:
+            return
+        try:
+            await asyncio.to_thread(
+                self._query, 'DELETE FROM photos WHERE product_id = ? AND image_url = ?', (product_id, image_url)
+            )
+        except sqlite3.Error as e:
+            logger.warning("Photo file_id for product %s not removed: %s", product_id, e)
+
+    def stats(self) -> Dict:
+        return {'size': len(self._ids), 'hits': self.hits, 'misses': self.misses, 'stored': self.stored}
+
+
+# Глобальный экземпляр кэша file_id фотографий
+photo_cache = PhotoFileIdCache(settings.photo_cache_path)
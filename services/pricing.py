@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from services.cache import TTLCache
+
+_CENT = Decimal('0.01')
+
+
+def to_cents(value: Any) -> int:
+    """Convert a price ("12.5", 12.5, Decimal) to integer cents"""
+    if isinstance(value, int):
+        return value * 100
+
+    # Fast path for plain "12" / "12.5" / "12.99" without going through Decimal
+    whole, dot, fraction = str(value).strip().partition('.')
+    if whole.isdigit() and (not dot or (fraction.isdigit() and len(fraction) <= 2)):
+        return int(whole) * 100 + (int(fraction.ljust(2, '0')) if fraction else 0)
+
+    try:
+        amount = Decimal(str(value)).quantize(_CENT, rounding=ROUND_HALF_UP)
+    except (InvalidOperation, ValueError):
+        return 0
+    return int(amount * 100)
+
+
+def format_cents(cents: int) -> str:
+    """Format integer cents as dollars: 1250 -> $12.50"""
+    sign = '-' if cents < 0 else ''
+    cents = abs(cents)
+    return f"{sign}${cents // 100}.{cents % 100:02d}"
+
+
+class QuoteLine(NamedTuple):
+    """One cart line priced in cents"""
+    product_id: int
+    name: str
+    quantity: int
+    unit_cents: int
+    total_cents: int
+
+
+@dataclass(frozen=True)
+class PriceQuote:
+    """Immutable price calculation for one cart version"""
+    lines: Tuple[QuoteLine, ...]
+    subtotal_cents: int
+    discount_cents: int = 0
+    promocode: Optional[str] = None
+    discount_type: Optional[str] = None
+    discount_value: Optional[str] = None
+
+    @property
+    def total_cents(self) -> int:
+        return self.subtotal_cents - self.discount_cents
+
+    @property
+    def promo_label(self) -> str:
+        """(-10%) or (-$5.00) next to the promo code"""
+        if self.discount_type == 'percentage':
+            return f"(-{self.discount_value}%)"
+        return f"(-{format_cents(self.discount_cents)})"
+
+
+def promo_from_state(order_data: Dict) -> Optional[Tuple[str, str, str]]:
+    """(code, type, value) of the promo code saved in FSM data"""
+    if not order_data.get('promocode'):
+        return None
+    value = Decimal(str(order_data.get('discount_value', 0) or 0)).normalize()
+    return (
+        order_data['promocode'],
+        order_data.get('discount_type', 'percentage'),
+        format(value, 'f'),
+    )
+
+
+def calculate_quote(cart_items: List[Dict], promo: Optional[Tuple[str, str, str]] = None) -> PriceQuote:
+    """Price cart lines and apply a fixed or percentage discount, all in cents"""
+    lines = []
+    for item in cart_items:
+        unit_cents = to_cents(item['price'])
+        lines.append(QuoteLine(
+            product_id=item['id'],
+            name=item['name'],
+            quantity=item['quantity'],
+            unit_cents=unit_cents,
+            total_cents=unit_cents * item['quantity'],
+        ))
+    lines = tuple(lines)
+    subtotal = sum(line.total_cents for line in lines)
+
+    if not promo:
+        return PriceQuote(lines=lines, subtotal_cents=subtotal)
+
+    code, discount_type, discount_value = promo
+    if discount_type == 'fixed':
+        discount = min(to_cents(discount_value), subtotal)
+    else:
+        discount = int((Decimal(subtotal) * Decimal(discount_value) / 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        discount = min(discount, subtotal)
+
+    return PriceQuote(
+        lines=lines,
+        subtotal_cents=subtotal,
+        discount_cents=max(discount, 0),
+        promocode=code,
+        discount_type='fixed' if discount_type == 'fixed' else 'percentage',
+        discount_value=discount_value,
+    )
+
+
+class PricingService:
+    """Computes a quote once per (cart version, promo code) and serves it from cache"""
+
+    def __init__(self, max_entries: int = 20000):
+        # user_id -> (cart version, promo, quote)
+        self._quotes = TTLCache(ttl=3600, max_entries=max_entries)
+        self.computed = 0
+
+    def quote(self, user_id: int, order_data: Optional[Dict] = None) -> PriceQuote:
+        """Quote for the current cart of user with the promo code from FSM data"""
+        # Imported here to avoid a cycle: cart_service does not depend on pricing
+        from services.cart_service import cart_service
+
+        version = cart_service.get_cart_version(user_id)
+        promo = promo_from_state(order_data or {})
+
+        cached = self._quotes.get(user_id)
+        if cached is not None and cached[0] == version and cached[1] == promo:
+            return cached[2]
+
+        quote = calculate_quote(cart_service.get_cart(user_id), promo)
+        self._quotes.set(user_id, (version, promo, quote))
+        self.computed += 1
+        return quote
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._quotes.stats(), 'computed': self.computed}
+
+
+# Глобальный экземпляр сервиса цен
+pricing_service = PricingService()
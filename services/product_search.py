@@ -0,0 +1,100 @@
+import logging
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from services.catalog_cache import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+# Share of the query trigrams a name must contain to be a match
+MIN_SIMILARITY = 0.5
+
+
+def normalize(text: str) -> str:
+    """Lowercase words separated by single spaces"""
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of every word, padded so short words and word starts count"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class ProductSearchIndex:
+    """In-memory trigram index over product names.
+
+    Typos cost only the few trigrams they touch, so "blu raz" still finds
+    "Blue Razz". Built from the products in catalog_cache and rebuilt when
+    the catalog version changes.
+    """
+
+    def __init__(self):
+        self._products: List[Dict] = []
+        self._names: List[str] = []
+        self._postings: Dict[str, List[int]] = {}
+        self.version: Optional[int] = None
+
+    def build(self, products: List[Dict], version: Optional[int] = None) -> None:
+        started = time.perf_counter()
+        postings: Dict[str, List[int]] = {}
+        names = []
+        for position, product in enumerate(products):
+            name = normalize(str(product.get('name', '')))
+            names.append(name)
+            for gram in trigrams(name):
+                postings.setdefault(gram, []).append(position)
+        self._products = products
+        self._names = names
+        self._postings = postings
+        self.version = version
+        logger.debug("Search index built: %d products in %.1f ms",
+                     len(products), (time.perf_counter() - started) * 1000)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Best matching products, exact substring matches first"""
+        text = normalize(query)
+        grams = trigrams(text)
+        if not grams:
+            return []
+
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        needed = len(grams) * MIN_SIMILARITY
+        ranked = sorted(
+            (
+                (text in self._names[position], count, -len(self._names[position]), position)
+                for position, count in shared.items()
+                if count >= needed
+            ),
+            reverse=True
+        )
+        return [self._products[position] for *_, position in ranked[:limit]]
+
+    async def search_catalog(self, query: str, limit: int = 20) -> List[Dict]:
+        """Search the cached catalog, (re)building the index when it changed"""
+        # Served from memory when the catalog is warm
+        await catalog_cache.get_products()
+        if self.version != catalog_cache.version:
+            self.build(catalog_cache.indexed_products(), catalog_cache.version)
+        return self.search(query, limit)
+
+    def stats(self) -> Dict:
+        return {
+            'products': len(self._products),
+            'trigrams': len(self._postings),
+            'version': self.version,
+        }
+
+
+# Глобальный экземпляр поискового индекса
+product_search = ProductSearchIndex()
@@ -0,0 +1,103 @@
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Hashable, Iterable, Optional
+
+from config import settings
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowLimiter:
+    """Allows at most `limit` attempts per key within the last `window` seconds"""
+
+    def __init__(self, limit: int, window: float, max_entries: int = 50000):
+        self.limit = limit
+        self.window = window
+        self.max_entries = max_entries
+        self._attempts: 'OrderedDict[Hashable, Deque[float]]' = OrderedDict()
+        self.rejected = 0
+
+    def _recent(self, key: Hashable, now: float) -> Deque[float]:
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            attempts = deque()
+            self._attempts[key] = attempts
+            if len(self._attempts) > self.max_entries:
+                self._attempts.popitem(last=False)
+        else:
+            self._attempts.move_to_end(key)
+
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+        return attempts
+
+    def hit(self, key: Hashable) -> bool:
+        """Register an attempt, return False if the limit is already reached"""
+        now = time.monotonic()
+        attempts = self._recent(key, now)
+        if len(attempts) >= self.limit:
+            self.rejected += 1
+            return False
+        attempts.append(now)
+        return True
+
+    def retry_after(self, key: Hashable) -> float:
+        """Seconds until the next attempt will be allowed"""
+        now = time.monotonic()
+        attempts = self._recent(key, now)
+        if len(attempts) < self.limit:
+            return 0.0
+        return max(0.0, attempts[0] + self.window - now)
+
+
+class PromoCodeCache:
+    """Promo code validation results with separate TTLs for valid and unknown codes"""
+
+    def __init__(self):
+        self.positive = TTLCache(settings.promo_positive_ttl, 5000)
+        self.negative = TTLCache(settings.promo_negative_ttl, 20000)
+        self.limiter = SlidingWindowLimiter(settings.promo_attempts_limit, settings.promo_attempts_window)
+
+    def get(self, code: str) -> Optional[Dict]:
+        """Cached Laravel answer for code, None if it has to be asked"""
+        result = self.positive.get(code)
+        if result is None:
+            result = self.negative.get(code)
+        return result
+
+    def store(self, code: str, result: Dict) -> None:
+        """Remember Laravel answer; empty (failed, 5xx) responses are not cached"""
+        if not result:
+            return
+        if result.get('valid'):
+            self.negative.pop(code)
+            self.positive.set(code, result)
+        else:
+            self.negative.set(code, result)
+
+    def invalidate(self, codes: Optional[Iterable[str]] = None) -> int:
+        """Forget given codes, or everything if no codes are given"""
+        if codes is None:
+            removed = len(self.positive) + len(self.negative)
+            self.positive.clear()
+            self.negative.clear()
+        else:
+            removed = 0
+            for code in codes:
+                code = code.strip().upper()
+                removed += self.positive.pop(code) + self.negative.pop(code)
+        logger.info("Promo code cache invalidated, %s entries removed", removed)
+        return removed
+
+    def stats(self) -> Dict:
+        return {
+            'positive': self.positive.stats(),
+            'negative': self.negative.stats(),
+            'rejected_attempts': self.limiter.rejected,
+        }
+
+
+# Глобальный экземпляр кэша промокодов
+promo_cache = PromoCodeCache()
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from aiogram import Bot
+
+from config import settings
+from services.api_client import api_client
+from services.catalog_cache import catalog_cache
+from services.loop_monitor import loop_monitor
+from services.render_debouncer import render_debouncer
+
+logger = logging.getLogger(__name__)
+
+OK = 'ok'
+DEGRADED = 'degraded'
+FAIL = 'fail'
+
+_SEVERITY = {OK: 0, DEGRADED: 1, FAIL: 2}
+
+
+def _worst(*statuses: str) -> str:
+    return max(statuses, key=_SEVERITY.__getitem__, default=OK)
+
+
+class ReadinessProbe:
+    """Deep readiness check for the orchestrator.
+
+    Measures Laravel and Telegram round trips, event loop lag, queue depths
+    and catalog freshness. The result is cached for a few seconds so
+    frequent health checks do not hit the backends on every request.
+    """
+
+    def __init__(self):
+        self._result: Optional[Dict] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _timed(self, coro, slow_ms: float) -> Dict:
+        try:
+            started = time.perf_counter()
+            await asyncio.wait_for(coro, settings.ready_probe_timeout)
+            latency = (time.perf_counter() - started) * 1000
+            status = DEGRADED if latency > slow_ms else OK
+            return {'status': status, 'latency_ms': round(latency, 1)}
+        except asyncio.TimeoutError:
+            return {'status': FAIL, 'error': f'timeout after {settings.ready_probe_timeout}s'}
+        except Exception as e:
+            return {'status': FAIL, 'error': str(e) or e.__class__.__name__}
+
+    async def check_laravel(self) -> Dict:
+        return await self._timed(api_client.ping(), settings.ready_laravel_slow_ms)
+
+    async def check_telegram(self, bot: Optional[Bot]) -> Dict:
+        if bot is None:
+            return {'status': OK, 'skipped': True}
+        return await self._timed(bot.get_me(), settings.ready_telegram_slow_ms)
+
+    async def check_event_loop(self) -> Dict:
+        if loop_monitor.running:
+            # Worst lag over the sampler window, not just this instant
+            lag = loop_monitor.max_lag_ms
+        else:
+            started = time.perf_counter()
+            await asyncio.sleep(0)
+            lag = (time.perf_counter() - started) * 1000
+        status = DEGRADED if lag > settings.ready_loop_lag_ms else OK
+        return {'status': status, 'lag_ms': round(lag, 2)}
+
+    def check_queues(self) -> Dict:
+        pending_renders = render_debouncer.pending
+        tasks = len(asyncio.all_tasks())
+        status = DEGRADED if tasks > settings.ready_max_tasks else OK
+        return {'status': status, 'pending_renders': pending_renders, 'tasks': tasks}
+
+    def check_catalog(self) -> Dict:
+        age = catalog_cache.age
+        if age is None:
+            return {'status': DEGRADED, 'age_seconds': None, 'error': 'catalog not loaded'}
+        # Lists reload on demand, so an idle instance may hold an expired catalog;
+        # that is reported but does not take the instance out of rotation
+        return {
+            'status': OK,
+            'age_seconds': round(age, 1),
+            'stale': age > settings.catalog_cache_ttl,
+            'version': catalog_cache.version,
+            'source': catalog_cache.source,
+            'serving_stale': catalog_cache.stale_since is not None,
+        }
+
+    async def run(self, bot: Optional[Bot] = None) -> Dict:
+        """Run every check and combine them into an overall status"""
+        laravel, telegram, event_loop = await asyncio.gather(
+            self.check_laravel(), self.check_telegram(bot), self.check_event_loop()
+        )
+        checks = {
+            'laravel': laravel,
+            'telegram': telegram,
+            'event_loop': event_loop,
+            'queues': self.check_queues(),
+            'catalog': self.check_catalog(),
+        }
+        return {
+            'status': _worst(*(check['status'] for check in checks.values())),
+            'checks': checks,
+            'checked_at': time.time(),
+        }
+
+    async def get(self, bot: Optional[Bot] = None) -> Dict:
+        """Cached result of run(); concurrent callers share one probe"""
+        async with self._lock:
+            if self._result is None or time.monotonic() - self._checked_at > settings.ready_cache_ttl:
+                self._result = await self.run(bot)
+                self._checked_at = time.monotonic()
+                if self._result['status'] != OK:
+                    logger.warning("Readiness %s: %s", self._result['status'], self._result['checks'])
+            return self._result
+
+
+# Глобальный экземпляр проверки готовности
+readiness_probe = ReadinessProbe()
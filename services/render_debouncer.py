@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RenderDebouncer:
+    """Coalesces message re-renders for the same key within a short window.
+
+    Every schedule() call restarts the window, so a burst of presses ends in a
+    single render of the final state. A render that has already started is
+    never cancelled - the next schedule() simply queues one more render.
+    Another view of the same message calls flush() first, so no debounced
+    render lands on top of it.
+    """
+
+    def __init__(self, delay: Optional[float] = None):
+        self.delay = settings.cart_render_debounce if delay is None else delay
+        self._pending: Dict[Hashable, asyncio.Task] = {}
+        # Renders past their window, being sent to Telegram
+        self._running: Dict[Hashable, asyncio.Task] = {}
+        self.scheduled = 0
+        self.rendered = 0
+
+    def schedule(self, key: Hashable, render: Callable[[], Awaitable], delay: Optional[float] = None) -> None:
+        """Schedule render for key, replacing any render still waiting"""
+        self.cancel(key)
+        self.scheduled += 1
+        self._pending[key] = asyncio.create_task(
+            self._run(key, render, self.delay if delay is None else delay)
+        )
+
+    def cancel(self, key: Hashable) -> bool:
+        """Drop a render that is still waiting for its window"""
+        task = self._pending.pop(key, None)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    async def flush(self, key: Hashable) -> None:
+        """Drop a waiting render and wait for one already running, before key is redrawn"""
+        self.cancel(key)
+        task = self._running.get(key)
+        if task is not None:
+            # Shielded: cancelling this caller must not cut the render mid-request
+            await asyncio.shield(task)
+
+    @property
+    def pending(self) -> int:
+        """Number of renders waiting for their window"""
+        return len(self._pending)
+
+    async def _run(self, key: Hashable, render: Callable[[], Awaitable], delay: float) -> None:
+        await asyncio.sleep(delay)
+
+        # From here on the render belongs to nobody and cannot be cancelled by schedule()
+        task = asyncio.current_task()
+        if self._pending.get(key) is task:
+            del self._pending[key]
+        self._running[key] = task
+
+        try:
+            await render()
+            self.rendered += 1
+        except Exception as e:
+            logger.error("Debounced render for %s failed: %s", key, e)
+        finally:
+            if self._running.get(key) is task:
+                del self._running[key]
+
+
+# Глобальный экземпляр для перерисовки сообщений корзины
+render_debouncer = RenderDebouncer()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+
+class SQLiteStateStore:
+    """Carts and FSM state in a local SQLite file shared by worker processes.
+
+    Every user is served by one worker, so there are no concurrent writers
+    for the same row; the file only has to outlive a worker restart. WAL
+    mode keeps writes from one worker off the readers of the others.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS carts (user_id INTEGER PRIMARY KEY, items TEXT NOT NULL)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS fsm (key TEXT PRIMARY KEY, state TEXT, data TEXT)')
+
+    def _fetchone(self, query: str, params: tuple) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()
+
+    def _execute(self, query: str, params: tuple) -> None:
+        with self._lock:
+            self._conn.execute(query, params)
+
+    def load_cart(self, user_id: int) -> Optional[List[Dict]]:
+        row = self._fetchone('SELECT items FROM carts WHERE user_id = ?', (user_id,))
+        return json.loads(row[0]) if row else None
+
+    def save_cart(self, user_id: int, items: List[Dict]) -> None:
+        if items:
+            self._execute('INSERT OR REPLACE INTO carts (user_id, items) VALUES (?, ?)', (user_id, json.dumps(items)))
+        else:
+            self._execute('DELETE FROM carts WHERE user_id = ?', (user_id,))
+
+    def get_state(self, key: str) -> Optional[str]:
+        row = self._fetchone('SELECT state FROM fsm WHERE key = ?', (key,))
+        return row[0] if row else None
+
+    def set_state(self, key: str, state: Optional[str]) -> None:
+        self._execute(
+            'INSERT INTO fsm (key, state, data) VALUES (?, ?, NULL) '
+            'ON CONFLICT(key) DO UPDATE SET state = excluded.state',
+            (key, state)
+        )
+
+    def get_data(self, key: str) -> Dict[str, Any]:
+        row = self._fetchone('SELECT data FROM fsm WHERE key = ?', (key,))
+        return json.loads(row[0]) if row and row[0] else {}
+
+    def set_data(self, key: str, data: Dict[str, Any]) -> None:
+        self._execute(
+            'INSERT INTO fsm (key, state, data) VALUES (?, NULL, ?) '
+            'ON CONFLICT(key) DO UPDATE SET data = excluded.data',
+            (key, json.dumps(data) if data else None)
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SQLiteStorage(BaseStorage):
+    """aiogram FSM storage on top of SQLiteStateStore, queried in threads"""
+
+    def __init__(self, store: SQLiteStateStore):
+        self.store = store
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return ':'.join(str(part) for part in (
+            key.bot_id, key.chat_id, key.user_id, key.thread_id, key.business_connection_id, key.destiny
+        ))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await asyncio.to_thread(self.store.set_state, self._key(key), state.state if isinstance(state, State) else state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await asyncio.to_thread(self.store.get_state, self._key(key))
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self.store.set_data, self._key(key), data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.store.get_data, self._key(key))
+
+    async def close(self) -> None:
+        self.store.close()
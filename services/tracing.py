@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('current_trace', default=None)
+
+
+class Trace:
+    """Spans of one update, from the moment it reaches the dispatcher"""
+
+    __slots__ = ('trace_id', 'name', 'attrs', 'started', 'started_at', 'spans', 'duration_ms')
+
+    def __init__(self, name: str, **attrs: Any):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs: Dict[str, Any] = attrs
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.duration_ms: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.duration_ms is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'ts': round(self.started_at, 3),
+            'duration_ms': self.duration_ms,
+            **self.attrs,
+            'spans': self.spans,
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+def set_trace_attr(key: str, value: Any) -> None:
+    """Attach an attribute (handler name, user id...) to the current trace"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attrs[key] = value
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs: Any) -> Iterator[Optional[Dict[str, Any]]]:
+    """Record a timed span in the current trace; a no-op outside of traces.
+
+    Spans from tasks that outlive their update (debounced renders) are
+    dropped once the trace has been exported.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    record: Dict[str, Any] = {
+        'kind': kind,
+        'name': name,
+        'start_ms': round((time.perf_counter() - trace.started) * 1000, 1),
+        **attrs,
+    }
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record['error'] = e.__class__.__name__
+        raise
+    finally:
+        record['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        if not trace.finished:
+            trace.spans.append(record)
+
+
+class TraceExporter:
+    """Writes finished traces as JSON lines from a background thread.
+
+    The file is rotated to <file>.1 once it grows past the size limit, so
+    traces can be collected and aggregated offline without filling the disk.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.exported = 0
+        self._queue: 'queue.SimpleQueue[Optional[Dict]]' = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, trace: Trace) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+            self._thread.start()
+        self._queue.put(trace.to_dict())
+        self.exported += 1
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._write(item)
+            except Exception as e:
+                logger.warning("Failed to export trace: %s", e)
+
+    def _write(self, item: Dict) -> None:
+        line = json.dumps(item, ensure_ascii=False, default=str) + '\n'
+        if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+            os.replace(self.path, self.path + '.1')
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def close(self) -> None:
+        """Write queued traces and stop the thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+class Tracer:
+    """Starts and finishes per-update traces"""
+
+    def __init__(self):
+        self.exporter = TraceExporter(settings.trace_file, settings.trace_file_max_bytes)
+
+    def start(self, name: str, **attrs: Any) -> Optional[Trace]:
+        """Begin a trace in the current context, subject to sampling"""
+        if not settings.trace_enabled or random.random() >= settings.trace_sample_rate:
+            _current_trace.set(None)
+            return None
+        trace = Trace(name, **attrs)
+        _current_trace.set(trace)
+        return trace
+
+    def finish(self, trace: Optional[Trace]) -> None:
+        if trace is None or trace.finished:
+            return
+        trace.duration_ms = round((time.perf_counter() - trace.started) * 1000, 1)
+        _current_trace.set(None)
+        self.exporter.export(trace)
+
+    def close(self) -> None:
+        self.exporter.close()
+
+
+# Глобальный экземпляр трассировки
+tracer = Tracer()
@@ -0,0 +1,59 @@
+import logging
+from typing import Any, Dict, Hashable, Optional
+
+from config import settings
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class UserDataCache:
+    """Per-user cache of order lists and Zelle assignment data.
+
+    Entries are dropped precisely when the bot learns about a change (new
+    order, /admin/zelle, /admin/tracking); the TTL is only a safety net for
+    changes made in Laravel without notifying the bot.
+    """
+
+    def __init__(self):
+        # user_id -> {('page', page, per_page) or ('order', order_id): response}; grouped by
+        # user so a webhook drops a user's entries with one pop. They expire together,
+        # user_cache_ttl after the first one was cached
+        self.orders = TTLCache(settings.user_cache_ttl, settings.user_cache_max_entries)
+        # Keys: user_id
+        self.zelle = TTLCache(settings.user_cache_ttl, settings.user_cache_max_entries)
+
+    def get_orders(self, user_id: int, key: Hashable) -> Optional[Any]:
+        """Cached order page or order of a user"""
+        entries = self.orders.get(user_id)
+        return None if entries is None else entries.get(key)
+
+    def set_orders(self, user_id: int, key: Hashable, value: Any) -> None:
+        entries = self.orders.get(user_id)
+        if entries is None:
+            entries = {}
+            self.orders.set(user_id, entries)
+        entries[key] = value
+
+    def invalidate_orders(self, user_id: int) -> int:
+        """Forget every cached order page and order of a user"""
+        entries = self.orders.get(user_id)
+        removed = len(entries) if entries else 0
+        self.orders.pop(user_id)
+        logger.debug("Invalidated %s cached order entries for user %s", removed, user_id)
+        return removed
+
+    def invalidate_zelle(self, user_id: int) -> bool:
+        """Forget cached Zelle assignment of a user"""
+        return self.zelle.pop(user_id)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.invalidate_orders(user_id)
+        self.invalidate_zelle(user_id)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {'orders': self.orders.stats(), 'zelle': self.zelle.stats()}
+
+
+# Глобальный экземпляр кэша пользовательских данных
+user_cache = UserDataCache()
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from utils.json_codec import loads
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(user_id: int, workers: int) -> int:
+    """Worker index for a user; the same user always lands on the same worker"""
+    return user_id % workers
+
+
+class WorkerPool:
+    """Worker processes running the routers, fed by the intake process.
+
+    Each worker has its own queue. Updates are routed by user id, so a
+    user's cart, FSM state and caches stay in one process, and the state
+    is also written to the shared SQLite store so a restarted worker picks
+    it up. Invalidations from admin webhooks are broadcast to all workers.
+    """
+
+    def __init__(self, workers: int, state_path: str):
+        self.workers = workers
+        self.state_path = state_path
+        self._context = multiprocessing.get_context('spawn')
+        self.queues = [self._context.Queue(settings.worker_queue_size) for _ in range(workers)]
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.routed = [0] * workers
+        self.restarts = 0
+        self._supervisor: Optional[asyncio.Task] = None
+
+    def _spawn(self, index: int) -> None:
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, self.queues[index], self.state_path),
+            name=f'bot-worker-{index}',
+            daemon=True
+        )
+        process.start()
+        self.processes[index] = process
+        logger.info("Worker %s started (pid %s)", index, process.pid)
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            self._spawn(index)
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    async def _supervise(self) -> None:
+        """Restart workers that died; their users' state is in the shared store"""
+        while True:
+            await asyncio.sleep(settings.worker_check_interval)
+            for index, process in enumerate(self.processes):
+                if process is not None and not process.is_alive():
+                    logger.error("Worker %s exited with code %s, restarting", index, process.exitcode)
+                    self.restarts += 1
+                    self._spawn(index)
+
+    async def _put(self, index: int, item: tuple) -> None:
+        try:
+            self.queues[index].put_nowait(item)
+        except queue.Full:
+            # Backpressure: wait in a thread instead of blocking the intake loop
+            await asyncio.get_running_loop().run_in_executor(None, self.queues[index].put, item)
+
+    async def dispatch(self, user_id: int, raw_update: str) -> None:
+        """Send a serialized update to the user's worker"""
+        index = shard_for(user_id, self.workers)
+        self.routed[index] += 1
+        await self._put(index, ('update', user_id, raw_update))
+
+    def broadcast(self, kind: str, payload: Any) -> None:
+        """Forward an invalidation to every worker"""
+        for worker_queue in self.queues:
+            try:
+                worker_queue.put_nowait(('invalidate', kind, payload))
+            except queue.Full:
+                logger.error("Worker queue full, invalidation %s dropped", kind)
+
+    async def stop(self, timeout: float = 10) -> None:
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+        for index in range(self.workers):
+            await self._put(index, ('stop',))
+        loop = asyncio.get_running_loop()
+        for process in self.processes:
+            if process is None:
+                continue
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                process.terminate()
+
+    def stats(self) -> Dict:
+        return {
+            'workers': self.workers,
+            'alive': sum(1 for process in self.processes if process is not None and process.is_alive()),
+            'routed': list(self.routed),
+            'restarts': self.restarts,
+        }
+
+
+def worker_main(index: int, updates: multiprocessing.Queue, state_path: str) -> None:
+    """Entry point of a worker process"""
+    asyncio.run(_run_worker(index, updates, state_path))
+
+
+async def _run_worker(index: int, updates: multiprocessing.Queue, state_path: str) -> None:
+    # Imported in the child: every worker builds its own bot, dispatcher and caches
+    import bot as bot_module
+    from services.api_client import api_client
+    from services.cart_service import cart_service
+    from services.invalidation import invalidation_bus
+    from services.loop_monitor import loop_monitor
+    from services.shared_state import SQLiteStateStore, SQLiteStorage
+    from services.tracing import tracer
+    from utils.logging_setup import stop_logging
+
+    store = SQLiteStateStore(state_path)
+    cart_service.attach_store(store)
+    bot = bot_module.create_bot()
+    dp = bot_module.create_dispatcher(storage=SQLiteStorage(store))
+
+    try:
+        await asyncio.wait_for(bot_module.warm_up(bot), settings.warmup_deadline)
+    except asyncio.TimeoutError:
+        logger.warning("Worker %s warm-up did not finish in %ss", index, settings.warmup_deadline)
+    loop_monitor.start()
+
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    # user id -> [lock, updates waiting or running]
+    user_locks: Dict[int, list] = {}
+    
+    async def handle(user_id: int, raw_update: str):
+        # A backlog (slow start, restart) must not run one user's steps out of order;
+        # asyncio.Lock wakes waiters in FIFO order
+        entry = user_locks.setdefault(user_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await cart_service.preload(user_id)
+                await dp.feed_raw_update(bot, loads(raw_update))
+        except Exception as e:
+            logger.error("Worker %s failed to handle update: %s", index, e)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del user_locks[user_id]
+    
+    try:
+        while True:
+            message = await loop.run_in_executor(None, updates.get)
+            if message[0] == 'stop':
+                break
+            if message[0] == 'invalidate':
+                invalidation_bus.apply(message[1], message[2])
+                continue
+            # Different users are handled concurrently, as in polling mode
+            task = asyncio.create_task(handle(message[1], message[2]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks, timeout=settings.worker_check_interval * 5)
+    finally:
+        await loop_monitor.stop()
+        # Queued cart writes go to the store before it is closed
+        cart_service.close_store()
+        await dp.storage.close()
+        await bot.session.close()
+        await api_client.close()
+        tracer.close()
+        stop_logging()
@@ -0,0 +1,99 @@
+import re
+
+import pytest
+
+from utils.message_builder import (
+    TELEGRAM_MESSAGE_LIMIT, MessageBuilder, _open_tags, _safe_cut, split_html, text_length,
+)
+
+_TAG = re.compile(r'<[^>]*>')
+
+
+def assert_valid_chunks(chunks, limit=TELEGRAM_MESSAGE_LIMIT):
+    for chunk in chunks:
+        assert chunk
+        assert text_length(chunk) <= limit
+        # Every tag opened in a chunk is closed in it, and nothing is cut inside a tag
+        assert _open_tags(chunk, []) == []
+        assert chunk.count('<') == chunk.count('>')
+
+
+def plain(text):
+    return _TAG.sub('', text).replace('\n', '')
+
+
+def test_text_length_counts_utf16_units():
+    assert text_length('abc') == 3
+    assert text_length('é') == 1
+    assert text_length('😀') == 2
+
+
+def test_exactly_at_limit_is_one_chunk():
+    text = '😀' * (TELEGRAM_MESSAGE_LIMIT // 2)
+    assert split_html(text) == [text]
+
+
+def test_one_unit_over_limit_is_split():
+    text = 'a' + '😀' * (TELEGRAM_MESSAGE_LIMIT // 2)
+    chunks = split_html(text)
+    assert len(chunks) == 2
+    assert_valid_chunks(chunks)
+    assert ''.join(chunks) == text
+
+
+def test_emoji_and_nested_tags_at_the_limit():
+    line = '<b>Order <i>#42 😀 <code>x&amp;y</code></i> 🛍️</b> total $12.50\n'
+    text = '<blockquote>' + line * 400 + '</blockquote>'
+    chunks = split_html(text)
+    assert len(chunks) > 1
+    assert_valid_chunks(chunks)
+    assert plain(''.join(chunks)) == plain(text)
+    # Tags open at a cut are reopened in the next chunk
+    assert all(chunk.startswith('<blockquote>') for chunk in chunks)
+
+
+def test_hard_cut_without_newlines_keeps_tags_and_entities_whole():
+    text = ('<b>bold <i>😀 italic</i></b> &lt;tag&gt; ' * 600).strip()
+    chunks = split_html(text)
+    assert_valid_chunks(chunks)
+    assert plain(''.join(chunks)) == plain(text)
+    for chunk in chunks:
+        assert not re.search(r'&[a-z]*$', _TAG.sub('', chunk))
+
+
+def test_safe_cut_moves_before_tag_and_entity():
+    assert _safe_cut('<b>bold</b>', 2) == 0
+    assert _safe_cut('ab<b>cd', 4) == 2
+    assert _safe_cut('&amp;x', 3) == 0
+    assert _safe_cut('ab&amp;', 5) == 2
+    assert _safe_cut('<b>ok</b>abc', 10) == 10
+
+
+@pytest.mark.parametrize('limit', [100, 257, 1000])
+def test_small_limits_with_tag_at_chunk_start(limit):
+    text = '<b>' + 'word ' * 200 + '</b><a href="https://example.com/x">' + 'link ' * 50 + '</a>'
+    chunks = split_html(text, limit)
+    assert_valid_chunks(chunks, limit)
+    assert plain(''.join(chunks)).replace(' ', '') == plain(text).replace(' ', '')
+
+
+def test_tag_longer_than_limit_does_not_loop():
+    text = '<a href="' + 'x' * 200 + '">link</a>'
+    chunks = split_html(text, 100)
+    assert chunks
+    assert ''.join(chunks).endswith('link</a>')
+
+
+def test_builder_packs_whole_blocks():
+    builder = MessageBuilder(limit=50)
+    for i in range(10):
+        builder.block().line(f'<b>Item {i}</b> 😀')
+    parts = builder.parts()
+    assert len(parts) > 1
+    assert_valid_chunks(parts, 50)
+    assert '\n'.join(parts).count('<b>Item') == 10
+
+
+def test_empty_builder_has_no_parts():
+    assert MessageBuilder().parts() == []
+    assert MessageBuilder().line().line().parts() == []
@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+import pytest
+
+from services.cart_service import cart_service
+from services.pricing import PricingService, calculate_quote, format_cents, promo_from_state, to_cents
+
+
+def cart(*lines):
+    return [{'id': i, 'name': f'Item {i}', 'price': price, 'quantity': quantity}
+            for i, (price, quantity) in enumerate(lines, 1)]
+
+
+@pytest.mark.parametrize('value, cents', [
+    (12, 1200),
+    ('12', 1200),
+    ('12.5', 1250),
+    ('12.99', 1299),
+    (12.5, 1250),
+    (' 7.05 ', 705),
+    (Decimal('19.999'), 2000),
+    ('12.345', 1235),
+    ('12.344', 1234),
+    (0.1 + 0.2, 30),
+    ('-5.5', -550),
+    ('abc', 0),
+    ('', 0),
+])
+def test_to_cents(value, cents):
+    assert to_cents(value) == cents
+
+
+@pytest.mark.parametrize('cents, text', [(0, '$0.00'), (5, '$0.05'), (1250, '$12.50'), (-499, '-$4.99')])
+def test_format_cents(cents, text):
+    assert format_cents(cents) == text
+
+
+def test_quote_without_promo():
+    quote = calculate_quote(cart(('19.99', 3), ('0.10', 7)))
+    assert [line.total_cents for line in quote.lines] == [5997, 70]
+    assert quote.subtotal_cents == 6067
+    assert quote.discount_cents == 0
+    assert quote.total_cents == 6067
+
+
+def test_percentage_discount_rounds_half_up():
+    # 10% of $10.05 is 100.5 cents
+    quote = calculate_quote(cart(('10.05', 1)), ('SALE', 'percentage', '10'))
+    assert quote.discount_cents == 101
+    assert quote.total_cents == 904
+    assert quote.promo_label == '(-10%)'
+
+
+def test_fractional_percentage():
+    quote = calculate_quote(cart(('33.33', 3)), ('SALE', 'percentage', '12.5'))
+    # 9999 * 0.125 = 1249.875
+    assert quote.discount_cents == 1250
+    assert quote.total_cents == 8749
+
+
+def test_fixed_discount():
+    quote = calculate_quote(cart(('20', 2)), ('FIVE', 'fixed', '5.5'))
+    assert quote.discount_cents == 550
+    assert quote.total_cents == 3450
+    assert quote.promo_label == '(-$5.50)'
+
+
+@pytest.mark.parametrize('promo', [('BIG', 'fixed', '100'), ('ALL', 'percentage', '150')])
+def test_discount_never_exceeds_subtotal(promo):
+    quote = calculate_quote(cart(('12.34', 1)), promo)
+    assert quote.discount_cents == 1234
+    assert quote.total_cents == 0
+
+
+def test_unknown_discount_type_is_percentage():
+    quote = calculate_quote(cart(('10', 1)), ('X', 'weird', '10'))
+    assert quote.discount_type == 'percentage'
+    assert quote.discount_cents == 100
+
+
+def test_promo_from_state():
+    assert promo_from_state({}) is None
+    assert promo_from_state({'promocode': 'SALE', 'discount_type': 'fixed', 'discount_value': 5.0}) == ('SALE', 'fixed', '5')
+    assert promo_from_state({'promocode': 'SALE', 'discount_value': '12.50'}) == ('SALE', 'percentage', '12.5')
+
+
+def test_service_caches_quote_per_cart_version():
+    service = PricingService()
+    user_id = 910001
+    cart_service.clear_cart(user_id)
+    cart_service.add_to_cart(user_id, {'id': 1, 'name': 'A', 'price': '10.00'})
+
+    first = service.quote(user_id)
+    assert service.quote(user_id) is first
+    assert service.computed == 1
+
+    cart_service.add_to_cart(user_id, {'id': 1, 'name': 'A', 'price': '10.00'})
+    second = service.quote(user_id)
+    assert second is not first
+    assert second.subtotal_cents == 2000
+
+    cart_service.update_quantity(user_id, 1, 5)
+    assert service.quote(user_id).subtotal_cents == 5000
+
+    cart_service.remove_from_cart(user_id, 1)
+    assert service.quote(user_id).subtotal_cents == 0
+
+    cart_service.add_to_cart(user_id, {'id': 2, 'name': 'B', 'price': '3'})
+    cart_service.clear_cart(user_id)
+    assert service.quote(user_id).lines == ()
+    assert service.computed == 5
+
+
+def test_service_recomputes_when_promo_changes():
+    service = PricingService()
+    user_id = 910002
+    cart_service.clear_cart(user_id)
+    cart_service.add_to_cart(user_id, {'id': 1, 'name': 'A', 'price': '50'})
+
+    plain = service.quote(user_id)
+    discounted = service.quote(user_id, {'promocode': 'TEN', 'discount_type': 'percentage', 'discount_value': 10})
+    assert plain.total_cents == 5000
+    assert discounted.total_cents == 4500
+    assert service.quote(user_id, {'promocode': 'TEN', 'discount_type': 'percentage', 'discount_value': 10}) is discounted
+    assert service.quote(user_id).total_cents == 5000
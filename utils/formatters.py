@@ -1,6 +1,9 @@
 from typing import Dict, List, Any
 from datetime import datetime
 
+from services.pricing import PriceQuote, format_cents
+from utils.message_builder import MessageBuilder
+
 def format_product_message(product: Dict) -> str:
     """Product message formatting"""
     
@@ -59,42 +62,62 @@ def format_order_message(order: Dict) -> str:
     
     return message
 
-def format_cart_message(cart_items: List[Dict], total: float) -> str:
-    """Cart message formatting"""
+def build_cart_message(quote: PriceQuote) -> MessageBuilder:
+    """Cart message builder, one block per cart line"""
     
-    if not cart_items:
-        return "🛒 <b>Your cart is empty</b>\n\nAdd products from catalog!"
+    builder = MessageBuilder()
     
-    message = "🛒 <b>Your cart:</b>\n\n"
+    if not quote.lines:
+        return builder.add("🛒 <b>Your cart is empty</b>\n\nAdd products from catalog!")
     
-    for item in cart_items:
-        message += f"• {item['name']}\n"
-        message += f"  Price: ${item['price']} x {item['quantity']} = ${item['total']}\n\n"
+    builder.add("🛒 <b>Your cart:</b>\n\n")
     
-    message += f"💰 <b>Total: ${total}</b>"
+    for line in quote.lines:
+        builder.block().add(
+            "• ", line.name, "\n",
+            f"  Price: {format_cents(line.unit_cents)} x {line.quantity} = {format_cents(line.total_cents)}\n\n"
+        )
     
-    return message
+    builder.block().add(f"💰 <b>Total: {format_cents(quote.subtotal_cents)}</b>")
+    
+    return builder
 
-def format_order_confirmation(cart_items: List[Dict], total: float, order_data: Dict) -> str:
-    """Order confirmation formatting"""
+def format_cart_message(quote: PriceQuote) -> str:
+    """Cart message formatting"""
+    return build_cart_message(quote).build()
+
+def build_price_summary(quote: PriceQuote) -> MessageBuilder:
+    """Subtotal, discount and amount to pay of a quote"""
     
-    message = "🛒 <b>Your order:</b>\n\n"
+    builder = MessageBuilder()
+    builder.add(f"💰 <b>Total: {format_cents(quote.subtotal_cents)}</b>\n\n")
     
-    for item in cart_items:
-        message += f"• {item['name']}\n"
-        message += f"  ${item['price']} x {item['quantity']} = ${item['total']}\n\n"
+    if quote.promocode:
+        builder.add(
+            f"🎫 <b>Promo code:</b> {quote.promocode} {quote.promo_label}\n",
+            f"💰 <b>Discount:</b> -{format_cents(quote.discount_cents)}\n",
+            f"💵 <b>Total to pay:</b> {format_cents(quote.total_cents)}\n\n"
+        )
     
-    message += f"💰 <b>Total: ${total}</b>\n\n"
+    return builder
+
+def build_order_confirmation(quote: PriceQuote, order_data: Dict) -> MessageBuilder:
+    """Order confirmation builder, one block per order line"""
+    
+    builder = MessageBuilder()
+    builder.add("🛒 <b>Your order:</b>\n\n")
     
-    if order_data.get('promocode'):
-        message += f"🎫 <b>Promo code:</b> {order_data['promocode']}\n\n"
+    for line in quote.lines:
+        builder.block().add(
+            "• ", line.name, "\n",
+            f"  {format_cents(line.unit_cents)} x {line.quantity} = {format_cents(line.total_cents)}\n\n"
+        )
     
-    message += f"📞 <b>Phone:</b> {order_data.get('phone', 'Not specified')}\n\n"
+    builder.extend(build_price_summary(quote))
     
-    # Format shipping address from separate fields
-    address_line = ""
+    builder.add(f"📞 <b>Phone:</b> {order_data.get('phone') or 'Not specified'}\n\n")
     
-    # Collect full address
+    # Collect full address from separate fields
     name_parts = []
     if order_data.get('first_name'):
         name_parts.append(order_data['first_name'])
@@ -125,14 +148,15 @@ def format_order_confirmation(cart_items: List[Dict], total: float, order_data:
     if order_data.get('company'):
         address_components.append(f"({order_data['company']})")
     
-    if address_components:
-        address_line = '\n'.join(address_components)
-    else:
-        address_line = "Not specified"
+    address_line = '\n'.join(address_components) if address_components else "Not specified"
     
-    message += f"📍 <b>Shipping address:</b>\n{address_line}"
+    builder.block().add("📍 <b>Shipping address:</b>\n", address_line)
     
-    return message
+    return builder
+
+def format_order_confirmation(quote: PriceQuote, order_data: Dict) -> str:
+    """Order confirmation formatting"""
+    return build_order_confirmation(quote, order_data).build()
 
 
 def format_price(price_kopecks: int) -> str:
@@ -0,0 +1,42 @@
+"""JSON encoding and decoding for Laravel responses, the admin app and the bot session.
+
+orjson is used when it is installed (pip install orjson), the standard
+library json module otherwise. Both sides produce and accept the same
+documents, so the backend can be switched without touching callers.
+"""
+import json
+from functools import partial
+from typing import Any, Union
+
+from aiohttp import web
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def stdlib_loads(data: Union[str, bytes]) -> Any:
+    return json.loads(data)
+
+
+def stdlib_dumps(obj: Any) -> str:
+    return json.dumps(obj)
+
+
+if orjson is not None:
+    BACKEND = 'orjson'
+
+    def loads(data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> str:
+        # Non-str keys (int ids in dicts) are accepted by json.dumps as well
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+else:
+    BACKEND = 'json'
+    loads = stdlib_loads
+    dumps = stdlib_dumps
+
+# web.json_response with the fast encoder
+json_response = partial(web.json_response, dumps=dumps)
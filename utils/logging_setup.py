@@ -0,0 +1,119 @@
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Dict, Optional, Tuple
+
+from config import settings
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed in extra={...} are included"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc'] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one of every N debug records per call site.
+
+    Counting per (logger, message template) means a per-product or
+    per-request debug line is thinned out, while a rare one still shows up
+    on its first occurrence. INFO and above always pass.
+    """
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self._seen: Dict[Tuple[str, object], int] = {}
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        key = (record.name, record.msg)
+        seen = self._seen.get(key, 0)
+        if len(self._seen) > 10000:
+            self._seen.clear()
+        self._seen[key] = seen + 1
+        if seen % self.every == 0:
+            return True
+        self.dropped += 1
+        return False
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock prepare() merges msg and args in the calling coroutine, which
+    is exactly the work we want off the event loop. Only the exception
+    traceback is rendered here, because it cannot be formatted once the
+    frames are gone. Log arguments should therefore be immutable values.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Route all logging through a queue to a background writer thread"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    level = settings.log_level or ('INFO' if settings.debug else 'WARNING')
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.log_format == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    records = queue.SimpleQueue()
+    handler = LazyQueueHandler(records)
+    # Sampling runs before enqueueing, so dropped records cost almost nothing
+    handler.addFilter(SamplingFilter(settings.log_debug_sample_every))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    # aiogram logs every handled update at INFO; durations are in /metrics instead
+    if root.level > logging.DEBUG:
+        logging.getLogger('aiogram.event').setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
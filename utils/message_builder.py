@@ -0,0 +1,172 @@
+import re
+from typing import List, Tuple
+
+# Telegram rejects message texts longer than this
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+_TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>')
+
+
+def text_length(text: str) -> int:
+    """Length as Telegram counts it (UTF-16 code units)"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _open_tags(text: str, stack: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Update stack of (name, full opening tag) with the tags in text"""
+    for match in _TAG_RE.finditer(text):
+        closing, name = match.group(1), match.group(2).lower()
+        if not closing:
+            stack.append((name, match.group(0)))
+            continue
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0] == name:
+                del stack[i:]
+                break
+    return stack
+
+
+def _fit(text: str, limit: int) -> int:
+    """Number of leading characters of text that fit into limit UTF-16 units"""
+    if text.isascii():
+        return min(len(text), limit)
+    units = 0
+    for index, char in enumerate(text):
+        units += 2 if ord(char) > 0xFFFF else 1
+        if units > limit:
+            return index
+    return len(text)
+
+
+def _safe_cut(text: str, cut: int) -> int:
+    """Index <= cut that does not fall inside a tag or an HTML entity"""
+    lt = text.rfind('<', 0, cut)
+    if lt >= 0 and text.find('>', lt, cut) == -1:
+        cut = lt
+    amp = text.rfind('&', 0, cut)
+    if amp >= 0 and ';' not in text[amp:cut] and cut - amp <= 10:
+        cut = amp
+    return cut
+
+
+def split_html(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """Split HTML text into chunks of at most limit, keeping tags balanced.
+
+    Prefers paragraph breaks, then line breaks, then a hard cut. Tags left
+    open at a cut are closed at the end of the chunk and reopened at the
+    start of the next one.
+    """
+    chunks: List[str] = []
+    stack: List[Tuple[str, str]] = []
+    rest = text
+
+    while rest:
+        prefix = ''.join(tag for _, tag in stack)
+        # Reserve room for re-closing the currently open tags
+        budget = limit - text_length(prefix) - sum(len(name) + 3 for name, _ in stack) - 32
+
+        if text_length(prefix + rest) <= limit and not stack:
+            chunks.append(rest)
+            break
+        if text_length(rest) <= budget:
+            chunks.append(prefix + rest)
+            break
+
+        size = _fit(rest, budget)
+        window = rest[:size]
+        cut = window.rfind('\n\n')
+        if cut <= size // 4:
+            cut = window.rfind('\n')
+        if cut <= size // 4:
+            # 0 means a tag longer than the whole chunk; cutting it is the only way forward
+            cut = _safe_cut(rest, size) or size
+        else:
+            cut += 1
+
+        piece, rest = rest[:cut], rest[cut:].lstrip('\n')
+        opened = _open_tags(piece, list(stack))
+        closing = ''.join(f'</{name}>' for name, _ in reversed(opened))
+        chunks.append(prefix + piece.rstrip('\n') + closing)
+        stack = opened
+
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+class MessageBuilder:
+    """Assembles a message from pieces with a single join.
+
+    Pieces are grouped into blocks (one per cart line, order item, etc.).
+    parts() packs whole blocks into Telegram-sized messages, so a split
+    never happens in the middle of an item.
+    """
+
+    def __init__(self, limit: int = TELEGRAM_MESSAGE_LIMIT):
+        self.limit = limit
+        self._blocks: List[List[str]] = [[]]
+
+    def add(self, *pieces: str) -> 'MessageBuilder':
+        """Append raw pieces to the current block"""
+        self._blocks[-1].extend(pieces)
+        return self
+
+    def line(self, text: str = '') -> 'MessageBuilder':
+        """Append text followed by a newline"""
+        self._blocks[-1].extend((text, '\n'))
+        return self
+
+    def block(self) -> 'MessageBuilder':
+        """Start a new block; messages may be split only between blocks"""
+        if self._blocks[-1]:
+            self._blocks.append([])
+        return self
+
+    def extend(self, other: 'MessageBuilder') -> 'MessageBuilder':
+        """Append the blocks of another builder"""
+        self.block()
+        for pieces in other._blocks:
+            if pieces:
+                self._blocks[-1].extend(pieces)
+                self._blocks.append([])
+        return self
+
+    def build(self) -> str:
+        """Whole message as one string (may exceed the Telegram limit)"""
+        return ''.join(piece for pieces in self._blocks for piece in pieces)
+
+    def parts(self) -> List[str]:
+        """Message split into chunks that fit the Telegram limit; [] when empty"""
+        chunks: List[str] = []
+        current: List[str] = []
+        current_length = 0
+
+        for pieces in self._blocks:
+            if not pieces:
+                continue
+            block = ''.join(pieces)
+            block_length = text_length(block)
+
+            if current and current_length + block_length > self.limit:
+                chunks.append(''.join(current))
+                current, current_length = [], 0
+
+            if block_length > self.limit:
+                chunks.extend(split_html(block, self.limit))
+                continue
+
+            current.append(block)
+            current_length += block_length
+
+        if current:
+            chunks.append(''.join(current))
+
+        chunks = [chunk.strip('\n') for chunk in chunks]
+        # Telegram rejects empty texts
+        return [chunk for chunk in chunks if chunk]
+
+    def __str__(self) -> str:
+        return self.build()
+
+    def __len__(self) -> int:
+        return text_length(self.build())